@@ -0,0 +1,203 @@
+import queue
+import threading
+import time
+import numpy as np
+
+#Źródła próbek dla dekodera: odbiór z SDR w osobnym wątku (demodulacja nie blokuje czytania z USB),
+#odtwarzanie nagrań z pliku oraz zapis odbieranych próbek na dysk.
+#Każde źródło ma ten sam interfejs: start(), read() -> (token, surowe IQ) lub None na końcu strumienia,
+#release(token) po przetworzeniu bloku, close() i stats().
+
+#Konfiguracja odbiornika
+SAMPLE_RATE = 2000000
+CENTER_FREQ = 1090000000
+FREQ_CORRECTION = 1
+GAIN = 49.6
+
+BLOCK_SIZE = 512 * 1024 #próbek w jednym bloku (~262 ms przy 2 MSPS)
+BLOCK_BYTES = BLOCK_SIZE * 2 #surowe IQ: 1 bajt I + 1 bajt Q na próbkę
+RING_BUFFERS = 8 #liczba prealokowanych buforów (~2 s zapasu gdy demodulator nie nadąża)
+
+class BufferRing:
+    #Pula prealokowanych buforów + ograniczona kolejka wypełnionych buforów.
+    #Producent (wątek SDR) nigdy nie czeka - gdy brak wolnego bufora, blok jest liczony jako zgubiony.
+    def __init__(self, n_buffers, block_size, dtype):
+        self.buffers = [np.empty(block_size, dtype=dtype) for _ in range(n_buffers)]
+        self.free = queue.Queue()
+        for i in range(n_buffers):
+            self.free.put(i)
+        self.filled = queue.Queue(maxsize=n_buffers)
+        self.produced = 0
+        self.consumed = 0
+        self.dropped = 0
+        self.max_queued = 0
+
+    def push(self, data):
+        #Kopiuje dane do wolnego bufora i wstawia go do kolejki. Zwraca False gdy blok zgubiono.
+        try:
+            i = self.free.get_nowait()
+        except queue.Empty:
+            self.dropped += 1
+            return False
+        buf = self.buffers[i]
+        n = min(len(data), len(buf))
+        buf[:n] = data[:n]
+        self.filled.put_nowait((i, n))
+        self.produced += 1
+        self.max_queued = max(self.max_queued, self.filled.qsize())
+        return True
+
+    def get(self, timeout=None):
+        #Pobiera wypełniony bufor (blokuje). Zwraca (indeks, widok na dane).
+        i, n = self.filled.get(timeout=timeout)
+        self.consumed += 1
+        return i, self.buffers[i][:n]
+
+    def release(self, i):
+        #Oddaje bufor do puli po przetworzeniu
+        self.free.put_nowait(i)
+
+    def stats(self):
+        return {
+            "buffers": len(self.buffers),
+            "queued": self.filled.qsize(),
+            "max_queued": self.max_queued,
+            "produced": self.produced,
+            "consumed": self.consumed,
+            "dropped": self.dropped
+        }
+
+class SdrReader(threading.Thread):
+    #Wątek czytający asynchronicznie z RTL-SDR prosto do BufferRing.
+    #Czytamy surowe bajty IQ (uint8) - bez konwersji na complex128 po stronie pyrtlsdr.
+    def __init__(self, sdr, ring, block_bytes=BLOCK_BYTES):
+        super().__init__(daemon=True)
+        self.sdr = sdr
+        self.ring = ring
+        self.block_bytes = block_bytes
+
+    def run(self):
+        #read_bytes_async blokuje do czasu cancel_read_async(), callback dostaje gotowy blok
+        self.sdr.read_bytes_async(self._on_bytes, self.block_bytes)
+
+    def _on_bytes(self, buffer, context):
+        #buffer to tablica ctypes z bufora librtlsdr - widok bez kopiowania, kopia dopiero do ringu
+        self.ring.push(np.frombuffer(buffer, dtype=np.uint8))
+
+    def stop(self):
+        try:
+            self.sdr.cancel_read_async()
+        except Exception:
+            pass
+
+class RtlSdrSource:
+    #Odbiór na żywo z RTL-SDR przez SdrReader i BufferRing
+    live = True #odbiór na żywo - watchdog restartuje przy braku sygnału i loguje statystyki bloków
+    def __init__(self, block_bytes=BLOCK_BYTES, n_buffers=RING_BUFFERS):
+        from rtlsdr import RtlSdr #sterownik potrzebny tylko przy odbiorze na żywo
+        self.sdr = RtlSdr()
+        self.sdr.sample_rate = SAMPLE_RATE
+        self.sdr.center_freq = CENTER_FREQ
+        self.sdr.freq_correction = FREQ_CORRECTION
+        self.sdr.gain = GAIN
+        #Bloki to surowe bajty IQ (uint8), amplitudę liczy demodulator z tablicy LUT
+        self.ring = BufferRing(n_buffers, block_bytes, np.uint8)
+        self.reader = SdrReader(self.sdr, self.ring, block_bytes)
+
+    def start(self):
+        self.reader.start()
+
+    def read(self, timeout=None):
+        return self.ring.get(timeout=timeout)
+
+    def release(self, token):
+        self.ring.release(token)
+
+    def close(self):
+        self.reader.stop()
+        self.sdr.close()
+
+    def stats(self):
+        return self.ring.stats()
+
+class FileSource:
+    #Odtwarzanie nagrania z rtl_sdr (surowe IQ u8, np. rtl_sdr -f 1090000000 -s 2000000 nagranie.bin)
+    #Plik jest mapowany do pamięci (memmap), bloki to widoki bez kopiowania.
+    #realtime=True odtwarza w tempie odbiornika, inaczej z maksymalną prędkością.
+    live = False #nagranie po prostu się kończy
+
+    def __init__(self, path, block_bytes=BLOCK_BYTES, realtime=False, sample_rate=SAMPLE_RATE):
+        self.path = path
+        self.data = np.memmap(path, dtype=np.uint8, mode="r")
+        self.size = len(self.data) - len(self.data) % 2 #tylko pełne pary IQ
+        self.block_bytes = block_bytes
+        self.realtime = realtime
+        self.sample_rate = sample_rate
+        self.position = 0
+        self.blocks = 0
+        self.started = None
+
+    def start(self):
+        self.started = time.perf_counter()
+
+    def read(self, timeout=None):
+        if self.position >= self.size:
+            return None #koniec nagrania
+        end = min(self.position + self.block_bytes, self.size)
+        block = self.data[self.position:end]
+        self.position = end
+        self.blocks += 1
+        if self.realtime:
+            #Czekamy aż "nadejdzie" ostatnia próbka bloku
+            delay = self.started + self.position / 2 / self.sample_rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        return None, block
+
+    def release(self, token):
+        pass
+
+    def close(self):
+        self.data = None
+
+    def stats(self):
+        return {
+            "file": self.path,
+            "blocks": self.blocks,
+            "position": self.position,
+            "size": self.size
+        }
+
+class Recorder:
+    #Zapisuje na dysk surowe IQ z dowolnego źródła (format rtl_sdr - można go potem odtworzyć przez FileSource)
+    def __init__(self, source, path):
+        self.source = source
+        self.path = path
+        self.file = open(path, "wb")
+        self.written = 0
+
+    @property
+    def live(self):
+        return self.source.live #na żywo, gdy nagrywamy odbiór z SDR
+
+    def start(self):
+        self.source.start()
+
+    def read(self, timeout=None):
+        item = self.source.read(timeout)
+        if item is not None:
+            item[1].tofile(self.file)
+            self.written += len(item[1])
+        return item
+
+    def release(self, token):
+        self.source.release(token)
+
+    def close(self):
+        self.source.close()
+        self.file.close()
+
+    def stats(self):
+        stats = dict(self.source.stats())
+        stats["recorded_bytes"] = self.written
+        return stats
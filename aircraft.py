@@ -0,0 +1,93 @@
+from track import Track
+
+#Rekord aktualnie śledzonego samolotu (wartość w main.planes).
+#__slots__ zamiast słownika: stały zestaw pól bez słownika atrybutów na każdy obiekt,
+#a trasa to track.Track (kolumny float32 z czasem i wysokością) zamiast listy list.
+
+#Pola zawsze obecne w JSON (także gdy None) - tak jak w dotychczasowym słowniku
+BASE_FIELDS = ("icao", "first_seen", "last_seen", "model", "dist", "min_dist", "max_dist",
+               "speed", "max_speed", "category")
+#Pola pojawiające się w JSON dopiero po odebraniu danych
+OPTIONAL_FIELDS = ("callsign", "altitude", "lat", "lon", "last_pos_time", "heading", "v_type")
+#Cechy z bazy modeli (registry.Registry.lookup) - tylko dla samolotów znalezionych w bazie
+INFO_FIELDS = ("rarity", "is_military", "operator_class")
+
+class Aircraft:
+    __slots__ = BASE_FIELDS + OPTIONAL_FIELDS + INFO_FIELDS + ("route", "version")
+
+    def __init__(self, icao, now, model="Nieznany model", tolerance=0.0):
+        self.icao = icao
+        self.first_seen = now
+        self.last_seen = now
+        self.model = model
+        self.dist = None
+        self.min_dist = None
+        self.max_dist = None
+        self.speed = 0
+        self.max_speed = 0
+        self.category = 0
+        self.callsign = None
+        self.altitude = None
+        self.lat = None
+        self.lon = None
+        self.last_pos_time = None
+        self.heading = None
+        self.v_type = None
+        self.rarity = None
+        self.is_military = None
+        self.operator_class = None
+        self.route = Track(tolerance)
+        self.version = 0 #wersja stanu z ostatniej zmiany (dla /data?since=N)
+
+    def update(self, dane):
+        #Jak dict.update - nieznane pole to błąd (AttributeError), a nie nowy klucz
+        for key, value in dane.items():
+            setattr(self, key, value)
+
+    def set_info(self, info):
+        #info z bazy modeli: (opis, punkty rzadkości, czy wojskowy, klasa operatora)
+        self.model, self.rarity, self.is_military, self.operator_class = info
+
+    def add_point(self, lat, lon, t, alt=None):
+        self.route.append(lat, lon, t, alt)
+
+    def route_len(self):
+        return len(self.route)
+
+    def route_points(self, start=0):
+        #Trasa w formacie API: lista [lat, lon]
+        return self.route.to_list(start)
+
+    def to_json_dict(self, route=False):
+        #Słownik do jsonify / zapisu w bazie, z tymi samymi kluczami co dawny słownik samolotu
+        d = {
+            "icao": self.icao,
+            "first_seen": self.first_seen,
+            "last_seen": self.last_seen,
+            "model": self.model,
+            "dist": self.dist,
+            "min_dist": self.min_dist,
+            "max_dist": self.max_dist,
+            "speed": self.speed,
+            "max_speed": self.max_speed,
+            "category": self.category
+        }
+        for key in OPTIONAL_FIELDS + INFO_FIELDS:
+            value = getattr(self, key)
+            if value is not None:
+                d[key] = value
+        if route:
+            d["route"] = self.route_points()
+        return d
+
+    @classmethod
+    def from_dict(cls, d, tolerance=0.0):
+        #Odwrotność to_json_dict (także ze starego słownika samolotu); czasy punktów trasy nie są zapisywane
+        plane = cls(d["icao"], d.get("first_seen", 0), d.get("model", "Nieznany model"), tolerance)
+        plane.update({k: v for k, v in d.items() if k not in ("icao", "route")})
+        for lat, lon in d.get("route") or ():
+            plane.add_point(lat, lon, plane.first_seen)
+        return plane
+
+    def __repr__(self):
+        return f"Aircraft({self.icao}, punkty trasy: {self.route_len()})"
@@ -9,6 +9,14 @@ interface ApiService {
     @GET("/data")
     suspend fun getPlanes(): List<Plane>
 
+    @GET("/data")
+    suspend fun getPlanesColumns(
+        @Query("since") since: Long,
+        @Query("boot") boot: String?,
+        @Query("fields") fields: String,
+        @Query("format") format: String = "columns"
+    ): PlanesColumns
+
     @GET("/route/{icao}")
     suspend fun getRoute(@Path("icao") icao: String): RouteResponse
 
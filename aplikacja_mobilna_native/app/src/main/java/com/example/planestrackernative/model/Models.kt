@@ -1,5 +1,6 @@
 package com.example.planestrackernative.model
 
+import com.google.gson.JsonElement
 import com.google.gson.annotations.SerializedName
 
 data class Plane(
@@ -19,6 +20,63 @@ data class Plane(
     @SerializedName("last_seen") val lastSeen: Double? = null
 )
 
+data class PlanesDelta(
+    val version: Long = 0,
+    val boot: String? = null,
+    val full: Boolean = true,
+    val removed: List<String> = emptyList(),
+    val planes: List<Plane> = emptyList()
+)
+
+// Columnar /data?format=columns: field names once, then one value array per field
+data class PlanesColumns(
+    val version: Long = 0,
+    val boot: String? = null,
+    val full: Boolean = true,
+    val removed: List<String> = emptyList(),
+    val fields: List<String> = emptyList(),
+    val columns: List<List<JsonElement?>> = emptyList()
+) {
+    private fun column(name: String): List<JsonElement?>? =
+        fields.indexOf(name).takeIf { it >= 0 }?.let { columns.getOrNull(it) }
+
+    fun toDelta(): PlanesDelta {
+        val icao = column("icao") ?: return PlanesDelta(version, boot, full, removed)
+        val callsign = column("callsign")
+        val model = column("model")
+        val lat = column("lat")
+        val lon = column("lon")
+        val altitude = column("altitude")
+        val speed = column("speed")
+        val heading = column("heading")
+        val dist = column("dist")
+        val category = column("category")
+        val planes = icao.indices.mapNotNull { i ->
+            val id = icao.string(i) ?: return@mapNotNull null
+            Plane(
+                icao = id,
+                callsign = callsign.string(i),
+                model = model.string(i),
+                lat = lat.double(i),
+                lon = lon.double(i),
+                altitude = altitude.int(i),
+                speed = speed.int(i),
+                heading = heading.double(i),
+                dist = dist.double(i),
+                category = category.int(i)
+            )
+        }
+        return PlanesDelta(version, boot, full, removed, planes)
+    }
+}
+
+private fun List<JsonElement?>?.value(i: Int): JsonElement? =
+    this?.getOrNull(i)?.takeUnless { it.isJsonNull }
+
+private fun List<JsonElement?>?.string(i: Int): String? = value(i)?.asString
+private fun List<JsonElement?>?.double(i: Int): Double? = value(i)?.asDouble
+private fun List<JsonElement?>?.int(i: Int): Int? = value(i)?.asInt
+
 data class RouteResponse(
     val icao: String,
     val active: Boolean = false,
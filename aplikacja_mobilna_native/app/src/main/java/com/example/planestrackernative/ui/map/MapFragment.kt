@@ -35,6 +35,10 @@ class MapFragment : Fragment() {
     private var planesJob: Job? = null
     private var statsJob: Job? = null
 
+    // Server state version and boot id - /data?since=N returns only changes
+    private var dataVersion = 0L
+    private var dataBoot: String? = null
+
     // Cached plane icons
     private var planeIcon: Bitmap? = null
     private var planeLightIcon: Bitmap? = null
@@ -44,6 +48,8 @@ class MapFragment : Fragment() {
         private const val BASE_LON = 17.498
         private const val REFRESH_INTERVAL_MS = 1000L
         private const val STATS_INTERVAL_MS = 5000L
+        // Only what the map shows - columnar /data with these fields is ~4x smaller than full JSON
+        private const val MAP_FIELDS = "icao,callsign,model,lat,lon,altitude,speed,heading,dist,category"
     }
 
     override fun onCreateView(
@@ -108,8 +114,10 @@ class MapFragment : Fragment() {
         planesJob = viewLifecycleOwner.lifecycleScope.launch {
             while (isActive) {
                 try {
-                    val planes = RetrofitClient.api.getPlanes()
-                    updatePlanes(planes)
+                    val delta = RetrofitClient.api.getPlanesColumns(dataVersion, dataBoot, MAP_FIELDS).toDelta()
+                    updatePlanes(delta)
+                    dataVersion = delta.version
+                    dataBoot = delta.boot
                 } catch (e: Exception) {
                     // Silent fail — retry next cycle
                 }
@@ -132,11 +140,16 @@ class MapFragment : Fragment() {
         }
     }
 
-    private fun updatePlanes(planes: List<com.example.planestrackernative.model.Plane>) {
-        val currentIcaos = planes.map { it.icao }.toSet()
+    private fun updatePlanes(delta: com.example.planestrackernative.model.PlanesDelta) {
+        val planes = delta.planes
 
-        // Remove old markers
-        val toRemove = planeMarkers.keys.filter { it !in currentIcaos }
+        // Remove old markers: a full state replaces everything, a delta lists removed planes
+        val toRemove = if (delta.full) {
+            val currentIcaos = planes.map { it.icao }.toSet()
+            planeMarkers.keys.filter { it !in currentIcaos }
+        } else {
+            delta.removed.filter { it in planeMarkers }
+        }
         for (icao in toRemove) {
             planeMarkers[icao]?.let { mapView.overlays.remove(it) }
             planeMarkers.remove(icao)
@@ -0,0 +1,82 @@
+#Benchmark pamięci stanu samolotów: dawny słownik z trasą jako listą list vs aircraft.Aircraft
+#Użycie: python benchmarks/bench_aircraft.py [liczba samolotów] [punkty trasy]
+import math
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import aircraft
+import main
+
+def route_point(i, j):
+    #Samolot i krąży po okręgu o promieniu 5 km, pozycja 2 razy na sekundę (480 punktów na okrążenie)
+    a = 2 * math.pi * j / 480
+    return 52.0 + 5 * math.sin(a) / 111.2, 17.0 + i * 1e-3 + 5 * math.cos(a) / 68.5
+
+def build_dicts(n, points):
+    #Układ sprzed zmiany - słownik rozbudowywany przez dict.update, trasa [[lat, lon], ...]
+    planes = {}
+    for i in range(n):
+        icao = f"{0x400000 + i:06X}"
+        plane = {"icao": icao, "first_seen": 0.0, "model": "Airbus A320", "dist": None, "min_dist": None,
+                 "max_dist": None, "speed": 0, "max_speed": 0, "category": 0, "route": []}
+        plane.update({"callsign": f"LOT{i}", "category": 3})
+        plane.update({"altitude": 10000, "speed": 850, "heading": 90.0, "v_type": "GS"})
+        for j in range(points):
+            lat, lon = route_point(i, j)
+            plane.update({"lat": lat, "lon": lon, "dist": 10.0 + j * 0.1, "last_pos_time": float(j)})
+            plane["route"].append([lat, lon])
+        plane["last_seen"] = float(points)
+        planes[icao] = plane
+    return planes
+
+def build_aircraft(n, points, tolerance=0.0):
+    planes = {}
+    for i in range(n):
+        icao = f"{0x400000 + i:06X}"
+        plane = aircraft.Aircraft(icao, 0.0, "Airbus A320", tolerance)
+        plane.update({"callsign": f"LOT{i}", "category": 3})
+        plane.update({"altitude": 10000, "speed": 850, "heading": 90.0, "v_type": "GS"})
+        for j in range(points):
+            lat, lon = route_point(i, j)
+            plane.update({"lat": lat, "lon": lon, "dist": 10.0 + j * 0.1, "last_pos_time": float(j)})
+            plane.add_point(lat, lon, float(j), 10000)
+        plane.last_seen = float(points)
+        planes[icao] = plane
+    return planes
+
+def measure(build, n, points):
+    tracemalloc.start()
+    start = time.perf_counter()
+    planes = build(n, points)
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return planes, current, elapsed
+
+def serialize_time(planes, to_dict, repeat=20):
+    #Czas przygotowania odpowiedzi /data (bez trasy)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        [to_dict(p) for p in planes.values()]
+    return (time.perf_counter() - start) / repeat
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    points = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    print(f"{n} samolotów × {points} punktów trasy")
+    results = {}
+    for name, build, to_dict in (
+            ("dict", build_dicts, lambda p: {k: v for k, v in p.items() if k != "route"}),
+            ("Aircraft", build_aircraft, lambda p: p.to_json_dict()),
+            ("Aircraft + uproszczenie", lambda n, points: build_aircraft(n, points, main.ROUTE_TOLERANCE),
+             lambda p: p.to_json_dict())):
+        planes, size, elapsed = measure(build, n, points)
+        results[name] = size
+        per_point = size / (n * points)
+        print(f"{name:24s} {size / 2 ** 20:8.1f} MiB  {per_point:6.1f} B/punkt  budowa {elapsed * 1000:7.0f} ms  "
+              f"/data {serialize_time(planes, to_dict) * 1000:6.2f} ms")
+        del planes
+    print(f"Oszczędność pamięci: {results['dict'] / results['Aircraft']:.1f}x")
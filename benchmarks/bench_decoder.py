@@ -0,0 +1,84 @@
+#Benchmark dekodowania pól ramek: pyModeS (HEX parsowany przy każdym polu) vs decoder.Message
+#Użycie: python benchmarks/bench_decoder.py [liczba ramek]
+import os
+import sys
+import time
+import tracemalloc
+import numpy as np
+import pyModeS as pms
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import decoder
+import signal_gen
+
+def sample_frames(n, seed=5):
+    #Mieszanka jak w eterze: pozycje, prędkości i identyfikacje (bajty ramek z demodulatora)
+    rng = np.random.default_rng(seed)
+    planes = signal_gen.random_aircraft(rng, 50, 20.0)
+    frames = []
+    for i in range(n):
+        plane = planes[i % len(planes)]
+        frames.append(signal_gen._messages(plane, "DF17", float(i) / n, rng))
+    return frames
+
+def decode_pymodes(frames):
+    #Dotychczasowa ścieżka: HEX + osobne wywołanie pyModeS dla każdego pola
+    even = {}
+    for frame in frames:
+        hex_msg = frame.hex().upper()
+        icao = pms.icao(hex_msg)
+        tc = pms.typecode(hex_msg)
+        if 1 <= tc <= 4:
+            pms.adsb.callsign(hex_msg)
+            pms.adsb.category(hex_msg)
+        elif 9 <= tc <= 18:
+            pms.adsb.altitude(hex_msg)
+            oe = pms.adsb.oe_flag(hex_msg)
+            if oe == 0:
+                even[icao] = hex_msg
+            elif icao in even:
+                pms.adsb.position(even[icao], hex_msg, 0, 1)
+        elif tc == 19:
+            pms.adsb.velocity(hex_msg)
+
+def decode_message(frames):
+    #Nowa ścieżka: jedna liczba na ramkę, pola przesunięciami bitowymi
+    even = {}
+    for frame in frames:
+        msg = decoder.Message(frame)
+        tc = msg.tc
+        if 1 <= tc <= 4:
+            msg.callsign()
+            msg.category()
+        elif 9 <= tc <= 18:
+            msg.altitude()
+            if msg.oe_flag() == 0:
+                even[msg.icao] = msg.cpr()
+            elif msg.icao in even:
+                decoder.cpr_position(even[msg.icao], msg.cpr(), 0, 1)
+        elif tc == 19:
+            msg.velocity()
+
+def measure(fn, frames, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(frames)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    fn(frames)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    frames = sample_frames(n)
+    print(f"{n} ramek DF17 (pozycja / prędkość / identyfikacja)")
+    results = {}
+    for name, fn in (("pyModeS", decode_pymodes), ("decoder.Message", decode_message)):
+        elapsed, peak = measure(fn, frames)
+        results[name] = elapsed
+        print(f"{name:16s} {elapsed * 1000:8.1f} ms  {elapsed / n * 1e6:6.2f} µs/ramkę  "
+              f"{n / elapsed:9.0f} ramek/s  szczyt pamięci {peak / 1024:.0f} KiB")
+    print(f"Przyspieszenie: {results['pyModeS'] / results['decoder.Message']:.1f}x")
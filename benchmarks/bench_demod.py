@@ -0,0 +1,98 @@
+#Benchmark etapów demodulacji
+#Użycie: python benchmarks/bench_demod.py [nagranie.bin]
+#Nagranie to surowe IQ u8 z rtl_sdr (-s 2000000 -f 1090000000), bez pliku używany jest blok syntetyczny
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import demod
+
+BLOCK = 512 * 1024
+REPEAT = 20
+
+def load_recorded_block(path):
+    return np.fromfile(path, dtype=np.uint8, count=BLOCK * 2)
+
+def synthetic_block(n_frames=300, seed=7):
+    #Surowe IQ u8: szum Rayleigha + ramki DF17 o losowej treści
+    rng = np.random.default_rng(seed)
+    mag = rng.rayleigh(4.0, BLOCK)
+    for start in rng.choice(np.arange(0, BLOCK - 300, 300), n_frames, replace=False):
+        frame = np.zeros((1, 14), dtype=np.uint8)
+        frame[0, 0] = 0x8D #DF17
+        frame[0, 1:11] = rng.integers(0, 256, 10)
+        parity = int(demod.crc_syndromes(frame)[0])
+        frame[0, 11:] = [parity >> 16, (parity >> 8) & 0xFF, parity & 0xFF]
+        bits = np.unpackbits(frame[0])
+        sig = np.full(240, 2.0)
+        sig[[0, 2, 7, 9]] = 60.0
+        sig[16::2] = np.where(bits == 1, 60.0, 2.0)
+        sig[17::2] = np.where(bits == 1, 2.0, 60.0)
+        mag[start:start + 240] = sig
+    phase = rng.uniform(0, 2 * np.pi, BLOCK)
+    raw = np.empty(BLOCK * 2, dtype=np.uint8)
+    raw[0::2] = np.clip(np.round(127.5 + mag * np.cos(phase)), 0, 255)
+    raw[1::2] = np.clip(np.round(127.5 + mag * np.sin(phase)), 0, 255)
+    return raw
+
+def complex_magnitude(raw):
+    #Dawna ścieżka: pyrtlsdr zamienia bajty na complex128, potem np.abs -> float64
+    iq = raw.astype(np.float64)
+    samples = (iq[0::2] - 127.5) / 127.5 + 1j * (iq[1::2] - 127.5) / 127.5
+    return np.abs(samples)
+
+def per_hit(mag, hit_indices):
+    #Dawna implementacja z radio_loop: string z bitów i int(bits, 2) dla każdego trafienia
+    out = []
+    for idx in hit_indices:
+        data_start = idx + 16
+        if data_start + 224 > len(mag): continue
+        bit_pairs = mag[data_start: data_start + 224].reshape(112, 2)
+        bits = "".join(["1" if b else "0" for b in bit_pairs[:, 0] > bit_pairs[:, 1]])
+        hex_msg = "{:028X}".format(int(bits, 2))
+        first_two = hex_msg[:2]
+        first_byte = int(first_two, 16)
+        if first_two in ("8D", "90", "91", "92", "5D") or 0xA0 <= first_byte <= 0xBF:
+            out.append(hex_msg)
+    return out
+
+def batched(mag, hit_indices):
+    _, frames = demod.slice_frames(mag, hit_indices)
+    frames = frames[demod.df_filter(frames)]
+    return [demod.frame_hex(f) for f in frames]
+
+def measure(fn, *args):
+    fn(*args)
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        result = fn(*args)
+    return (time.perf_counter() - start) / REPEAT * 1000, result
+
+if __name__ == "__main__":
+    raw = load_recorded_block(sys.argv[1]) if len(sys.argv) > 1 else synthetic_block()
+
+    print("1. Amplituda")
+    t_cplx, mag_f = measure(complex_magnitude, raw)
+    out = np.empty(len(raw) // 2, dtype=np.uint16)
+    t_lut, mag_u = measure(demod.iq_magnitude, raw, out)
+    print(f"   complex128 + np.abs:  {t_cplx:8.2f} ms/blok")
+    print(f"   uint8 + LUT uint16:   {t_lut:8.2f} ms/blok  (x{t_cplx / t_lut:.1f})")
+
+    print("2. Wycinanie ramek")
+    hits = demod.detect_preambles(mag_u)
+    t_old, r_old = measure(per_hit, mag_u, hits)
+    t_new, r_new = measure(batched, mag_u, hits)
+    assert r_old == r_new, "Wyniki obu metod się różnią!"
+    print(f"   trafień preambuły: {len(hits)}, ramek po filtrze DF: {len(r_new)}")
+    print(f"   per trafienie:        {t_old:8.2f} ms/blok")
+    print(f"   wsadowo:              {t_new:8.2f} ms/blok  (x{t_old / t_new:.1f})")
+
+    print("3. Cały blok")
+    t_before, _ = measure(demod.demodulate, mag_f)
+    d = demod.Demodulator(len(raw) // 2)
+    t_after, _ = measure(d.feed, raw)
+    print(f"   float64 demodulate:   {t_before + t_cplx:8.2f} ms/blok (z amplitudą)")
+    print(f"   Demodulator.feed:     {t_after:8.2f} ms/blok  (x{(t_before + t_cplx) / t_after:.1f})")
+    print(f"   ramki z poprawnym CRC: {d.frames // (REPEAT + 1)}/blok")
@@ -0,0 +1,79 @@
+#Benchmark rywalizacji o planes_lock: blokada przy każdej zmianie vs jedna sekcja krytyczna na blok
+#Nagranie z signal_gen przechodzi przez main.process_samples, a równolegle wątek "serwera"
+#co chwilę bierze blokadę i serializuje stan jak /data.
+#Użycie: python benchmarks/bench_lock.py [liczba samolotów] [sekundy nagrania] [--log]
+#Logi dekodera idą domyślnie do /dev/null (prawdziwy zapis do pliku, ale bez terminala);
+#--log wypisuje je na stdout, tak jak w działającym programie.
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import acquisition
+import demod
+import main
+import signal_gen
+
+READER_INTERVAL = 0.002 #s między zapytaniami /data
+
+class ImmediateUpdates(main.PlaneUpdates):
+    #Dotychczasowe zachowanie: każda zmiana od razu pod osobną blokadą
+    def add(self, icao, dane, now, update_last_seen=True, position=False):
+        with main.planes_lock:
+            message = main._apply_update_locked(icao, dane, update_last_seen, now, position)
+        if message:
+            print(message)
+
+def reader(stop, waits):
+    #Odpowiednik /data: kopia stanu pod blokadą, JSON poza nią
+    while not stop.is_set():
+        start = time.perf_counter()
+        with main.planes_lock:
+            waits.append(time.perf_counter() - start)
+            snapshot = [p.to_json_dict() for p in main.planes.values()]
+        json.dumps(snapshot)
+        time.sleep(READER_INTERVAL)
+
+def run(raw, updates_class, log=False):
+    main.planes.clear()
+    main.cpr_buffer.clear()
+    main.demodulator = demod.Demodulator(acquisition.BLOCK_SIZE)
+    main.frame_dedup = demod.FrameDedup()
+    main.planes_lock = main.TimedLock()
+    original = main.PlaneUpdates
+    main.PlaneUpdates = updates_class
+    stop = threading.Event()
+    waits = []
+    thread = threading.Thread(target=reader, args=(stop, waits))
+    thread.start()
+    start = time.perf_counter()
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(sys.stdout if log else devnull):
+            for i in range(0, len(raw), acquisition.BLOCK_BYTES):
+                main.process_samples(raw[i:i + acquisition.BLOCK_BYTES])
+    finally:
+        elapsed = time.perf_counter() - start
+        stop.set()
+        thread.join()
+        main.PlaneUpdates = original
+    return elapsed, main.planes_lock.stats(), waits, len(main.planes)
+
+if __name__ == "__main__":
+    log = "--log" in sys.argv
+    args = [a for a in sys.argv[1:] if a != "--log"]
+    n_aircraft = int(args[0]) if len(args) > 0 else 200
+    seconds = float(args[1]) if len(args) > 1 else 4.0
+    raw, truth, _ = signal_gen.generate(n_aircraft, seconds, snr_db=(12, 30), seed=3)
+    print(f"{n_aircraft} samolotów, {seconds:.0f} s nagrania, {len(truth)} ramek, "
+          f"logi dekodera: {'stdout' if log else '/dev/null'}")
+    for name, cls in (("blokada na zmianę", ImmediateUpdates), ("blokada na blok", main.PlaneUpdates)):
+        elapsed, stats, waits, n_planes = run(raw, cls, log)
+        waits.sort()
+        p99 = waits[int(len(waits) * 0.99)] if waits else 0
+        print(f"{name:18s} {elapsed * 1000:7.0f} ms  samoloty {n_planes:4d}  "
+              f"blokad {stats['acquisitions']:6d}  trzymanie {stats['hold_ms_total']:8.2f} ms "
+              f"(max {stats['hold_ms_max']:.3f})  oczekiwanie {stats['wait_ms_total']:8.2f} ms "
+              f"(max {stats['wait_ms_max']:.3f})  /data p99 {p99 * 1e6:6.0f} µs")
@@ -0,0 +1,66 @@
+#Benchmark rozmiaru odpowiedzi /data: dotychczasowy JSON vs zwarte formaty z compact.py
+#Użycie: python benchmarks/bench_payload.py [liczba samolotów]
+import gzip
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import aircraft
+import compact
+import snapshot
+
+MAP_FIELDS = "icao,callsign,model,lat,lon,altitude,speed,heading,dist,category" #to, czego używa mapa w aplikacji
+
+def build_snapshot(n):
+    rnd = random.Random(1)
+    live = snapshot.LiveSnapshot()
+    now = time.time()
+    items = []
+    for i in range(n):
+        plane = aircraft.Aircraft(f"{0x400000 + i:06X}", now - rnd.uniform(0, 3600), "Airbus A320-214")
+        plane.update({"callsign": f"LOT{rnd.randint(1, 9999)}", "category": 3,
+                      "lat": round(rnd.uniform(50.0, 54.0), 6), "lon": round(rnd.uniform(14.0, 21.0), 6),
+                      "altitude": rnd.randint(300, 12000), "speed": rnd.randint(200, 950),
+                      "heading": round(rnd.uniform(0, 360), 1), "v_type": "GS",
+                      "dist": round(rnd.uniform(1, 300), 2), "last_pos_time": now - rnd.uniform(0, 5)})
+        plane.min_dist = plane.dist
+        plane.max_dist = plane.dist + 50
+        plane.max_speed = plane.speed + 20
+        plane.last_seen = now
+        items.append((i + 1, plane.to_json_dict()))
+    live.publish(n, items, now)
+    return live
+
+def encode(live, fmt, fields):
+    snap, full, removed, first = live.changes(0)
+    return compact.encode_planes(fmt, snap.records[first:], compact.select_fields(fields), snap.version,
+                                 live.boot, full, removed)
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    live = build_snapshot(n)
+    base = live.delta(0)
+    print(f"{n} samolotów")
+    print(f"{'format':28s} {'bajty':>8s} {'gzip':>8s} {'vs JSON':>8s} {'kodowanie':>10s}")
+    cases = [("json (dotychczasowy)", None, None)]
+    for fmt in ("json", "columns") + (("msgpack",) if compact.HAS_MSGPACK else ()):
+        cases.append((f"{fmt}", fmt, None))
+        cases.append((f"{fmt} + pola mapy", fmt, MAP_FIELDS))
+    for name, fmt, fields in cases:
+        start = time.perf_counter()
+        for _ in range(20):
+            body = base if fmt is None else encode(live, fmt, fields)
+        elapsed = (time.perf_counter() - start) / 20
+        print(f"{name:28s} {len(body):8d} {len(gzip.compress(body)):8d} {len(body) / len(base):7.0%} "
+              f"{elapsed * 1000:8.2f} ms")
+    #Pełny stan z pamięci migawki (/data bez ?since) - koszt kolejnych zapytań po pierwszym
+    fields = compact.select_fields(MAP_FIELDS)
+    start = time.perf_counter()
+    for _ in range(20):
+        live.encoded(live.current, ("columns", fields, True), lambda: encode(live, "columns", MAP_FIELDS))
+    print(f"{'columns + pola mapy (cache)':28s} {'':8s} {'':8s} {'':8s} "
+          f"{(time.perf_counter() - start) / 20 * 1000:8.3f} ms")
+    if not compact.HAS_MSGPACK:
+        print("msgpack pominięty - brak modułu msgpack")
@@ -0,0 +1,102 @@
+#Benchmark bazy modeli: dawne wczytywanie samoloty.csv do słownika vs skompilowany plik otwierany przez mmap
+#Użycie: python benchmarks/bench_registry.py [liczba wierszy syntetycznego CSV | ścieżka do samoloty.csv]
+#Każdy wariant mierzony w osobnym procesie (czas startu, przyrost RSS, czas wyszukiwania)
+import csv
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import registry
+
+#Kolumny jak w bazie OpenSky, z której pochodzi samoloty.csv
+COLUMNS = ["icao24", "timestamp", "acars", "adsb", "built", "categoryDescription", "country", "engines",
+           "firstFlightDate", "firstSeen", "icaoAircraftClass", "lineNumber", "manufacturerIcao",
+           "manufacturerName", "model", "modes", "nextReg", "notes", "operator", "operatorCallsign",
+           "operatorIata", "operatorIcao", "owner", "prevReg", "regUntil", "registered", "registration",
+           "selCal", "serialNumber", "status", "typecode", "vdl"]
+MODELS = [("Airbus", "A320-214"), ("Boeing", "737-8AS"), ("Embraer", "ERJ 170-200 LR"), ("Cessna", "172S"),
+          ("Piper", "PA-28-181"), ("ATR", "72-212A"), ("Bombardier", "CL-600-2B16"), ("Diamond", "DA 40 NG")]
+OPERATORS = ["", "", "", "Ryanair", "LOT Polish Airlines", "Lufthansa", "Wizz Air", "Polish Air Force", "easyJet"]
+
+def make_csv(path, n):
+    rnd = random.Random(1)
+    icaos = rnd.sample(range(0x000001, 0xFFFFFF), n)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, quotechar="'", quoting=csv.QUOTE_ALL)
+        writer.writerow(COLUMNS)
+        for icao in icaos:
+            producer, model = rnd.choice(MODELS)
+            row = dict.fromkeys(COLUMNS, "")
+            row.update({"icao24": f"{icao:06x}", "manufacturerName": producer, "model": model,
+                        "operator": rnd.choice(OPERATORS), "registration": f"SP-{rnd.randint(0, 99999):05d}",
+                        "serialNumber": str(rnd.randint(100, 99999)), "built": "2015-01-01",
+                        "country": "Poland", "typecode": model[:4], "status": "Valid",
+                        "notes": "x" * rnd.randint(0, 40)})
+            writer.writerow(row.values())
+
+def load_dict(csv_path):
+    #Dawny load_csv_data
+    planes_data = {}
+    with open(csv_path, mode='r', encoding='utf-8') as file:
+        for row in csv.DictReader(file, quotechar="'"):
+            planes_data[row.get('icao24', '').upper()] = registry.describe(row)
+    return planes_data
+
+def rss_kib():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+def measure(mode, csv_path, bin_path):
+    keys = []
+    with open(csv_path, encoding="utf-8") as f:
+        for i, line in enumerate(f):
+            if i and i % 97 == 0:
+                keys.append(line[1:7].upper())
+    keys = keys[:5000] + [f"{k:06X}" for k in random.Random(2).sample(range(0xFFFFFF), 5000)] #połowa spoza bazy
+    before = rss_kib()
+    start = time.perf_counter()
+    data = load_dict(csv_path) if mode == "dict" else registry.Registry(bin_path)
+    load = time.perf_counter() - start
+    rss = rss_kib() - before
+    start = time.perf_counter()
+    for _ in range(10):
+        for key in keys:
+            data.get(key, "Nieznany model")
+    lookup = (time.perf_counter() - start) / (10 * len(keys))
+    return {"load_s": load, "rss_mib": rss / 1024, "rss_after_lookups_mib": (rss_kib() - before) / 1024,
+            "lookup_us": lookup * 1e6, "entries": len(data)}
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--measure":
+        print(json.dumps(measure(*sys.argv[2:5])))
+        sys.exit(0)
+    workdir = tempfile.mkdtemp()
+    if len(sys.argv) > 1 and os.path.exists(sys.argv[1]):
+        csv_path = sys.argv[1]
+    else:
+        n = int(sys.argv[1]) if len(sys.argv) > 1 else 600000
+        csv_path = os.path.join(workdir, "samoloty.csv")
+        make_csv(csv_path, n)
+    bin_path = os.path.join(workdir, "samoloty.bin")
+    start = time.perf_counter()
+    registry.compile_csv(csv_path, bin_path)
+    compile_time = time.perf_counter() - start
+    print(f"CSV {os.path.getsize(csv_path) / 2 ** 20:.1f} MiB -> samoloty.bin {os.path.getsize(bin_path) / 2 ** 20:.1f} MiB "
+          f"(kompilacja jednorazowo {compile_time:.1f} s)")
+    print(f"{'wariant':10s} {'start':>9s} {'RSS':>10s} {'RSS po get':>11s} {'get':>9s} {'wpisy':>8s}")
+    for mode in ("dict", "mmap"):
+        out = subprocess.run([sys.executable, __file__, "--measure", mode, csv_path, bin_path],
+                             capture_output=True, text=True, check=True).stdout
+        r = json.loads(out)
+        print(f"{mode:10s} {r['load_s'] * 1000:7.0f} ms {r['rss_mib']:6.1f} MiB {r['rss_after_lookups_mib']:7.1f} MiB "
+              f"{r['lookup_us']:6.2f} µs {r['entries']:8d}")
+    shutil.rmtree(workdir)
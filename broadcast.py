@@ -0,0 +1,98 @@
+import queue
+import threading
+
+#Strumień Server-Sent Events dla /stream.
+#Producent (publikacja migawki, wątek zapisu lotów) koduje zdarzenie raz,
+#a Broadcaster wrzuca te same bajty do kolejek wszystkich subskrybentów - bez zapytań na klienta.
+#Kolejki są ograniczone i producent nigdy na nie nie czeka: klient, który nie nadąża odbierać,
+#zostaje rozłączony (EventSource połączy się ponownie i dostanie pełny stan).
+
+SUBSCRIBER_QUEUE = 32 #zdarzeń czekających na jednego klienta
+MAX_SUBSCRIBERS = 32 #ponad tyle /stream odpowiada 503, a strona wraca do odpytywania
+KEEPALIVE = 15 #s ciszy, po których wysyłamy komentarz (wykrywa zerwane połączenia)
+RETRY_MS = 3000 #po ilu ms przeglądarka ma się łączyć ponownie
+
+def format_event(event, data):
+    #data - gotowy JSON (bytes, jedna linia)
+    return b"event: " + event.encode() + b"\ndata: " + data + b"\n\n"
+
+class Subscription:
+    def __init__(self, maxsize):
+        self.queue = queue.Queue(maxsize=maxsize) #(wersja albo None, gotowa wiadomość)
+        self.dropped = False #nie nadążał - generator kończy odpowiedź
+
+class Broadcaster:
+    def __init__(self, queue_size=SUBSCRIBER_QUEUE, max_subscribers=MAX_SUBSCRIBERS):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.lock = threading.Lock()
+        self.subscribers = set()
+        self.retained = {} #ostatnia wiadomość zdarzenia dostawana od razu po podłączeniu (np. statystyki)
+        self.published = 0
+        self.connected = 0
+        self.dropped = 0
+        self.rejected = 0
+
+    def subscribe(self):
+        #None, gdy osiągnięto limit klientów
+        with self.lock:
+            if len(self.subscribers) >= self.max_subscribers:
+                self.rejected += 1
+                return None
+            sub = Subscription(self.queue_size)
+            for message in self.retained.values():
+                sub.queue.put_nowait((None, message))
+            self.subscribers.add(sub)
+            self.connected += 1
+        return sub
+
+    def unsubscribe(self, sub):
+        with self.lock:
+            self.subscribers.discard(sub)
+
+    def publish(self, event, data, version=None, retain=False):
+        #version - wersja stanu zdarzenia; klient dostaje tylko nowsze niż jego pełny stan
+        message = format_event(event, data)
+        with self.lock:
+            if retain:
+                self.retained[event] = message
+            self.published += 1
+            for sub in list(self.subscribers):
+                try:
+                    sub.queue.put_nowait((version, message))
+                except queue.Full:
+                    self.subscribers.discard(sub)
+                    sub.dropped = True
+                    self.dropped += 1
+        return message
+
+    def stream(self, sub, initial=b"", version=0, keepalive=KEEPALIVE):
+        #Generator ciała odpowiedzi /stream. initial - pełny stan o wersji version;
+        #zdarzenia, które trafiły do kolejki przed jego pobraniem, są pomijane
+        try:
+            yield b"retry: %d\n\n" % RETRY_MS
+            if initial:
+                yield initial
+            while not sub.dropped:
+                try:
+                    item_version, message = sub.queue.get(timeout=keepalive)
+                except queue.Empty:
+                    yield b": keepalive\n\n"
+                    continue
+                if item_version is not None and item_version <= version:
+                    continue
+                yield message
+        finally:
+            self.unsubscribe(sub)
+
+    def stats(self):
+        with self.lock:
+            subscribers = list(self.subscribers)
+        return {
+            "subscribers": len(subscribers),
+            "max_queued": max((sub.queue.qsize() for sub in subscribers), default=0),
+            "published": self.published,
+            "connected": self.connected,
+            "dropped": self.dropped,
+            "rejected": self.rejected
+        }
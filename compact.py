@@ -0,0 +1,93 @@
+import importlib.util
+import json
+
+#Zwarte formaty /data i /route (głównie dla aplikacji mobilnej na łączu komórkowym).
+#"columns" - JSON kolumnowy: nazwy pól raz, potem jedna tablica wartości na pole, bez powtarzania kluczy.
+#"msgpack" - ten sam układ w MessagePack, ale pola jako stałe numery (indeks w FIELDS),
+#a liczby ułamkowe skwantowane do całkowitych (wartość * SCALE, zaokrąglona).
+#?fields=icao,lat,lon,heading - tylko wybrane pola (icao jest zawsze, bo to klucz samolotu).
+
+FORMATS = ("json", "columns", "msgpack")
+MSGPACK_MIMETYPE = "application/msgpack"
+MSGPACK_MIMETYPES = (MSGPACK_MIMETYPE, "application/x-msgpack")
+HAS_MSGPACK = importlib.util.find_spec("msgpack") is not None
+
+#Numer pola w msgpack = indeks w tej krotce - nowe pola tylko na końcu, nigdy nie zmieniamy kolejności
+FIELDS = ("icao", "callsign", "model", "lat", "lon", "altitude", "speed", "heading", "dist", "category",
+          "min_dist", "max_dist", "max_speed", "first_seen", "last_seen", "last_pos_time", "v_type",
+          "rarity", "is_military", "operator_class")
+
+#Kwantyzacja w msgpack: klient dzieli przez skalę
+SCALE = {
+    "lat": 100000, #~1 m
+    "lon": 100000,
+    "altitude": 1, #m
+    "speed": 1, #km/h
+    "max_speed": 1,
+    "heading": 1, #stopnie - wystarczy do obrotu ikony
+    "dist": 10, #0.1 km
+    "min_dist": 10,
+    "max_dist": 10,
+    "first_seen": 1, #s
+    "last_seen": 1,
+    "last_pos_time": 1
+}
+
+def select_fields(param):
+    #?fields=... -> znane pola w kolejności FIELDS; nieznane nazwy są pomijane
+    if not param:
+        return FIELDS
+    wanted = set(param.split(","))
+    return tuple(f for f in FIELDS if f == "icao" or f in wanted)
+
+def _dumps(value):
+    return json.dumps(value, separators=(",", ":")).encode()
+
+def _packb(value):
+    import msgpack #potrzebny tylko dla format=msgpack
+    return msgpack.packb(value)
+
+def _quantize(values, scale):
+    return [None if v is None else round(v * scale) for v in values]
+
+def _columns(records, fields, quantize=False):
+    cols = []
+    for field in fields:
+        col = [r.get(field) for r in records]
+        if quantize and field in SCALE:
+            col = _quantize(col, SCALE[field])
+        cols.append(col)
+    return cols
+
+def encode_planes(fmt, records, fields, version, boot, full, removed, envelope=True):
+    #records - słowniki samolotów (Aircraft.to_json_dict); envelope=False tylko dla zwykłego JSON-a
+    #bez ?since (dawny kształt /data - sama lista samolotów)
+    if fmt == "msgpack":
+        #[wersja, boot, pełny stan, usunięte, numery pól, kolumny]
+        return _packb([version, boot, full, removed, [FIELDS.index(f) for f in fields],
+                       _columns(records, fields, quantize=True)])
+    if fmt == "columns":
+        return _dumps({"version": version, "boot": boot, "full": full, "removed": removed,
+                       "fields": list(fields), "columns": _columns(records, fields)})
+    planes = [{f: r[f] for f in fields if f in r} for r in records]
+    if not envelope:
+        return _dumps(planes)
+    return _dumps({"version": version, "boot": boot, "full": full, "removed": removed, "planes": planes})
+
+def encode_route(fmt, payload):
+    #payload - odpowiedź /route; trasa [[lat, lon], ...] zamieniona na kolumny "lat" i "lon".
+    #Przerwa między scalonymi przelotami z bazy (None w trasie) to null w obu kolumnach
+    payload = dict(payload)
+    route = payload.pop("route")
+    lat = [None if p is None else p[0] for p in route]
+    lon = [None if p is None else p[1] for p in route]
+    if fmt == "msgpack":
+        payload["lat"] = _quantize(lat, SCALE["lat"])
+        payload["lon"] = _quantize(lon, SCALE["lon"])
+        return _packb(payload)
+    payload["lat"] = lat
+    payload["lon"] = lon
+    return _dumps(payload)
+
+def mimetype(fmt):
+    return MSGPACK_MIMETYPE if fmt == "msgpack" else "application/json"
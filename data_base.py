@@ -5,9 +5,14 @@ import json
 import os
 import calendar
 
+import enrichment
+
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_NAME = os.path.join(BASE_DIR, "radar.db")
 
+# Cechy modelu z enrichment.py zapisywane przy każdym locie (liczby zamiast LIKE '%...%' w statystykach)
+ENRICHMENT_COLUMNS = ("rarity", "is_military", "operator_class")
+
 def init_db():
     conn = sqlite3.connect(DB_NAME, timeout = 10)
     c = conn.cursor()
@@ -15,7 +20,8 @@ def init_db():
                     icao TEXT, callsign TEXT, model TEXT, min_dist REAL,
                     max_speed INTEGER, category INTEGER, has_location INTEGER,
                     first_seen INTEGER, last_seen INTEGER,
-                    route TEXT, max_dist REAL
+                    route TEXT, max_dist REAL,
+                    rarity INTEGER, is_military INTEGER, operator_class INTEGER
                 )''')
     # Migracja — dodanie kolumny route jeśli nie istnieje (dla istniejących baz)
     try:
@@ -27,7 +33,10 @@ def init_db():
         c.execute("ALTER TABLE historia ADD COLUMN max_dist REAL")
     except sqlite3.OperationalError:
         pass  # Kolumna już istnieje
+    _add_enrichment_columns(c, "historia")
     c.execute("CREATE INDEX IF NOT EXISTS idx_icao_time ON historia (icao, last_seen)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_military_time ON historia (is_military, last_seen)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_rarity_time ON historia (rarity, last_seen)")
     
     # Tabela archiwum statystyk dziennych
     c.execute('''CREATE TABLE IF NOT EXISTS daily_stats (
@@ -53,21 +62,53 @@ def init_db():
                     icao TEXT, callsign TEXT, model TEXT, min_dist REAL,
                     max_speed INTEGER, category INTEGER, has_location INTEGER,
                     first_seen INTEGER, last_seen INTEGER,
-                    route TEXT, max_dist REAL
+                    route TEXT, max_dist REAL,
+                    rarity INTEGER, is_military INTEGER, operator_class INTEGER
                 )''')
+    _add_enrichment_columns(c, "flights_archive")
     c.execute("CREATE INDEX IF NOT EXISTS idx_archive_last_seen ON flights_archive (last_seen)")
 
+    # Jednorazowo: loty zapisane przed dodaniem kolumn dostają cechy wyliczone z zapisanego modelu
+    conn.create_function("enrich_rarity", 1, lambda m: enrichment.rarity_points(m or ""), deterministic=True)
+    conn.create_function("enrich_military", 1, lambda m: enrichment.is_military(m or ""), deterministic=True)
+    conn.create_function("enrich_operator", 1, lambda m: enrichment.operator_class(m or ""), deterministic=True)
+    for table in ("historia", "flights_archive"):
+        c.execute(f"""UPDATE {table} SET rarity = enrich_rarity(model), is_military = enrich_military(model),
+                      operator_class = enrich_operator(model) WHERE rarity IS NULL""")
+
     conn.commit()
     conn.close()
 
+def _add_enrichment_columns(c, table):
+    # Migracja — kolumny cech modelu (rarity, is_military, operator_class)
+    for column in ENRICHMENT_COLUMNS:
+        try:
+            c.execute(f"ALTER TABLE {table} ADD COLUMN {column} INTEGER")
+        except sqlite3.OperationalError:
+            pass  # Kolumna już istnieje
+
 def save_flight(plane):
+    conn = sqlite3.connect(DB_NAME, timeout = 10)
+    _save_flight(conn.cursor(), plane)
+    conn.commit()
+    conn.close()
+
+def save_flights(planes):
+    # Zapis wielu lotów w jednej transakcji (jedno połączenie i jeden commit na paczkę)
+    conn = sqlite3.connect(DB_NAME, timeout = 10)
+    try:
+        c = conn.cursor()
+        for plane in planes:
+            _save_flight(c, plane)
+        conn.commit()
+    finally:
+        conn.close()
+
+def _save_flight(c, plane):
     # Ignorujemy szumy (krótsze niż 5s)
     if plane['last_seen'] - plane['first_seen'] < 5:
         return
 
-    conn = sqlite3.connect(DB_NAME, timeout = 10)
-    c = conn.cursor()
-    
     # Dane do zapisu
     icao = plane.get('icao')
     current_min_dist = plane.get('min_dist')
@@ -148,11 +189,17 @@ def save_flight(plane):
     else:
         # NOWY WPIS
         has_loc = 1 if current_min_dist is not None else 0
+        model = plane.get('model', 'Nieznany')
+        # Cechy z bazy modeli (policzone przy jej budowie); samolot spoza bazy - z samego modelu
+        if plane.get('rarity') is None:
+            rarity, military, operator = enrichment.enrich(model)
+        else:
+            rarity, military, operator = plane['rarity'], plane['is_military'], plane['operator_class']
         
-        c.execute("INSERT INTO historia (icao, callsign, model, min_dist, max_speed, category, has_location, first_seen, last_seen, route, max_dist) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", (
+        c.execute("INSERT INTO historia (icao, callsign, model, min_dist, max_speed, category, has_location, first_seen, last_seen, route, max_dist, rarity, is_military, operator_class) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", (
             icao,
             plane.get('callsign', 'N/A'),
-            plane.get('model', 'Nieznany'),
+            model,
             current_min_dist,
             current_max_speed,
             plane.get('category', 0),
@@ -160,28 +207,15 @@ def save_flight(plane):
             int(plane['first_seen']),
             current_last_seen,
             route_json,
-            current_max_dist
+            current_max_dist,
+            rarity,
+            int(military),
+            operator
         ))
 
-    conn.commit()
-    conn.close()
-
 def rarity_check(model_text):
-    #zwraca punkty w zależności od rzadkości samolotu
-    text = model_text.upper()
-
-    #lista "VIP" -> najrzadsze samoloty 100 pkt
-    vip = ["AIR FORCE", "MILITARY", "NATO", "NAVY", "POLICE", "LPR", "ANTONOV", "ROBINSON"]
-    if any(x in text for x in vip): return 100
-    #Lista rzadkich samolotów -> 50 pkt
-    rare = ["A380", "CESSNA", "PIPER", "TECNAM"]
-    if any(x in text for x in rare): return 50
-    #lista częstych samolotów -> 0 pkt
-    common = ["BOEING", "AIRBUS A320", "AIRBUS A321", "EMBRAER", "RYANAIR", "WIZZ AIR", "CRJ", "ATR 72"]
-    if any(x in text for x in common): return 0
-
-    #reszta 10 pkt
-    return 10
+    #zwraca punkty w zależności od rzadkości samolotu (zapisane loty mają je w kolumnie rarity)
+    return enrichment.rarity_points(model_text)
 
 def archive_past_days():
     conn = sqlite3.connect(DB_NAME, timeout = 10)
@@ -232,9 +266,7 @@ def archive_past_days():
         light = c.fetchone()[0]
         
         # 2. Ghost 
-        key_words = ['Military', 'Air Force', 'NATO', 'Army', 'Polish Air Force']
-        sql_like = " OR ".join([f"model LIKE '%{slowo}%'" for slowo in key_words])
-        c.execute(f"SELECT model FROM historia WHERE last_seen >= ? AND last_seen < ? AND has_location = 0 AND ({sql_like}) LIMIT 1", (day_start, day_end))
+        c.execute("SELECT model FROM historia WHERE is_military = 1 AND last_seen >= ? AND last_seen < ? AND has_location = 0 LIMIT 1", (day_start, day_end))
         ghost_row = c.fetchone()
         mil_ghost = ghost_row[0] if ghost_row else None 
         
@@ -254,22 +286,17 @@ def archive_past_days():
         """, (day_start, day_end))
         top_json = json.dumps(c.fetchall())
 
-        # 5. Najrzadsze 5
+        # 5. Najrzadsze 5 (najwięcej punktów rzadkości, przy remisie najrzadziej widziane)
         c.execute("""
             SELECT model, COUNT(*) as cnt 
             FROM historia 
             WHERE last_seen >= ? AND last_seen < ? 
             AND model IS NOT NULL AND model NOT LIKE 'Nieznany%' AND model != 'None' AND TRIM(model) != ''
             GROUP BY model 
+            ORDER BY MAX(rarity) DESC, cnt ASC, model ASC
+            LIMIT 5
         """, (day_start, day_end))
-        all_models = c.fetchall()
-        
-        scored = []
-        for m, count in all_models:
-            pts = rarity_check(m)
-            scored.append((m, count, pts))
-        scored.sort(key=lambda x: (x[2], -x[1]), reverse=True)
-        rare_json = json.dumps([(x[0], x[1]) for x in scored[:5]])
+        rare_json = json.dumps(c.fetchall())
 
         day_sectors = [0.0] * NUM_SECTORS
 
@@ -301,8 +328,8 @@ def archive_past_days():
                   (day_str, total, close, light, mil_ghost, f_dist, f_model, rare_json, top_json, range_map_json))
 
         # Archiwizacja indywidualnych lotów do trwałej tabeli
-        c.execute("""INSERT INTO flights_archive (icao, callsign, model, min_dist, max_speed, category, has_location, first_seen, last_seen, route, max_dist)
-                     SELECT icao, callsign, model, min_dist, max_speed, category, has_location, first_seen, last_seen, route, max_dist
+        c.execute("""INSERT INTO flights_archive (icao, callsign, model, min_dist, max_speed, category, has_location, first_seen, last_seen, route, max_dist, rarity, is_military, operator_class)
+                     SELECT icao, callsign, model, min_dist, max_speed, category, has_location, first_seen, last_seen, route, max_dist, rarity, is_military, operator_class
                      FROM historia
                      WHERE last_seen >= ? AND last_seen < ?""", (day_start, day_end))
         
@@ -477,35 +504,28 @@ def get_stat_today():
     c.execute("SELECT COUNT(*) FROM historia WHERE last_seen > ? AND min_dist <= 5.0", (today_midnight,))
     near_5km = c.fetchone()[0]
     
-    # 3. Najrzadszy model
-    c.execute("SELECT model FROM historia WHERE last_seen > ?", (today_midnight,))
-    rows = c.fetchall()
-    best_model = "Brak danych"
-    max_score = -1
-    found_any_valid = False
-    for row in rows:
-        model = row[0]
-        if not model or 'NIEZNANY' in model.upper():
-            continue
-        
-        found_any_valid = True
-        score = rarity_check(model)
-        if score >= max_score:
-            max_score = score
-            best_model = model
-
-    if total > 0 and not found_any_valid:
+    # 3. Najrzadszy model (przy remisie punktów - ostatnio zapisany)
+    c.execute("""
+        SELECT model FROM historia 
+        WHERE last_seen > ? 
+        AND model IS NOT NULL AND model != '' AND model NOT LIKE '%Nieznany%'
+        ORDER BY rarity DESC, rowid DESC
+        LIMIT 1
+    """, (today_midnight,))
+    row = c.fetchone()
+    if row:
+        best_model = row[0]
+    elif total > 0:
         best_model = "Tylko niezidentyfikowane"
+    else:
+        best_model = "Brak danych"
 
     # 4. Samolot wojskowy bez lokalizacji
-    key_words = ['Military', 'Air Force', 'NATO', 'Army', 'Polish Air Force']
-    sql_like = " OR ".join([f"model LIKE '%{slowo}%'" for slowo in key_words])
-    
-    query_military = f"""
+    query_military = """
         SELECT COUNT(*) FROM historia 
-        WHERE last_seen > ? 
+        WHERE is_military = 1 
+        AND last_seen > ? 
         AND has_location = 0 
-        AND ({sql_like})
     """
     c.execute(query_military, (today_midnight,))
     military_invisible = c.fetchone()[0]
@@ -541,14 +561,11 @@ def get_detailed_stats_today():
     light_total = c.fetchone()[0]
     
     # 3. Wojskowy Ghost - pobieramy NAZWĘ modelu
-    key_words = ['Military', 'Air Force', 'NATO', 'Army', 'Polish Air Force']
-    sql_like = " OR ".join([f"model LIKE '%{slowo}%'" for slowo in key_words])
-
-    c.execute(f"""
+    c.execute("""
         SELECT model FROM historia 
-        WHERE last_seen > ? 
+        WHERE is_military = 1 
+        AND last_seen > ? 
         AND has_location = 0 
-        AND ({sql_like})
         LIMIT 1
     """, (today_midnight,))
 
@@ -571,7 +588,7 @@ def get_detailed_stats_today():
     """, (today_midnight,))
     top_models = c.fetchall()
 
-    #5. Top 5 najrzadszych samolotów
+    #5. Top 5 najrzadszych samolotów (wg punktów rzadkości, przy remisie najrzadziej widziane)
     c.execute("""
         SELECT model, COUNT(*) as cnt 
         FROM historia 
@@ -582,19 +599,10 @@ def get_detailed_stats_today():
         AND model != 'None'
         AND TRIM(model) != ''
         GROUP BY model 
-        ORDER BY cnt ASC 
+        ORDER BY MAX(rarity) DESC, cnt ASC, model ASC
+        LIMIT 5
     """, (today_midnight,))
-    all_models_rows = c.fetchall()
-
-    #Ocena rzadkości i przypisanie punktów
-    scored_models = []
-    for model, count in all_models_rows:
-        points = rarity_check(model)
-        scored_models.append((model, count, points))
-
-    #Sortowanie według punktów i liczby wystąpień
-    scored_models.sort(key=lambda x: (x[2], -x[1]), reverse=True)
-    rare_models = [(model, count) for model, count, points in scored_models[:5]]
+    rare_models = c.fetchall()
 
     #Najdalszy odebrany samolot (wg max_dist, fallback na min_dist dla starych danych)
     c.execute("""
@@ -649,11 +657,11 @@ def get_flights_list(date_from=None, date_to=None):
     # Aby uniknąć duplikatów, z historia pobieramy tylko loty z dni
     # które NIE zostały jeszcze zarchiwizowane w daily_stats.
     c.execute("""
-        SELECT rowid, icao, model, last_seen, min_dist, max_speed, route, category, 'archive' as source
+        SELECT rowid, icao, model, last_seen, min_dist, max_speed, route, category, is_military, operator_class, 'archive' as source
         FROM flights_archive
         WHERE last_seen >= ? AND last_seen < ?
         UNION ALL
-        SELECT rowid, icao, model, last_seen, min_dist, max_speed, route, category, 'historia' as source
+        SELECT rowid, icao, model, last_seen, min_dist, max_speed, route, category, is_military, operator_class, 'historia' as source
         FROM historia
         WHERE last_seen >= ? AND last_seen < ?
         AND date(last_seen, 'unixepoch', 'localtime') NOT IN (
@@ -665,8 +673,6 @@ def get_flights_list(date_from=None, date_to=None):
     rows = c.fetchall()
     conn.close()
 
-    military_keywords = ['Military', 'Air Force', 'NATO', 'Army', 'Polish Air Force', 'Navy', 'Police', 'LPR']
-    
     results = []
     for row in rows:
         # Pokaż datę + godzinę gdy zakres > 1 dzień, w przeciwnym razie tylko godzinę
@@ -682,8 +688,8 @@ def get_flights_list(date_from=None, date_to=None):
 
         # Kategorie do filtrowania
         category = row[7] if row[7] else 0
-        model_text = row[2] or ''
-        is_military = any(kw.lower() in model_text.lower() for kw in military_keywords)
+        # Filtr "wojskowe" obejmuje też służby państwowe (policja, LPR)
+        is_military = bool(row[8]) or row[9] == enrichment.OPERATOR_STATE
 
         results.append({
             "rowid": row[0],
@@ -695,7 +701,7 @@ def get_flights_list(date_from=None, date_to=None):
             "has_route": has_route,
             "category": category,
             "is_military": is_military,
-            "source": row[8]  # 'archive' lub 'historia'
+            "source": row[10]  # 'archive' lub 'historia'
         })
         
     return results
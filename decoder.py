@@ -0,0 +1,157 @@
+import math
+from bisect import bisect_left
+import pyModeS as pms
+
+#Dekoder ramek Mode S / ADS-B operujący na liczbach całkowitych.
+#Ramka jest zamieniana na int raz, a pola (wysokość, CPR, prędkość, znak wywoławczy)
+#wyciągamy przesunięciami bitowymi - bez ponownego parsowania HEX przy każdym polu jak w pyModeS.
+#pyModeS zostaje tylko dla rzadkich przypadków (kod Gilla, prędkość powietrzna).
+
+CHARSET = "#ABCDEFGHIJKLMNOPQRSTUVWXYZ#####_###############0123456789######"
+
+ME_MASK = (1 << 56) - 1
+CPR_SCALE = 1 << 17 #17-bitowe współrzędne CPR
+
+def _nl_boundaries():
+    #Szerokości, na których zmienia się liczba stref długości NL (od NL = 59 do NL = 2)
+    a = 1 - math.cos(math.pi / 30)
+    bounds = []
+    for nl in range(59, 1, -1):
+        bounds.append(math.degrees(math.acos(math.sqrt(a / (1 - math.cos(2 * math.pi / nl))))))
+    return bounds
+
+NL_BOUNDARIES = _nl_boundaries() #rosnąco
+
+def cpr_nl(lat):
+    #Liczba stref długości geograficznej CPR (funkcja NL) - wyszukiwanie w tablicy progów
+    #Tolerancje porównań jak w pyModeS (np.isclose), żeby wyniki były identyczne
+    lat = abs(lat)
+    if lat <= 1e-8:
+        return 59
+    if abs(lat - 87) <= 1e-8 + 1e-5 * 87:
+        return 2
+    if lat > 87:
+        return 1
+    return 59 - bisect_left(NL_BOUNDARIES, lat)
+
+class Message:
+    #Jedna ramka rozłożona raz na pola całkowite. __slots__ - jeden mały obiekt na wiadomość.
+    __slots__ = ("bits", "df", "ca", "icao", "tc", "me")
+
+    def __init__(self, frame):
+        #frame: 14 bajtów ramki (bytes lub wiersz macierzy uint8 z demodulatora)
+        bits = int.from_bytes(frame, "big")
+        self.bits = bits
+        self.df = bits >> 107
+        self.ca = (bits >> 104) & 0x7
+        self.icao = f"{(bits >> 80) & 0xFFFFFF:06X}"
+        self.me = (bits >> 24) & ME_MASK
+        self.tc = self.me >> 51
+
+    @property
+    def hex(self):
+        #HEX (28 znaków) - do logów i dla pyModeS
+        return f"{self.bits:028X}"
+
+    def callsign(self):
+        #Znak wywoławczy (TC 1-4), jak pms.adsb.callsign - bez znaków "#"
+        me = self.me
+        return "".join(CHARSET[(me >> shift) & 0x3F] for shift in range(42, -1, -6)).replace("#", "")
+
+    def category(self):
+        return (self.me >> 48) & 0x7
+
+    def altitude(self):
+        #Wysokość barometryczna w stopach (TC 9-18), None gdy nieznana
+        ac = (self.me >> 36) & 0xFFF
+        if ac == 0:
+            return None
+        if ac & 0x10: #bit Q - krok 25 ft
+            return (((ac >> 5) << 4) | (ac & 0xF)) * 25 - 1000
+        return pms.adsb.altitude(self.hex) #kod Gilla (powyżej 50 000 ft) - rzadkie
+
+    def oe_flag(self):
+        return (self.me >> 34) & 1
+
+    def cpr(self):
+        #Surowe współrzędne CPR (lat, lon) jako ułamki strefy 0..1
+        return ((self.me >> 17) & 0x1FFFF) / CPR_SCALE, (self.me & 0x1FFFF) / CPR_SCALE
+
+    def velocity(self):
+        #(prędkość kt, kurs °, prędkość pionowa ft/min, typ) jak pms.adsb.velocity
+        #Podtypy 1/2 (prędkość względem ziemi) liczymy sami, 3/4 (powietrzna) przez pyModeS
+        me = self.me
+        subtype = (me >> 48) & 0x7
+        if subtype not in (1, 2):
+            return pms.adsb.velocity(self.hex)
+        v_ew = (me >> 32) & 0x3FF
+        v_ns = (me >> 21) & 0x3FF
+        if v_ew == 0 or v_ns == 0:
+            return None #brak danych o prędkości
+        scale = 4 if subtype == 2 else 1 #naddźwiękowe
+        v_we = (v_ew - 1) * scale * (-1 if (me >> 42) & 1 else 1)
+        v_sn = (v_ns - 1) * scale * (-1 if (me >> 31) & 1 else 1)
+        speed = int(math.sqrt(v_sn * v_sn + v_we * v_we))
+        track = math.degrees(math.atan2(v_we, v_sn))
+        if track < 0:
+            track += 360
+        vr = (me >> 10) & 0x1FF
+        vs = None if vr == 0 else int((-1 if (me >> 19) & 1 else 1) * (vr - 1) * 64)
+        return speed, track, vs, "GS"
+
+def ac13_altitude(bits):
+    #Wysokość z 13-bitowego pola AC długiej odpowiedzi DF20 (bity 20-32), jak pms.common.altcode.
+    #W DF21 te same bity to kod squawk (pole ID), więc dla innych DF nie ma wysokości
+    if bits >> 107 != 20:
+        return None
+    ac = (bits >> 80) & 0x1FFF
+    if ac == 0:
+        return None
+    if not ac & 0x40 and ac & 0x10: #M = 0 (stopy), Q = 1 (krok 25 ft)
+        return (((ac >> 7) << 5) | (((ac >> 5) & 1) << 4) | (ac & 0xF)) * 25 - 1000
+    return pms.common.altcode(f"{bits:028X}")
+
+def cpr_position(even, odd, t_even, t_odd):
+    #Globalne dekodowanie pozycji z pary ramek even/odd (jak pms.adsb.airborne_position)
+    #even, odd: ułamki CPR (lat, lon) z Message.cpr(). Zwraca (lat, lon) lub None.
+    lat_e, lon_e = even
+    lat_o, lon_o = odd
+    j = math.floor(59 * lat_e - 60 * lat_o + 0.5)
+    rlat_e = 360 / 60 * (j % 60 + lat_e)
+    rlat_o = 360 / 59 * (j % 59 + lat_o)
+    if rlat_e >= 270:
+        rlat_e -= 360
+    if rlat_o >= 270:
+        rlat_o -= 360
+
+    nl = cpr_nl(rlat_e)
+    if nl != cpr_nl(rlat_o):
+        return None #ramki z różnych stref szerokości - czekamy na kolejną parę
+
+    #Długość liczymy z nowszej ramki
+    m = math.floor(lon_e * (nl - 1) - lon_o * nl + 0.5)
+    if t_even > t_odd:
+        lat, ni, lon_cpr = rlat_e, max(nl, 1), lon_e
+    else:
+        lat, ni, lon_cpr = rlat_o, max(nl - 1, 1), lon_o
+    lon = 360 / ni * (m % ni + lon_cpr)
+    if lon > 180:
+        lon -= 360
+    return lat, lon
+
+def cpr_local(cpr, odd, ref_lat, ref_lon):
+    #Dekodowanie pozycji z jednej ramki względem znanej pozycji odniesienia
+    #Wynik jest jednoznaczny, gdy odniesienie leży bliżej niż pół strefy (ok. 3° szerokości, ~180 NM)
+    lat_cpr, lon_cpr = cpr
+    dlat = 360 / (59 if odd else 60)
+    j = math.floor(ref_lat / dlat) + math.floor(0.5 + (ref_lat % dlat) / dlat - lat_cpr)
+    lat = dlat * (j + lat_cpr)
+    ni = max(cpr_nl(lat) - (1 if odd else 0), 1)
+    dlon = 360 / ni
+    m = math.floor(ref_lon / dlon) + math.floor(0.5 + (ref_lon % dlon) / dlon - lon_cpr)
+    lon = dlon * (m + lon_cpr)
+    if lon > 180:
+        lon -= 360
+    elif lon <= -180:
+        lon += 360
+    return lat, lon
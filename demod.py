@@ -0,0 +1,362 @@
+from collections import OrderedDict
+import numpy as np
+
+#Stałe ramki Mode S przy próbkowaniu 2 MSPS (2 próbki na bit)
+PREAMBLE_SAMPLES = 16 #długość preambuły w próbkach
+FRAME_BITS = 112 #długa ramka (DF17/18/20/21)
+FRAME_BYTES = FRAME_BITS // 8
+DATA_SAMPLES = FRAME_BITS * 2
+FRAME_SAMPLES = PREAMBLE_SAMPLES + DATA_SAMPLES #cała ramka razem z preambułą
+
+SHORT_FRAME_BYTES = 7 #krótka ramka (DF0/4/5/11)
+SHORT_FRAME_SAMPLES = PREAMBLE_SAMPLES + SHORT_FRAME_BYTES * 16
+
+NMS_RADIUS = 2 #trafienia bliżej niż o tyle próbek to ta sama preambuła
+
+DEDUP_WINDOW = 1.0 #sekundy - identyczna ramka w tym czasie nie jest dekodowana drugi raz
+DEDUP_CAPACITY = 4096 #maksymalna liczba zapamiętanych ramek
+
+#Ogon bloku przenoszony do następnego - każda ramka, która nie zmieściła się w bloku,
+#zaczyna się w jego ostatnich FRAME_SAMPLES - 1 próbkach
+TAIL_SAMPLES = FRAME_SAMPLES - 1
+
+#Wielomian generujący CRC-24 Mode S (bez najstarszego bitu)
+CRC_POLY = 0xFFF409
+
+#Przesunięcia próbek danych względem początku preambuły - do wycinania wszystkich okien naraz
+_DATA_OFFSETS = np.arange(PREAMBLE_SAMPLES, FRAME_SAMPLES)
+_PREAMBLE_PEAKS = [0, 2, 7, 9]
+_PREAMBLE_VALLEYS = [1, 3, 4, 5, 6, 8]
+
+def _crc_table():
+    #Tablica CRC dla każdej możliwej wartości bajtu - liczymy CRC bajtami zamiast bitami
+    table = np.zeros(256, dtype=np.uint32)
+    for i in range(256):
+        c = i << 16
+        for _ in range(8):
+            c = (c << 1) ^ CRC_POLY if c & 0x800000 else c << 1
+        table[i] = c & 0xFFFFFF
+    return table
+
+CRC_TABLE = _crc_table()
+
+def _crc_remainder(frames, n_bytes):
+    #CRC z pierwszych n_bytes bajtów każdej ramki XOR pole parzystości = syndrom
+    crc = np.zeros(len(frames), dtype=np.uint32)
+    for col in range(n_bytes - 3):
+        crc = ((crc << 8) & 0xFFFFFF) ^ CRC_TABLE[(crc >> 16) ^ frames[:, col]]
+    parity = (frames[:, n_bytes - 3].astype(np.uint32) << 16) | \
+             (frames[:, n_bytes - 2].astype(np.uint32) << 8) | frames[:, n_bytes - 1]
+    return crc ^ parity
+
+def crc_syndromes(frames):
+    #Syndrom CRC dla całej macierzy ramek (to samo co pms.crc, ale dla wszystkich ramek naraz)
+    #0 = ramka poprawna, dla DF20/21 syndrom to adres ICAO (pole AP)
+    #DF < 16 to ramki 56-bitowe - CRC liczymy tylko z pierwszych 7 bajtów
+    if len(frames) == 0:
+        return np.zeros(0, dtype=np.uint32)
+    long_crc = _crc_remainder(frames, FRAME_BYTES)
+    short_crc = _crc_remainder(frames, SHORT_FRAME_BYTES)
+    return np.where((frames[:, 0] >> 3) < 16, short_crc, long_crc)
+
+def _syndrome_table():
+    #Syndrom błędu na pojedynczym bicie - CRC jest liniowe, więc syndrom zepsutej ramki
+    #jest równy syndromowi samego przekłamanego bitu. Pomijamy pole DF (bity 0-4).
+    positions = np.arange(5, FRAME_BITS)
+    errors = np.zeros((len(positions), FRAME_BYTES), dtype=np.uint8)
+    errors[np.arange(len(positions)), positions // 8] = 0x80 >> (positions % 8)
+    syndromes = _crc_remainder(errors, FRAME_BYTES)
+    order = np.argsort(syndromes)
+    return syndromes[order], positions[order]
+
+SYNDROME_KEYS, SYNDROME_BITS = _syndrome_table()
+
+def fix_single_bit_errors(frames, syndromes):
+    #Naprawia (w miejscu) ramki DF17/DF18 z błędem na jednym bicie
+    #Zwraca maskę naprawionych ramek, ich syndromy są zerowane
+    df = frames[:, 0] >> 3
+    candidates = ((df == 17) | (df == 18)) & (syndromes != 0)
+    pos = np.searchsorted(SYNDROME_KEYS, syndromes[candidates])
+    pos[pos == len(SYNDROME_KEYS)] = 0
+    matched = SYNDROME_KEYS[pos] == syndromes[candidates]
+
+    fixed = np.zeros(len(frames), dtype=bool)
+    rows = np.flatnonzero(candidates)[matched]
+    bits = SYNDROME_BITS[pos[matched]]
+    frames[rows, bits // 8] ^= (0x80 >> (bits % 8)).astype(np.uint8)
+    syndromes[rows] = 0
+    fixed[rows] = True
+    return fixed
+
+def _magnitude_lut():
+    #Amplituda dla każdej pary bajtów (I, Q) z RTL-SDR - indeks to I + Q * 256
+    #Zakres 0..65535 zamiast float64 - bez pierwiastka i bez alokacji na każdą próbkę
+    idx = np.arange(65536)
+    i = (idx & 0xFF) - 127.5
+    q = (idx >> 8) - 127.5
+    mag = np.sqrt(i * i + q * q) / (127.5 * np.sqrt(2)) * 65535
+    return np.round(mag).astype(np.uint16)
+
+MAG_LUT = _magnitude_lut()
+NOISE_STEP = 8 #do oszacowania szumu wystarczy co 8. próbka
+
+def iq_magnitude(raw, out=None):
+    #Surowe bajty IQ (I, Q, I, Q, ...) -> amplituda uint16 przez tablicę
+    return np.take(MAG_LUT, raw.view("<u2"), out=out)
+
+def noise_level(mag, scratch=None):
+    #Mediana amplitudy — odporna na outliery od bliskich samolotów
+    #Liczona w miejscu na (opcjonalnym) buforze roboczym zamiast kopii całego bloku
+    sample = mag[::NOISE_STEP]
+    if scratch is None:
+        buf = sample.copy()
+    else:
+        buf = scratch[:len(sample)]
+        np.copyto(buf, sample)
+    k = len(buf) // 2
+    buf.partition(k)
+    return float(buf[k])
+
+def detect_preambles(mag, mask=None, noise_scratch=None, threshold=None):
+    #Zwraca indeksy próbek, w których zaczyna się preambuła
+    #mask i noise_scratch to opcjonalne bufory robocze (żeby nie alokować ich co blok)
+    #threshold - gotowy próg (gdy blok jest dzielony na części, liczymy go raz dla całego bloku)
+    n = len(mag) - 16
+    if n <= 0:
+        return np.empty(0, dtype=np.intp)
+    if threshold is None:
+        threshold = noise_level(mag, noise_scratch) * 3.0
+
+    #Najpierw jeden warunek na całym bloku - pozostałe sprawdzamy już tylko dla kandydatów
+    mask = np.empty(n, dtype=bool) if mask is None else mask[:n]
+    np.greater(mag[:n], threshold, out=mask)
+    c = np.flatnonzero(mask)
+
+    p0 = mag[c] #Sygnał w chwili T
+    p2 = mag[c + 2] #Sygnał w chwili T + 2 próbki
+    p7 = mag[c + 7] #Sygnał w chwili T +7 próbek
+    p9 = mag[c + 9] #Sygnał w chwili T + 9 próbek
+
+    # Dołki (szum/brak sygnału w preambule) - poprawia skuteczność detekcji względem zniekształceń
+    p1 = mag[c + 1]
+    p3 = mag[c + 3]
+    p4 = mag[c + 4]
+    p5 = mag[c + 5]
+    p6 = mag[c + 6]
+    p8 = mag[c + 8]
+
+    # Detekcja: górki muszą być ponad progiem ORAZ dołki muszą obrysowywać kształt impulsów
+    # To drastycznie zmniejsza wystąpienie 'False Positives' przy szumach.
+    hits = (p2 > threshold) & (p7 > threshold) & (p9 > threshold) & \
+           (p1 < p0) & (p1 < p2) & (p3 < p2) & (p4 < p2) & \
+           (p5 < p7) & (p6 < p7) & (p8 < p7) & (p8 < p9)
+    return c[hits]
+
+def preamble_scores(mag, hits):
+    #Kontrast preambuły: średnia z impulsów (0, 2, 7, 9) minus średnia z dołków (1, 3, 4, 5, 6, 8)
+    windows = mag[hits[:, None] + np.arange(10)].astype(np.float64)
+    return windows[:, _PREAMBLE_PEAKS].mean(axis=1) - windows[:, _PREAMBLE_VALLEYS].mean(axis=1)
+
+def suppress_neighbours(mag, hits, radius=NMS_RADIUS):
+    #Silny impuls wyzwala detekcję na kilku sąsiednich próbkach - z każdej grupy trafień
+    #odległych o najwyżej radius zostawiamy tylko to z najlepszym kontrastem preambuły
+    if len(hits) < 2:
+        return hits
+    gaps = np.diff(hits) > radius
+    starts = np.concatenate(([True], gaps))
+    single = starts & np.concatenate((gaps, [True]))
+    if single.all():
+        return hits
+    #Kontrast liczymy tylko dla trafień w grupach
+    grouped = hits[~single]
+    cluster = np.cumsum(starts)[~single]
+    order = np.lexsort((-preamble_scores(mag, grouped), cluster)) #w każdej grupie najpierw najlepszy
+    first = np.concatenate(([True], np.diff(cluster[order]) != 0))
+    return np.sort(np.concatenate((hits[single], grouped[order[first]])))
+
+def slice_frames(mag, hit_indices):
+    #Demodulacja wszystkich trafień z bloku naraz -> macierz ramek (n, 14) uint8
+    #Pomijamy trafienia, których ramka nie mieści się w bloku
+    hit_indices = hit_indices[hit_indices + FRAME_SAMPLES <= len(mag)]
+    if len(hit_indices) == 0:
+        return hit_indices, np.empty((0, FRAME_BYTES), dtype=np.uint8)
+
+    windows = mag[hit_indices[:, None] + _DATA_OFFSETS] #(n, 224)
+    #Jeżeli pierwsza połówka pary jest wyższa -> bit "1"
+    bits = windows[:, 0::2] > windows[:, 1::2]
+    return hit_indices, np.packbits(bits, axis=1)
+
+def df_filter(frames):
+    #Maska ramek, które w ogóle warto dalej sprawdzać (po pierwszym bajcie)
+    #DF17 = "8D", DF18 = "90"-"92", DF11 = "5D", DF20/DF21 = 0xA0-0xBF
+    first = frames[:, 0]
+    return (first == 0x8D) | ((first >= 0x90) & (first <= 0x92)) | \
+           (first == 0x5D) | ((first >= 0xA0) & (first <= 0xBF))
+
+def frame_hex(frame):
+    #Ramka uint8 -> HEX (28 znaków) zgodny z pyModeS
+    return frame.tobytes().hex().upper()
+
+def select_candidates(mag, hits):
+    #Trafienia -> ramki do sprawdzenia CRC: wybór najlepszego trafienia z grupy, wycinanie bitów i filtr DF
+    #Zwraca (offsety, ramki, liczba trafień odrzuconych przez wybór z grupy)
+    best = suppress_neighbours(mag, hits)
+    offsets, frames = slice_frames(mag, best)
+    keep = df_filter(frames)
+    return offsets[keep], frames[keep], len(hits) - len(best)
+
+def skip_inside_frames(offsets, frames, syndromes, previous=None):
+    #Maska kandydatów wartych dalszej obróbki (naprawa bitów, dekodowanie).
+    #Po ramce z poprawnym CRC pomijamy próbki, które ona zajmuje: trafienia w jej bitach danych
+    #to fałszywe preambuły, a trafienie przesunięte o próbkę to ta sama ramka odebrana drugi raz.
+    #Inna poprawna ramka w środku (kolizja dwóch samolotów) zostaje.
+    #previous - (offset, długość) ostatniej poprawnej ramki z poprzedniego bloku
+    valid = syndromes == 0
+    starts = offsets[valid]
+    spans = np.where((frames[valid, 0] >> 3) < 16, SHORT_FRAME_SAMPLES, FRAME_SAMPLES)
+    if previous is not None:
+        starts = np.concatenate(([previous[0]], starts))
+        spans = np.concatenate(([previous[1]], spans))
+    if len(starts) == 0:
+        return np.ones(len(offsets), dtype=bool)
+    idx = np.searchsorted(starts, offsets) - 1 #ostatnia poprawna ramka przed kandydatem
+    prev = np.maximum(idx, 0)
+    dist = offsets - starts[prev]
+    inside = (idx >= 0) & (dist < spans[prev])
+    return ~(inside & (~valid | (dist <= NMS_RADIUS)))
+
+def demodulate(mag):
+    #Pełny etap demodulacji bloku: detekcja, wybór najlepszych trafień, wycinanie bitów i filtr DF
+    #Zwraca offsety ramek w bloku oraz macierz ramek (n, 14)
+    offsets, frames, _ = select_candidates(mag, detect_preambles(mag))
+    return offsets, frames
+
+class Demodulator:
+    #Demodulator ciągłego strumienia bloków surowych próbek IQ (uint8) z RTL-SDR.
+    #Ostatnie TAIL_SAMPLES amplitud bloku trafia na początek następnego, dzięki czemu
+    #ramki leżące na granicy dwóch odczytów z SDR nie są gubione.
+    #Wszystkie duże bufory robocze są alokowane raz - na blok kopiujemy tylko ogon.
+    def __init__(self, block_size):
+        self._allocate(block_size)
+        self.length = 0 #ile próbek bufora zajmuje poprzedni blok (razem z ogonem)
+        self.blocks = 0
+        self.frames = 0 #ramki z poprawnym CRC
+        self.corrected = 0 #ramki naprawione z błędu na jednym bicie
+        self.boundary_frames = 0 #ramki odzyskane na granicy bloków
+        self.candidates = 0 #wszystkie trafienia detektora preambuł
+        self.suppressed = 0 #trafienia odrzucone, bo sąsiad z grupy miał lepszy kontrast
+        self.skipped = 0 #trafienia wewnątrz poprawnie odebranej ramki
+        self.last_saved = 0 #kandydaci zaoszczędzeni w ostatnim bloku
+        self.previous = None #ostatnia poprawna ramka, która może sięgać do następnego bloku
+
+    def _allocate(self, block_size):
+        size = TAIL_SAMPLES + block_size
+        self.work = np.zeros(size, dtype=np.uint16)
+        self.mask = np.empty(size, dtype=bool)
+        self.noise_scratch = np.empty(size // NOISE_STEP + 1, dtype=np.uint16)
+
+    def feed(self, raw):
+        #Przetwarza blok surowych bajtów IQ. Zwraca (offsety, ramki, syndromy).
+        #Offsety liczone są od początku bufora roboczego (ogon poprzedniego bloku + blok).
+        n = len(raw) // 2
+        if TAIL_SAMPLES + n > len(self.work):
+            old = self.work[:self.length].copy()
+            self._allocate(n)
+            self.work[:self.length] = old
+
+        if self.length >= TAIL_SAMPLES:
+            self.work[:TAIL_SAMPLES] = self.work[self.length - TAIL_SAMPLES:self.length]
+            start = 0
+        else:
+            start = TAIL_SAMPLES #pierwszy blok - nie ma jeszcze ogona
+        iq_magnitude(raw[:2 * n], out=self.work[TAIL_SAMPLES:TAIL_SAMPLES + n])
+        self.length = TAIL_SAMPLES + n
+        mag = self.work[start:self.length]
+
+        hits = detect_preambles(mag, self.mask, self.noise_scratch)
+        offsets, frames, suppressed = select_candidates(mag, hits)
+        return self._finish(offsets + start, frames, crc_syndromes(frames), len(hits), suppressed)
+
+    def _finish(self, offsets, frames, syndromes, candidates, suppressed):
+        #Wspólny koniec bloku (też dla wersji wieloprocesowej): pominięcie trafień wewnątrz
+        #poprawnych ramek, naprawa 1-bitowa i liczniki
+        keep = skip_inside_frames(offsets, frames, syndromes, self.previous)
+        skipped = len(offsets) - int(keep.sum())
+        offsets, frames, syndromes = offsets[keep], frames[keep], syndromes[keep]
+        fixed = fix_single_bit_errors(frames, syndromes)
+        valid = syndromes == 0
+        self.blocks += 1
+        self.frames += int(valid.sum())
+        self.corrected += int(fixed.sum())
+        self.boundary_frames += int((valid & (offsets < TAIL_SAMPLES)).sum())
+        self.candidates += candidates
+        self.suppressed += suppressed
+        self.skipped += skipped
+        self.last_saved = suppressed + skipped
+
+        #Ostatnia poprawna ramka we współrzędnych następnego bloku (ogon przesuwa się na początek bufora)
+        if valid.any():
+            last = np.flatnonzero(valid)[-1]
+            span = SHORT_FRAME_SAMPLES if frames[last, 0] >> 3 < 16 else FRAME_SAMPLES
+            self.previous = (int(offsets[last]), span)
+        if self.previous is not None:
+            shifted = self.previous[0] - (self.length - TAIL_SAMPLES)
+            self.previous = (shifted, self.previous[1]) if shifted + self.previous[1] > 0 else None
+        return offsets, frames, syndromes
+
+    def close(self):
+        pass #brak zasobów poza pamięcią (wersja wieloprocesowa zamyka tu pulę)
+
+    def stats(self):
+        return {
+            "blocks": self.blocks,
+            "frames": self.frames,
+            "corrected": self.corrected,
+            "boundary_frames": self.boundary_frames,
+            "candidates": self.candidates,
+            "suppressed": self.suppressed,
+            "skipped": self.skipped,
+            "saved_per_block": round((self.suppressed + self.skipped) / max(self.blocks, 1), 1),
+            "last_block_saved": self.last_saved
+        }
+
+class FrameDedup:
+    #Pamięć ostatnio zdekodowanych ramek (klucz to treść ramki - bajty lub liczba) z wygasaniem po czasie.
+    #Samoloty nadają te same identyfikacje i prędkości wiele razy na sekundę - powtórzenie
+    #wystarczy potraktować jako znak życia zamiast dekodować je od nowa.
+    #Wpis nie jest odświeżany przy trafieniu, więc ta sama ramka jest dekodowana najwyżej raz na okno.
+    def __init__(self, window=DEDUP_WINDOW, capacity=DEDUP_CAPACITY):
+        self.window = window
+        self.capacity = capacity
+        self.seen = OrderedDict() #ramka -> czas dekodowania, najstarsze na początku
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0 #wpisy usunięte z powodu limitu rozmiaru (nie czasu)
+
+    def check(self, key, now):
+        #True gdy identyczna ramka była już dekodowana w ostatnim oknie, inaczej zapamiętuje ją
+        limit = now - self.window
+        while self.seen:
+            _, t = next(iter(self.seen.items()))
+            if t > limit:
+                break
+            self.seen.popitem(last=False)
+        if key in self.seen:
+            self.hits += 1
+            return True
+        self.misses += 1
+        self.seen[key] = now
+        if len(self.seen) > self.capacity:
+            self.seen.popitem(last=False)
+            self.evicted += 1
+        return False
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "size": len(self.seen),
+            "evicted": self.evicted
+        }
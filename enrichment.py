@@ -0,0 +1,50 @@
+#Cechy samolotu wyliczane z opisu modelu ("producent model[operator]"): punkty rzadkości,
+#flaga wojskowa i klasa operatora. Liczone raz na opis przy budowie samoloty.bin (registry.py),
+#potem przenoszone do samolotu (Aircraft) i zapisywane jako kolumny w historia / flights_archive,
+#żeby statystyki filtrowały i sortowały po liczbach zamiast po LIKE '%...%' i punktacji w Pythonie.
+
+#Punkty rzadkości - pierwsza pasująca lista wygrywa, reszta dostaje DEFAULT_POINTS
+VIP = ["AIR FORCE", "MILITARY", "NATO", "NAVY", "POLICE", "LPR", "ANTONOV", "ROBINSON"] #100 pkt
+RARE = ["A380", "CESSNA", "PIPER", "TECNAM"] #50 pkt
+COMMON = ["BOEING", "AIRBUS A320", "AIRBUS A321", "EMBRAER", "RYANAIR", "WIZZ AIR", "CRJ", "ATR 72"] #0 pkt
+DEFAULT_POINTS = 10
+
+MILITARY = ["MILITARY", "AIR FORCE", "NATO", "ARMY", "NAVY"]
+STATE = ["POLICE", "POLICJA", "LPR", "BORDER GUARD", "STRAZ GRANICZNA", "STRAŻ GRANICZNA"] #służby państwowe
+GENERAL_AVIATION = ["CESSNA", "PIPER", "TECNAM", "ROBINSON", "DIAMOND", "CIRRUS"] #lekkie/prywatne
+
+#Klasa operatora (kolumna operator_class)
+OPERATOR_UNKNOWN = 0
+OPERATOR_AIRLINE = 1 #przewoźnik lub firma podana w bazie
+OPERATOR_PRIVATE = 2 #lotnictwo ogólne bez przewoźnika
+OPERATOR_MILITARY = 3
+OPERATOR_STATE = 4 #policja, LPR, straż graniczna
+
+def rarity_points(model_text):
+    #zwraca punkty w zależności od rzadkości samolotu
+    text = model_text.upper()
+    if any(x in text for x in VIP): return 100
+    if any(x in text for x in RARE): return 50
+    if any(x in text for x in COMMON): return 0
+    return DEFAULT_POINTS
+
+def is_military(model_text):
+    text = model_text.upper()
+    return any(x in text for x in MILITARY)
+
+def operator_class(model_text):
+    text = model_text.upper()
+    if any(x in text for x in MILITARY):
+        return OPERATOR_MILITARY
+    if any(x in text for x in STATE):
+        return OPERATOR_STATE
+    if text.endswith("]") and "[" in text:
+        return OPERATOR_AIRLINE
+    if any(x in text for x in GENERAL_AVIATION):
+        return OPERATOR_PRIVATE
+    return OPERATOR_UNKNOWN
+
+def enrich(model_text):
+    #(punkty rzadkości, czy wojskowy, klasa operatora) - dla opisu z bazy albo zapisanego modelu
+    model_text = model_text or ""
+    return rarity_points(model_text), is_military(model_text), operator_class(model_text)
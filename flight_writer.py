@@ -0,0 +1,132 @@
+import queue
+import threading
+import time
+import data_base
+
+#Zapis zakończonych przelotów do bazy w osobnym wątku (write-behind).
+#Cleaner tylko wyjmuje samolot ze stanu i wrzuca go do ograniczonej kolejki - nie czeka na SQLite.
+#Wątek zapisu zbiera z kolejki to, co się uzbierało, i zapisuje paczkę w jednej transakcji.
+
+QUEUE_SIZE = 4096 #lotów w kolejce; gdy pełna, cleaner czeka (poza planes_lock)
+BATCH_SIZE = 128 #maksymalna liczba lotów w jednej transakcji
+
+_STOP = object()
+
+class FlightWriter(threading.Thread):
+    def __init__(self, save_many=None, maxsize=QUEUE_SIZE, batch_size=BATCH_SIZE, on_saved=None):
+        super().__init__(daemon=True)
+        self.save_many = save_many or data_base.save_flights
+        self.on_saved = on_saved #on_saved(loty) - po zapisaniu paczki, w wątku zapisu (np. nowe statystyki dnia)
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.batch_size = batch_size
+        self.closing = False #po close() nowe loty nie trafiają już do kolejki (za _STOP nikt ich nie zapisze)
+        self.submit_lock = threading.Lock() #submit kontra close: lot jest przed _STOP albo zapisany od razu
+        self.submitted = 0
+        self.saved = 0
+        self.batches = 0
+        self.errors = 0
+        self.max_queued = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.last_batch_time = 0.0
+
+    def submit(self, plane):
+        #plane - słownik lotu albo Aircraft już wyjęty ze stanu (serializowany dopiero w wątku zapisu).
+        #Blokuje tylko gdy kolejka jest pełna. Po close() (np. cleaner w trakcie zamykania programu)
+        #lot jest zapisywany od razu w wątku wywołującym.
+        with self.submit_lock:
+            closing = self.closing
+            if not closing:
+                self.queue.put((plane, time.perf_counter()))
+                self.submitted += 1
+                self.max_queued = max(self.max_queued, self.queue.qsize())
+        if closing:
+            self.submitted += 1
+            self._write([(plane, time.perf_counter())])
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            if item is _STOP:
+                self.queue.task_done()
+                return
+            batch = [item]
+            stop = False
+            while len(batch) < self.batch_size:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            self._write(batch)
+            for _ in range(len(batch) + stop):
+                self.queue.task_done()
+            if stop:
+                return
+
+    def _write(self, batch):
+        start = time.perf_counter()
+        planes = [plane.to_json_dict(route=True) if hasattr(plane, "to_json_dict") else plane
+                  for plane, _ in batch]
+        try:
+            self.save_many(planes)
+        except Exception as e:
+            #Paczka się nie udała (np. baza zablokowana) - próbujemy loty pojedynczo, żeby nie zgubić reszty
+            print(f"Błąd zapisu paczki {len(planes)} lotów: {e}")
+            saved = []
+            for plane in planes:
+                try:
+                    self.save_many([plane])
+                    saved.append(plane)
+                except Exception as e:
+                    self.errors += 1
+                    print(f"Błąd zapisu {plane.get('icao')}: {e}")
+            planes = saved
+        done = time.perf_counter()
+        self.saved += len(planes)
+        self.batches += 1
+        self.last_batch_time = done - start
+        for _, queued_at in batch:
+            latency = done - queued_at
+            self.latency_total += latency
+            if latency > self.latency_max:
+                self.latency_max = latency
+        if planes and self.on_saved:
+            try:
+                self.on_saved(planes)
+            except Exception as e:
+                print(f"Błąd po zapisie paczki: {e}")
+
+    def flush(self):
+        #Czeka aż wszystko z kolejki trafi do bazy
+        self.queue.join()
+
+    def close(self):
+        #Zapisuje zaległe loty i kończy wątek (bezpieczne wielokrotne wywołanie)
+        with self.submit_lock:
+            if self.closing:
+                return
+            self.closing = True
+            alive = self.is_alive()
+            if alive:
+                self.queue.put(_STOP)
+        if alive:
+            self.join()
+
+    def stats(self):
+        done = max(self.saved + self.errors, 1)
+        return {
+            "queued": self.queue.qsize(),
+            "max_queued": self.max_queued,
+            "submitted": self.submitted,
+            "saved": self.saved,
+            "errors": self.errors,
+            "batches": self.batches,
+            "avg_batch": round(self.saved / max(self.batches, 1), 1),
+            "last_batch_ms": round(self.last_batch_time * 1000, 2),
+            "latency_ms_avg": round(self.latency_total / done * 1000, 2),
+            "latency_ms_max": round(self.latency_max * 1000, 2)
+        }
@@ -1,28 +1,130 @@
-from rtlsdr import RtlSdr
-import numpy as np
-import pyModeS as pms #biblioteka do wyciągania danych samolotu
 import time
 import threading
 import math
-from flask import Flask, jsonify, render_template, request
-import csv
+import heapq
+import itertools
+import json
+from collections import deque
+from flask import Flask, Response, jsonify, render_template, request
 import data_base
+import flight_writer
+import snapshot
+import broadcast
+import compact
+import demod
+import decoder
+import aircraft
+import registry
+import acquisition
+import parallel_demod
 import os
 import sys
 from datetime import date, datetime, timedelta
 import logging
 import signal
 import atexit
+import argparse
 
 #Współrzędne anteny
 MY_LAT = 51.978
 MY_LON = 17.498
 
+#Dekodowanie pozycji CPR
+CPR_REF_MAX_AGE = 30 #s - do dekodowania lokalnego używamy tylko pozycji młodszej niż to (samolot nie ucieknie o pół strefy)
+CPR_REVALIDATE = 30 #s - co tyle sprawdzamy pozycję lokalną dekodowaniem pary even/odd
+CPR_MAX_MISMATCH = 1.0 #km - większa różnica oznacza błędne odniesienie, wygrywa para
+
+#Usuwanie nieaktywnych samolotów
+PLANE_TIMEOUT = 60 #s bez odbioru - samolot znika z mapy i trafia do bazy
+CPR_TIMEOUT = 60 #s bez ramki pozycji - wpis bufora CPR jest usuwany
+EXPIRY_TICK = 0.5 #s między sprawdzeniami kolejki wygasania
+DB_CLEANUP_INTERVAL = 3600 #s między usuwaniem starych wpisów (starszych niż 48 h) z bazy
+
+#Wersjonowanie stanu (/data?since=N)
+REMOVAL_JOURNAL = 4096 #ile ostatnich usunięć pamiętamy; starszy klient dostaje pełny stan
+
+#Trasy
+ROUTE_TOLERANCE = 0.02 #km - punkty trasy leżące na prostej z dokładnością do tylu są pomijane (0 = wszystkie)
+
+class TimedLock:
+    #threading.Lock z pomiarem czasu oczekiwania i trzymania blokady (do /api/metrics)
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.acquired_at = 0.0
+        self.acquisitions = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.hold_total = 0.0
+        self.hold_max = 0.0
+
+    def __enter__(self):
+        start = time.perf_counter()
+        self.lock.acquire()
+        self.acquired_at = time.perf_counter()
+        wait = self.acquired_at - start
+        self.acquisitions += 1
+        self.wait_total += wait
+        if wait > self.wait_max:
+            self.wait_max = wait
+        return self
+
+    def __exit__(self, *exc):
+        hold = time.perf_counter() - self.acquired_at
+        self.hold_total += hold
+        if hold > self.hold_max:
+            self.hold_max = hold
+        self.lock.release()
+
+    def stats(self):
+        n = max(self.acquisitions, 1)
+        return {
+            "acquisitions": self.acquisitions,
+            "wait_ms_total": round(self.wait_total * 1000, 3),
+            "wait_ms_max": round(self.wait_max * 1000, 3),
+            "wait_us_avg": round(self.wait_total / n * 1e6, 2),
+            "hold_ms_total": round(self.hold_total * 1000, 3),
+            "hold_ms_max": round(self.hold_max * 1000, 3),
+            "hold_us_avg": round(self.hold_total / n * 1e6, 2)
+        }
+
 #Bazy danych
 planes = {} #aktualny stan samolotów
 cpr_buffer = {} #bufor do obliczania pozycji
-planes_lock = threading.Lock() #zabezpieczenie przed konfiktem wątków
-planes_data = {}
+#Kolejki wygasania (kopce po terminie) z leniwym unieważnianiem: wpis to (termin, nr, obiekt),
+#przy zdjęciu sprawdzamy czy obiekt nadal jest w stanie i czy w międzyczasie nie był odświeżony
+expiry_heap = [] #samoloty - pod planes_lock
+cpr_expiry_heap = [] #bufor CPR - tylko wątek radia
+_expiry_seq = itertools.count()
+#Wersja stanu rośnie przy każdej zmianie (pod planes_lock); samolot pamięta wersję swojej ostatniej zmiany
+state_version = 0
+removal_journal = deque(maxlen=REMOVAL_JOURNAL) #(wersja, icao) usuniętych samolotów
+journal_floor = 0 #wersja najnowszego usunięcia, które wypadło z dziennika
+planes_lock = TimedLock() #zabezpieczenie przed konfiktem wątków
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+#Baza modeli ICAO -> opis i cechy (enrichment.py): samoloty.csv kompilowany do samoloty.bin i przeładowywany w tle po zmianie CSV
+planes_data = registry.RegistryService(os.path.join(BASE_DIR, 'samoloty.csv'), os.path.join(BASE_DIR, 'samoloty.bin'),
+                                       on_reload=lambda models: enrich_unknown_models(models))
+active_source = None #aktualne źródło próbek (SDR, nagranie) - do statystyk
+demodulator = demod.Demodulator(acquisition.BLOCK_SIZE)
+frame_dedup = demod.FrameDedup() #powtórzone identyczne ramki (identyfikacja, prędkość, DF11)
+live_stream = broadcast.Broadcaster() #zdarzenia /stream (różnice samolotów, statystyki dnia)
+last_stats = None #ostatnio rozesłane statystyki dnia
+
+def stream_planes(version, delta):
+    #Różnica między kolejnymi migawkami idzie do wszystkich klientów /stream naraz
+    if live_stream.subscribers:
+        live_stream.publish("planes", delta, version)
+
+def publish_stats(saved=None):
+    #Statystyki dnia liczone raz po zapisie lotów (nie raz na klienta) i rozsyłane tylko gdy się zmieniły
+    global last_stats
+    stats = data_base.get_stat_today()
+    if stats != last_stats:
+        last_stats = stats
+        live_stream.publish("stats", json.dumps(stats).encode(), retain=True)
+
+db_writer = flight_writer.FlightWriter(on_saved=publish_stats) #zapis zakończonych przelotów w tle
+live_snapshot = snapshot.LiveSnapshot(on_publish=stream_planes) #gotowy JSON dla /data, odświeżany przez dekoder
 
 app = Flask(__name__)
 log = logging.getLogger('werkzeug')
@@ -32,122 +134,110 @@ last_packet_time = time.time() #czas ostatniego pakietu do sprawdzania czy progr
 last_archived_date = date.today() - timedelta(days=1) #watchdog po starcie od razu sprawdza stan archiwum
 
 def load_csv_data():
+    #Pierwsze wczytanie bazy modeli i obserwowanie zmian samoloty.csv (przeładowanie bez restartu)
     print("Ładowanie bazy samolotów...")
     try:
-        BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-        file_path = os.path.join(BASE_DIR, 'samoloty.csv')
-        with open(file_path, mode='r', encoding = 'utf-8') as file:
-            reader = csv.DictReader(file, quotechar="'")
-            count = 0
-            for row in reader:
-                icao = row.get('icao24', '').upper()
-
-                #W poniższych zmiennych opisany dokładny model samolotu
-                producer = row.get('manufacturerName', '')
-                model = row.get('model', '')
-                operator = row.get('operator', '')
-                all = f"{producer} {model}"
-                if operator:
-                    all += f"[{operator}]"
-
-                planes_data[icao] = all
-                count += 1
-
-        print(f"Wczytano dane {count} samolotów.")
+        planes_data.load()
+        print(f"Wczytano dane {len(planes_data)} samolotów.")
     except FileNotFoundError:
         print("Brak pliku samoloty.csv, dane o modelach samolotów nie będą dostępne.")
     except Exception as e:
         print(f"Błąd podczas wczytywania bazy: {e}")
+    planes_data.start() #także bez bazy - pojawienie się samoloty.csv zostanie zauważone
 
-def text_from_bits(bits):
-    try:
-        n = int(bits, 2)
-        return "{:028X}".format(n) #zamiana na HEX, wymuszenie 28 znaków
-    except ValueError:
-        return ""
-    
-def decode_details(hex_msg):
-    tc = pms.typecode(hex_msg)
-    icao = pms.icao(hex_msg)
+def enrich_unknown_models(models):
+    #Po przeładowaniu bazy: aktywne samoloty z "Nieznany model" dostają opis (i cechy) z nowej bazy.
+    #Wyszukiwanie poza planes_lock, pod blokadą tylko podmiana pola (i tylko gdy samolot nadal jest w stanie)
+    global state_version
+    with planes_lock:
+        unknown = [plane for plane in planes.values() if plane.model == "Nieznany model"]
+    found = [(plane, models.lookup(plane.icao)) for plane in unknown]
+    found = [(plane, info) for plane, info in found if info]
+    if not found:
+        return 0
+    updated = 0
+    with planes_lock:
+        for plane, info in found:
+            if planes.get(plane.icao) is plane and plane.model == "Nieznany model":
+                state_version += 1
+                plane.version = state_version
+                plane.set_info(info)
+                updated += 1
+        live_snapshot.dirty = True
+    print(f"Uzupełniono model {updated} aktywnych samolotów.")
+    return updated
+
+def decode_details(msg, updates=None):
+    #msg - ramka DF17/DF18 rozłożona raz na pola (decoder.Message)
+    #updates - paczka zmian bloku (PlaneUpdates), bez niej zmiany są nakładane od razu
+    batch = updates if updates is not None else PlaneUpdates()
+    tc = msg.tc
+    icao = msg.icao
     now = time.time()
 
     #1. Nazwa lotu
     if 1 <= tc <= 4:
-        callsing = pms.adsb.callsign(hex_msg).strip()
-        category = pms.adsb.category(hex_msg)
+        callsing = msg.callsign().strip()
+        category = msg.category()
         print(f"Nazwa lotu: {callsing.strip()}")
-        actualize_plane(icao, {"callsign": callsing, "category": category})
+        batch.add(icao, {"callsign": callsing, "category": category}, now)
     
     #2. Wysokość
     elif 9 <= tc <= 18:
-        altitude = pms.adsb.altitude(hex_msg)
+        altitude = msg.altitude()
         altitude_meters = round(altitude * 0.3048)
-        actualize_plane(icao, {"altitude": altitude_meters})
+        batch.add(icao, {"altitude": altitude_meters}, now)
         print(f"Wysokość: {altitude_meters} m")
 
         #Logika pozycji - Odd/Even
-        oe = pms.adsb.oe_flag(hex_msg)
-        
-        with planes_lock: # Zabezpieczamy dostęp do cpr_buffer na wypadek usuwania przez wątek cleaner
-            if icao not in cpr_buffer:
-                cpr_buffer[icao] = [None, None] #Even, Odd
-            cpr_buffer[icao][oe] = (hex_msg, now)
-            even, odd = cpr_buffer[icao]
-
-        if even and odd and abs(even[1] - odd[1]) < 10:  # Standard ADS-B pozwala do 10s dla local decoding
-            pos = pms.adsb.position(even[0], odd[0], even[1], odd[1], MY_LAT, MY_LON)
+        oe = msg.oe_flag()
+
+        #Bez blokady: cpr_buffer i pola samolotów zmienia tylko wątek radia (cleaner jedynie usuwa samoloty)
+        entry = cpr_buffer.get(icao)
+        if entry is None:
+            entry = cpr_buffer[icao] = [None, None, 0] #Even, Odd, czas ostatniego dekodowania pary
+            heapq.heappush(cpr_expiry_heap, (now + CPR_TIMEOUT, next(_expiry_seq), icao, entry))
+        entry[oe] = (msg.cpr(), now)
+        even, odd, last_global = entry
+        #Odniesienie do dekodowania lokalnego - ostatnia zaakceptowana pozycja, jeśli jest świeża
+        ref = None
+        plane = planes.get(icao)
+        if plane and plane.lat is not None and now - (plane.last_pos_time or 0) < CPR_REF_MAX_AGE:
+            ref = (plane.lat, plane.lon)
+
+        pair = even and odd and abs(even[1] - odd[1]) < 10  # Standard ADS-B pozwala do 10s dla pary even/odd
+        pos = None
+        if ref:
+            #Pozycja z każdej pojedynczej ramki względem ostatniej pozycji samolotu
+            pos = decoder.cpr_local(msg.cpr(), oe, ref[0], ref[1])
+            #Co jakiś czas sprawdzamy ją niezależnym dekodowaniem pary
+            if pair and now - last_global >= CPR_REVALIDATE:
+                check = decoder.cpr_position(even[0], odd[0], even[1], odd[1])
+                if check:
+                    entry[2] = now
+                    mismatch = calculate_distance(check[0], check[1], pos[0], pos[1])
+                    if mismatch > CPR_MAX_MISMATCH:
+                        print(f"Pozycja lokalna różni się od pary even/odd o {mismatch:.1f} km dla {icao}")
+                        pos = check
+        elif pair:
+            #Brak odniesienia - start śledzenia z pary even/odd
+            pos = decoder.cpr_position(even[0], odd[0], even[1], odd[1])
             if pos:
-                dist = calculate_distance(MY_LAT, MY_LON, pos[0], pos[1])
-                if dist < 800:  # Zwiększony zasięg — CRC i tak filtruje błędne pozycje
-                    # Filtrowanie skoków pozycji
-                    accept = True
-                    with planes_lock:
-                        if icao in planes and "lat" in planes[icao] and "lon" in planes[icao]:
-                            prev_lat = planes[icao]["lat"]
-                            prev_lon = planes[icao]["lon"]
-                            prev_time = planes[icao].get("last_pos_time", 0)
-                            jump = calculate_distance(prev_lat, prev_lon, pos[0], pos[1])
-                            dt = now - prev_time if prev_time else 10
-
-                            # Filtr 1: Max prędkość ~1200 km/h = 0.333 km/s
-                            max_dist = max(0.4 * dt, 2)
-                            if jump > max_dist:
-                                accept = False
-                                print(f"Odrzucono skok pozycji {jump:.1f} km (max {max_dist:.1f} km) dla {icao}")
-
-
-                            if accept and jump > 0.3:
-                                route = planes[icao].get("route", [])
-                                if len(route) >= 2:
-                                    # Kierunek z dwóch ostatnich znanych pozycji
-                                    p1 = route[-2]
-                                    p2 = route[-1]
-                                    # Kierunek dotychczasowy (p1 → p2)
-                                    bearing_old = math.atan2(p2[1] - p1[1], p2[0] - p1[0])
-                                    # Kierunek nowy (p2 → nowa pozycja)
-                                    bearing_new = math.atan2(pos[1] - prev_lon, pos[0] - prev_lat)
-                                    # Różnica kątów w stopniach
-                                    angle_diff = abs(math.degrees(bearing_new - bearing_old)) % 360
-                                    if angle_diff > 180:
-                                        angle_diff = 360 - angle_diff
-                                    # Odrzuć jeśli zmiana kierunku > 70°
-                                    # ale tylko gdy skok jest wystarczająco duży żeby to miało sens
-                                    if angle_diff > 70 and jump > 1.0:
-                                        accept = False
-                                        print(f"Odrzucono zmianę kierunku {angle_diff:.0f}° (skok {jump:.1f} km) dla {icao}")
-
-                    if accept:
-                        print(f"Samolot znajduje się {dist:.1f} km ode mnie")
-                        actualize_plane(icao,{
-                            "lat": pos[0],
-                            "lon": pos[1],
-                            "dist": round(dist, 1),
-                            "last_pos_time": now
-                        })
+                entry[2] = now
+
+        if pos:
+            dist = calculate_distance(MY_LAT, MY_LON, pos[0], pos[1])
+            if dist < 800:  # Zwiększony zasięg — CRC i tak filtruje błędne pozycje
+                batch.position(icao, {
+                    "lat": pos[0],
+                    "lon": pos[1],
+                    "dist": round(dist, 1),
+                    "last_pos_time": now
+                }, now)
 
     #3. Prędkość i kurs
     elif tc == 19:
-        velocity = pms.adsb.velocity(hex_msg)
+        velocity = msg.velocity()
         if velocity:
             speed, heading, rate, v_type = velocity
             speed_kmh = round(speed * 1.852)
@@ -155,11 +245,14 @@ def decode_details(hex_msg):
                 print(f"Prędkość względem ziemi: {speed_kmh} km/h, Kurs: {heading:.2f}°")
             elif v_type == "IAS" or v_type == "TAS":
                 print(f"Prędkość powietrzna (IAS/TAS): {speed_kmh} km/h")
-            actualize_plane(icao, {
+            batch.add(icao, {
                 "speed": speed_kmh,
                 "heading": heading,
                 "v_type": v_type
-            })
+            }, now)
+
+    if updates is None:
+        apply_updates(batch)
 
 def calculate_distance(lat1, lon1, lat2, lon2):
     #Obliczanie odległości do samolotu za pomocą wzoru Haversine'a
@@ -170,56 +263,208 @@ def calculate_distance(lat1, lon1, lat2, lon2):
     a = math.sin(delta_phi / 2)**2 + math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda / 2)**2
     return R * (2 * math.atan2(math.sqrt(a), math.sqrt(1 - a)))
 
+class PlaneUpdates:
+    #Zmiany stanu samolotów zebrane z jednego bloku próbek (per ICAO, w kolejności odbioru).
+    #Nakładane są w jednej sekcji krytycznej na blok zamiast blokady przy każdym polu.
+    def __init__(self):
+        self.by_icao = {} #icao -> lista (dane, update_last_seen, czas, pozycja); dane None = tylko odśwież last_seen
+        self.count = 0
+
+    def add(self, icao, dane, now, update_last_seen=True, position=False):
+        self.by_icao.setdefault(icao, []).append((dane, update_last_seen, now, position))
+        self.count += 1
+
+    def position(self, icao, dane, now):
+        #Nowa pozycja - filtr skoków liczony przy nakładaniu, względem ostatniej zaakceptowanej pozycji
+        self.add(icao, dane, now, position=True)
+
+    def touch(self, icao, now):
+        #Powtórzona identyczna ramka - odświeżamy tylko czas ostatniego odbioru (samolotu nie tworzymy)
+        self.add(icao, None, now)
+
+def _position_rejection_locked(icao, plane, dane, now):
+    #Filtrowanie skoków pozycji względem ostatniej zaakceptowanej pozycji (wywoływane pod planes_lock).
+    #Zwraca powód odrzucenia (do wypisania już po zwolnieniu blokady) albo None, gdy pozycja jest dobra
+    if plane.lat is None or plane.lon is None:
+        return None
+    prev_lat = plane.lat
+    prev_lon = plane.lon
+    prev_time = plane.last_pos_time or 0
+    jump = calculate_distance(prev_lat, prev_lon, dane["lat"], dane["lon"])
+    dt = now - prev_time if prev_time else 10
+
+    # Filtr 1: Max prędkość ~1200 km/h = 0.333 km/s
+    max_dist = max(0.4 * dt, 2)
+    if jump > max_dist:
+        return f"Odrzucono skok pozycji {jump:.1f} km (max {max_dist:.1f} km) dla {icao}"
+
+    if jump > 0.3:
+        route = plane.route
+        if len(route) >= 2:
+            # Kierunek z dwóch ostatnich znanych pozycji
+            p1 = route.point(-2)
+            p2 = route.point(-1)
+            # Kierunek dotychczasowy (p1 → p2)
+            bearing_old = math.atan2(p2[1] - p1[1], p2[0] - p1[0])
+            # Kierunek nowy (p2 → nowa pozycja)
+            bearing_new = math.atan2(dane["lon"] - prev_lon, dane["lat"] - prev_lat)
+            # Różnica kątów w stopniach
+            angle_diff = abs(math.degrees(bearing_new - bearing_old)) % 360
+            if angle_diff > 180:
+                angle_diff = 360 - angle_diff
+            # Odrzuć jeśli zmiana kierunku > 70°
+            # ale tylko gdy skok jest wystarczająco duży żeby to miało sens
+            if angle_diff > 70 and jump > 1.0:
+                return f"Odrzucono zmianę kierunku {angle_diff:.0f}° (skok {jump:.1f} km) dla {icao}"
+    return None
+
+def _apply_update_locked(icao, dane, update_last_seen, now, position=False):
+    #Aktualizuje lub tworzy samolot (wywoływane pod planes_lock).
+    #Zwraca linię logu dla pozycji (wypisywaną dopiero po zwolnieniu blokady) albo None
+    global state_version
+    if dane is None:
+        plane = planes.get(icao)
+        if plane:
+            plane.last_seen = now
+            state_version += 1
+            plane.version = state_version
+            live_snapshot.dirty = True
+        return
+    plane = planes.get(icao)
+    created = plane is None
+    if created:
+        #Gdy odebrano sygnał samolotu po raz pierwszy to szukamy go w bazie
+        plane = planes[icao] = aircraft.Aircraft(icao, now, tolerance=ROUTE_TOLERANCE)
+        info = planes_data.lookup(icao) #opis modelu razem z cechami policzonymi przy budowie bazy
+        if info:
+            plane.set_info(info)
+        heapq.heappush(expiry_heap, (now + PLANE_TIMEOUT, next(_expiry_seq), plane))
+    message = None
+    if position:
+        #Pozycja z dekodera - przed nałożeniem sprawdzamy skoki
+        rejection = _position_rejection_locked(icao, plane, dane, now)
+        if rejection:
+            return rejection
+        message = f"Samolot znajduje się {dane['dist']:.1f} km ode mnie"
+    #Nowa wersja tylko przy faktycznej zmianie - puste odpowiedzi DF11/DF21 (bez last_seen)
+    #nie mogą wrzucać całego samolotu do każdej różnicy /data?since=N i /stream
+    if not (created or (update_last_seen and plane.last_seen != now)
+            or any(getattr(plane, key) != value for key, value in dane.items())):
+        return message
+    state_version += 1
+    plane.version = state_version
+    live_snapshot.dirty = True
+    plane.update(dane)
+    if update_last_seen:
+        plane.last_seen = now
+
+    if "lat" in dane and "lon" in dane:
+        plane.add_point(dane["lat"], dane["lon"], now, plane.altitude)
+
+    if "dist" in dane:
+        if plane.min_dist is None or dane["dist"] < plane.min_dist:
+            plane.min_dist = dane["dist"]
+        if plane.max_dist is None or dane["dist"] > plane.max_dist:
+            plane.max_dist = dane["dist"]
+
+    if "speed" in dane:
+        if dane["speed"] > plane.max_speed:
+            plane.max_speed = dane["speed"]
+    return message
+
+def apply_updates(updates):
+    #Nakłada całą paczkę zmian bloku w jednej sekcji krytycznej; logi pozycji wypisywane już bez blokady
+    if not updates.count:
+        return
+    log = []
+    with planes_lock:
+        for icao, items in updates.by_icao.items():
+            for dane, update_last_seen, now, position in items:
+                message = _apply_update_locked(icao, dane, update_last_seen, now, position)
+                if message:
+                    log.append(message)
+    if log:
+        print("\n".join(log))
+
 def actualize_plane(icao, dane, update_last_seen=True):
-    #Aktualizuje lub tworzy samolot w bazie danych
+    #Aktualizuje lub tworzy samolot w bazie danych (pojedyncza zmiana, poza pętlą dekodera)
+    with planes_lock:
+        message = _apply_update_locked(icao, dane, update_last_seen, time.time())
+    if message:
+        print(message)
+
+def expire_planes(now):
+    #Usuwanie samolotów, które nie były widziane przez PLANE_TIMEOUT.
+    #Zdejmujemy z kopca tylko wpisy, których termin minął - bez przeglądania wszystkich samolotów.
+    #Pod blokadą tylko wyjmujemy je ze stanu - zapis do bazy robi wątek db_writer.
+    global state_version, journal_floor
+    old = []
     with planes_lock:
-        if icao not in planes:
-            #Gdy odebrano sygnał samolotu po raz pierwszy to szukamy go w bazie
-            model_info = planes_data.get(icao, "Nieznany model")
-            planes[icao] = {
-                "icao": icao,
-                "first_seen": time.time(),
-                "model": model_info,
-                "dist": None,  #domyślna wartość dystansu
-                "min_dist": None,
-                "max_dist": None,
-                "speed": 0,
-                "max_speed": 0,
-                "category": 0,
-                "route": []
-            }
-            planes[icao]["last_seen"] = time.time()  # Nowy samolot — zawsze ustaw
-        planes[icao].update(dane)
-        if update_last_seen:
-            planes[icao]["last_seen"] = time.time()
-
-        if "lat" in dane and "lon" in dane:
-            planes[icao]["route"].append([dane["lat"], dane["lon"]])
-
-        if "dist" in dane:
-            if planes[icao]["min_dist"] is None or dane["dist"] < planes[icao]["min_dist"]:
-                planes[icao]["min_dist"] = dane["dist"]
-            if planes[icao]["max_dist"] is None or dane["dist"] > planes[icao]["max_dist"]:
-                planes[icao]["max_dist"] = dane["dist"]
-
-        if "speed" in dane:
-            if dane["speed"] > planes[icao]["max_speed"]:
-                planes[icao]["max_speed"] = dane["speed"]
+        while expiry_heap and expiry_heap[0][0] <= now:
+            _, _, plane = heapq.heappop(expiry_heap)
+            if planes.get(plane.icao) is not plane:
+                continue #wpis po samolocie, który już usunięto
+            deadline = plane.last_seen + PLANE_TIMEOUT
+            if deadline > now:
+                #Samolot odebrany w międzyczasie - wraca do kopca z nowym terminem
+                heapq.heappush(expiry_heap, (deadline, next(_expiry_seq), plane))
+                continue
+            del planes[plane.icao]
+            old.append(plane)
+            state_version += 1
+            if len(removal_journal) == removal_journal.maxlen:
+                journal_floor = removal_journal[0][0]
+            removal_journal.append((state_version, plane.icao))
+        if old:
+            live_snapshot.dirty = True
+    for plane in old:
+        db_writer.submit(plane) #do JSON-a zamienia go dopiero wątek zapisu
+    return len(old)
+
+def publish_snapshot(now, force=False):
+    #Nowa migawka dla /data - najwyżej SNAPSHOT_RATE razy na sekundę i tylko gdy stan się zmienił.
+    #Pod blokadą tylko kopia pól samolotów, kodowanie JSON już poza nią.
+    if not (force or live_snapshot.due(now)):
+        return False
+    with planes_lock:
+        #Zmiana po tym miejscu ustawi dirty ponownie i trafi do następnej migawki
+        live_snapshot.dirty = False
+        version = state_version
+        items = [(plane.version, plane.to_json_dict()) for plane in planes.values()]
+        removed = tuple(removal_journal)
+        floor = journal_floor
+    return live_snapshot.publish(version, items, now, removed, floor)
+
+def expire_cpr(now):
+    #Usuwanie wpisów bufora CPR bez ramki pozycji przez CPR_TIMEOUT (wywołuje wątek radia - właściciel bufora)
+    removed = 0
+    while cpr_expiry_heap and cpr_expiry_heap[0][0] <= now:
+        _, _, icao, entry = heapq.heappop(cpr_expiry_heap)
+        if cpr_buffer.get(icao) is not entry:
+            continue
+        last = max(entry[0][1] if entry[0] else 0, entry[1][1] if entry[1] else 0)
+        deadline = last + CPR_TIMEOUT
+        if deadline > now:
+            heapq.heappush(cpr_expiry_heap, (deadline, next(_expiry_seq), icao, entry))
+            continue
+        del cpr_buffer[icao]
+        removed += 1
+    return removed
 
 def cleaner():
-    #Usuwanie samolotów, które nie były widziane przez minutę
+    last_db_cleanup = 0
     while True:
-        time.sleep(5)
-        limit = time.time() - 60
-        data_base.delete_old_data()
-        with planes_lock:
-            old = [k for k, v in planes.items() if v["last_seen"] < limit]
-            for k in old:
-                #Najpiew zapisz do bazy a potem usuń
-                data_base.save_flight(planes[k])
-                del planes[k]
-                if k in cpr_buffer:
-                    del cpr_buffer[k]
+        time.sleep(EXPIRY_TICK)
+        now = time.time()
+        expire_planes(now)
+        publish_snapshot(now) #usunięte samoloty znikają z /data także gdy dekoder nic nie odbiera
+        if now - last_db_cleanup >= DB_CLEANUP_INTERVAL:
+            data_base.delete_old_data()
+            last_db_cleanup = now
+
+def live_source():
+    #Źródło odbierające na żywo z SDR (także opakowane w Recorder przy --record) albo None
+    return active_source if getattr(active_source, "live", False) else None
 
 def watchdog():
     global last_packet_time
@@ -229,7 +474,8 @@ def watchdog():
     print("Watchdog uruchomiony.")
     while True:
         time.sleep(60) #sprawdzanie co minutę
-        if time.time() - last_packet_time > 3600: #brak pakietów przez godzinę
+        #brak pakietów przez godzinę (tylko przy odbiorze na żywo - nagranie po prostu się kończy)
+        if live_source() and time.time() - last_packet_time > 3600:
             print("Brak sygnału przez godzinę, restart programu.")
             os.system("sudo reboot")
         
@@ -239,123 +485,133 @@ def watchdog():
         #logowanie diagnostyczne raz na godzinę aby sprawdzić czy watchdog działa
         if time.localtime().tm_min == 0:
             print(f"[{time.strftime('%H:%M')}] Watchdog działa. Dziś: {current_date}, Ostatnia archiwizacja: {last_archived_date}")
+            source = live_source()
+            if source:
+                acq = source.stats()
+                print(f"Bloki SDR: odebrane {acq['produced']}, zgubione {acq['dropped']}, max w kolejce {acq['max_queued']}")
         if current_date > last_archived_date:
             print("Minęła północ, archiwizowanie danych.")
             try:
                 data_base.archive_past_days()
                 last_archived_date = current_date
+                publish_stats() #nowy dzień - liczniki od zera
                 print("Archiwizacja zakończona.")
             except Exception as e:
                 print(f"[{time.strftime('%H:%M:%S')}] BŁĄD podczas archiwizacji: {e}")
         
 
-def radio_loop():
-    #Konfiguracja
-    sdr = RtlSdr()
-    sdr.sample_rate = 2000000
-    sdr.center_freq = 1090000000
-    sdr.freq_correction = 1
-    sdr.gain = 49.6
-
+def process_samples(raw):
+    #Demodulacja i dekodowanie jednego bloku surowych próbek IQ
     global last_packet_time
 
+    #Detekcja preambuł i demodulacja wszystkich ramek bloku naraz (razem z ogonem poprzedniego bloku)
+    #Filtrowanie - standardowy ADS-B (DF17 = "8D")
+    #oraz sygnały zależne/TIS-B/ADS-R (DF18 = "90", "91", "92") dla większej ilości detekcji
+    #Odrzucamy resztę DF jeszcze na macierzy bajtów, zanim powstanie jakikolwiek string
+    #Suma kontrolna CRC-24 liczona jest dla wszystkich ramek bloku naraz,
+    #ramki DF17/DF18 z jednym przekłamanym bitem są naprawiane na podstawie syndromu
+    _, frames, syndromes = demodulator.feed(raw)
+
+    #Zmiany stanu zbieramy z całego bloku i nakładamy w jednej sekcji krytycznej na końcu,
+    #żeby /data i cleaner nie czekały na blokadę przy każdej ramce
+    updates = PlaneUpdates()
+    for frame, syndrome in zip(frames, syndromes):
+        first_byte = int(frame[0])
+        df = first_byte >> 3
+
+        # DF17 (ADS-B) i DF18 (TIS-B/ADS-R) — pełne dane
+        if df == 17 or df == 18:
+            if syndrome != 0:
+                continue
+            # Ramka jest parsowana raz - dalej wszystkie pola czytamy z liczby, bez HEX
+            msg = decoder.Message(frame)
+            # Identyfikacja (TC 1-4) i prędkość (TC 19) powtórzone bajt w bajt niczego nie zmieniają.
+            # Pozycji nie pomijamy - dla CPR liczy się czas odbioru każdej ramki.
+            tc = msg.tc
+            if (1 <= tc <= 4 or tc == 19) and frame_dedup.check(msg.bits, time.time()):
+                last_packet_time = time.time()
+                updates.touch(msg.icao, last_packet_time)
+                continue
+            try:
+                last_packet_time = time.time()
+                print(f"Odebrano wiadomość od samolotu ICAO: {msg.icao}, \nType Code: {tc}, HEX: {msg.hex}")
+                decode_details(msg, updates)
+                print("-"*40)
+            except:
+                pass
+
+        # DF11 (Mode S All-Call Reply)
+        elif df == 11:
+            if syndrome != 0:
+                continue
+            # DF11 nie odświeża last_seen, więc powtórzenie można po prostu pominąć
+            # (kluczem jest tylko 56 bitów krótkiej ramki - reszta to szum)
+            msg = decoder.Message(frame)
+            if frame_dedup.check(msg.bits >> 56, time.time()):
+                last_packet_time = time.time()
+                continue
+            try:
+                last_packet_time = time.time()
+                icao = msg.icao
+                updates.add(icao, {}, last_packet_time, update_last_seen=False)
+                print(f"DF11 All-Call od ICAO: {icao}")
+            except:
+                pass
+
+        # DF20/DF21 (Comm-B)
+        # Parzystość jest tu nałożona na adres (pole AP), więc syndrom CRC to adres ICAO.
+        # Przyjmujemy ramkę tylko gdy ten adres należy do już śledzonego samolotu.
+        # Wysokość ma tylko DF20 - w DF21 to samo pole to squawk, więc DF21 tylko podtrzymuje samolot.
+        elif df == 20 or df == 21:
+            icao = f"{int(syndrome):06X}"
+            if icao not in planes and icao not in updates.by_icao: #także samolot dodany w tym bloku
+                continue
+            try:
+                last_packet_time = time.time()
+                alt = decoder.ac13_altitude(int.from_bytes(frame, "big")) if df == 20 else None
+                if alt:
+                    alt_m = round(alt * 0.3048)
+                    updates.add(icao, {"altitude": alt_m}, last_packet_time, update_last_seen=False)
+                    print(f"Comm-B altitude od ICAO: {icao}, wysokość: {alt_m} m")
+                else:
+                    updates.add(icao, {}, last_packet_time, update_last_seen=False)
+            except:
+                pass
+
+    apply_updates(updates)
+    now = time.time()
+    expire_cpr(now)
+    publish_snapshot(now)
+
+def radio_loop(source):
+    #Główna pętla dekodera - pobiera bloki z dowolnego źródła próbek (SDR na żywo lub nagranie)
+    global active_source
+    active_source = source
+    source.start()
+
     print("Czekam na sygnał")
+    started = time.perf_counter()
     try:
         while True:
-            samples = sdr.read_samples(512 * 1024)  # Większy bufor = mniej luk w odczycie
-            mag = np.abs(samples) #amplituda
-
-            #Wykrywanie preambuły
-            p0 = mag[: -16] #Sygnał w chwili T
-            p2 = mag[2: -14] #Sygnał w chwili T + 2 próbki
-            p7 = mag[7 : -9] #Sygnał w chwili T +7 próbek
-            p9 = mag[9 : -7] #Sygnał w chwili T + 9 próbek
-
-            # Dołki (szum/brak sygnału w preambule) - poprawia skuteczność detekcji względem zniekształceń
-            p1 = mag[1: -15]
-            p3 = mag[3: -13]
-            p4 = mag[4: -12]
-            p5 = mag[5: -11]
-            p6 = mag[6: -10]
-            p8 = mag[8: -8]
-
-            noise = np.median(mag)  # Mediana — odporna na outliery od bliskich samolotów
-            threshold = noise * 3.0
-            
-            # Detekcja: górki muszą być ponad progiem ORAZ dołki muszą obrysowywać kształt impulsów
-            # To drastycznie zmniejsza wystąpienie 'False Positives' przy szumach.
-            hits = (p0 > threshold) & (p2 > threshold) & \
-                   (p7 > threshold) & (p9 > threshold) & \
-                   (p1 < p0) & (p1 < p2) & (p3 < p2) & (p4 < p2) & \
-                   (p5 < p7) & (p6 < p7) & (p8 < p7) & (p8 < p9)
-            hit_indices = np.where(hits)[0]
-            #Hits = True -> wiadomość od samolotu się zaczyna
-
-            for idx in hit_indices:
-                data_start = idx + 16 #dane zaczynają się 16 próbek po preambule
-                if data_start + 224 >= len(mag): continue
-                #Dekodowanie bitów
-                signal_slice = mag[data_start: data_start + 224]
-                try:
-                    bit_pairs = signal_slice.reshape(112, 2)
-                    #Jeżeli pierwsza połówka pary jest wyższa -> bit "1"
-                    bits_list = bit_pairs[:, 0] > bit_pairs[:, 1]
-                    bits = "".join(["1" if b else "0" for b in bits_list])
-
-                    hex_msg = text_from_bits(bits)
-                except ValueError:
-                    continue
-
-                #Filtrowanie - standardowy ADS-B (DF17 = "8D") 
-                #oraz sygnały zależne/TIS-B/ADS-R (DF18 = "90", "91", "92") dla większej ilości detekcji
-                #Dodatkowo za pomocą biblioteki pyModeS sprawdzamy sumę kontrolną
-                #żeby nie brac pod uwagę błędnych ramek
-                first_two = hex_msg[:2]
-                first_byte = int(first_two, 16) if len(hex_msg) >= 2 else 0
-
-                # DF17 (ADS-B) i DF18 (TIS-B/ADS-R) — pełne dane
-                if first_two in ("8D", "90", "91", "92"):
-                    try:
-                        if pms.crc(hex_msg) == 0:
-                            last_packet_time = time.time()
-                            icao = pms.icao(hex_msg)
-                            tc = pms.typecode(hex_msg)
-                            print(f"Odebrano wiadomość od samolotu ICAO: {icao}, \nType Code: {tc}, HEX: {hex_msg}")
-                            decode_details(hex_msg)
-                            print("-"*40)
-                    except:
-                        pass
-
-                # DF11 (Mode S All-Call Reply)
-                elif first_two == "5D":
-                    try:
-                        if pms.crc(hex_msg) == 0:
-                            last_packet_time = time.time()
-                            icao = pms.icao(hex_msg)
-                            actualize_plane(icao, {}, update_last_seen=False)
-                            print(f"DF11 All-Call od ICAO: {icao}")
-                    except:
-                        pass
-
-                # DF20/DF21 (Comm-B)
-                elif 0xA0 <= first_byte <= 0xBF:
-                    try:
-                        if pms.crc(hex_msg) == 0:
-                            last_packet_time = time.time()
-                            icao = pms.icao(hex_msg)
-                            alt = pms.common.altcode(hex_msg)
-                            if alt:
-                                alt_m = round(alt * 0.3048)
-                                actualize_plane(icao, {"altitude": alt_m}, update_last_seen=False)
-                                print(f"Comm-B altitude od ICAO: {icao}, wysokość: {alt_m} m")
-                            else:
-                                actualize_plane(icao, {}, update_last_seen=False)
-                    except:
-                        pass
+            item = source.read()
+            if item is None:
+                break #koniec nagrania
+            token, raw = item
+            try:
+                process_samples(raw)
+            finally:
+                source.release(token)
     except KeyboardInterrupt:
         print("Zakończono odbiór sygnału.")
     finally:
-        sdr.close()
+        source.close()
+        demodulator.close()
+        publish_snapshot(time.time(), force=True) #ostatnie zmiany z końca strumienia
+
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    stats = demodulator.stats()
+    print(f"Koniec strumienia: {stats['blocks']} bloków, {stats['frames']} ramek w {elapsed:.1f} s "
+          f"({stats['frames'] / elapsed:.0f} ramek/s)")
 
 cleanup_done = False
 
@@ -366,38 +622,115 @@ def cleanup_on_exit():
     cleanup_done = True
     print("\n" + "="*50)
     print("Zabezpieczenie: Zapisywanie aktywnych samolotów do bazy przed zamknięciem...")
-    saved_count = 0
     with planes_lock:
-        for icao, plane in list(planes.items()):
-            try:
-                data_base.save_flight(plane)
-                saved_count += 1
-            except Exception as e:
-                print(f"Błąd zapisu {icao}: {e}")
-    print(f"Zapisano {saved_count} samolotów. Zamknięto bezpiecznie.")
+        #Aktywne samoloty wyjęte ze stanu - cleaner nie wygasi ich już i nie zapisze drugi raz
+        #(ten sam lot zapisany dwukrotnie scaliłby się sam ze sobą, z powieloną trasą)
+        active = [plane.to_json_dict(route=True) for plane in planes.values()]
+        planes.clear()
+        live_snapshot.dirty = True
+    if db_writer.is_alive():
+        #Aktywne samoloty trafiają na koniec kolejki - close() zapisuje wszystko, co w niej czeka
+        for plane in active:
+            db_writer.submit(plane)
+        db_writer.close()
+        print(f"Kolejka zapisu: {db_writer.stats()}")
+    else:
+        try:
+            data_base.save_flights(active)
+        except Exception as e:
+            print(f"Błąd zapisu: {e}")
+    print(f"Zapisano {len(active)} samolotów. Zamknięto bezpiecznie.")
     print("="*50 + "\n")
 
 def handle_exit(signum, frame):
     cleanup_on_exit()
     sys.exit(0)
 
+def feed_format():
+    #?format=json|columns|msgpack albo nagłówek Accept: application/msgpack
+    fmt = request.args.get("format")
+    if fmt:
+        return fmt
+    best = request.accept_mimetypes.best_match(("application/json",) + compact.MSGPACK_MIMETYPES)
+    return "msgpack" if best in compact.MSGPACK_MIMETYPES else "json"
+
+def unsupported_format(fmt):
+    if fmt not in compact.FORMATS:
+        return Response(f"Nieznany format: {fmt}", status=406)
+    if fmt == "msgpack" and not compact.HAS_MSGPACK:
+        return Response("Format msgpack wymaga modułu msgpack", status=406)
+    return None
+
 @app.route('/data')
 def get_data():
-    with planes_lock:
-        planes_for_map = []
-        for plane in planes.values():
-            map_plane = {k: v for k, v in plane.items() if k != "route"}
-            planes_for_map.append(map_plane)
-        return jsonify(planes_for_map)
+    #Gotowe bajty z ostatniej migawki - bez planes_lock; 304 gdy klient ma już tę wersję
+    #?since=N - tylko samoloty zmienione po wersji N i lista usuniętych (boot - identyfikator uruchomienia serwera)
+    #?format=columns|msgpack, ?fields=... - zwarte formaty (compact.py); pełny stan kodowany raz na migawkę
+    #i wariant, różnice na żądanie (zależą od wersji klienta)
+    fmt = feed_format()
+    error = unsupported_format(fmt)
+    if error:
+        return error
+    since = request.args.get("since", type=int)
+    fields = request.args.get("fields")
+    if fmt != "json" or fields:
+        snap, full, removed, first = live_snapshot.changes(since or 0, request.args.get("boot"))
+        selected = compact.select_fields(fields)
+        envelope = since is not None or fmt != "json"
+
+        def encode():
+            return compact.encode_planes(fmt, snap.records[first:], selected, snap.version,
+                                         live_snapshot.boot, full, removed, envelope=envelope)
+        body = live_snapshot.encoded(snap, (fmt, selected, envelope), encode) if full else encode()
+        response = Response(body, mimetype=compact.mimetype(fmt), headers={"Vary": "Accept"})
+        if since is not None:
+            response.headers["Cache-Control"] = "no-store"
+            return response
+        response.set_etag(f"{snap.etag}-{fmt}-{fields or ''}")
+        response.headers["Cache-Control"] = "no-cache"
+        return response.make_conditional(request)
+    if since is not None:
+        body = live_snapshot.delta(since, request.args.get("boot"))
+        return Response(body, mimetype="application/json", headers={"Cache-Control": "no-store"})
+    snap = live_snapshot.current
+    response = Response(snap.body, mimetype="application/json")
+    response.set_etag(snap.etag)
+    response.headers["Cache-Control"] = "no-cache" #przeglądarka pyta za każdym razem, ale z If-None-Match
+    return response.make_conditional(request)
+
+@app.route('/stream')
+def stream():
+    #Server-Sent Events: najpierw pełny stan, potem różnice z każdej migawki i statystyki po zapisie lotów
+    sub = live_stream.subscribe()
+    if sub is None:
+        return Response("Za dużo połączeń", status=503, headers={"Retry-After": "30"})
+    snap = live_snapshot.current #po subskrypcji - różnice starsze niż ten stan zostaną pominięte
+    initial = broadcast.format_event("planes", live_snapshot.delta(0, snap=snap))
+    return Response(live_stream.stream(sub, initial, snap.version), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @app.route('/route/<icao>')
 def get_route(icao):
+    #?since=N - klient ma już N punktów trasy, więc wysyłamy tylko dopisane. Ostatni znany punkt idzie
+    #jeszcze raz (upraszczanie trasy mogło go przesunąć); "start" - od którego indeksu wstawić "route",
+    #"length" - długość całej trasy, "first_seen" - inny oznacza nowy przelot (klient pobiera całość)
+    #?format=columns|msgpack - trasa jako kolumny "lat" i "lon" (w msgpack skwantowane)
+    fmt = feed_format()
+    error = unsupported_format(fmt)
+    if error:
+        return error
     normalized_icao = icao.upper()
+    since = request.args.get("since", 0, type=int)
     with planes_lock:
         plane = planes.get(normalized_icao)
         if plane:
-            route = plane.get("route", [])
-            return jsonify({"icao": normalized_icao, "active": True, "route": route})
+            length = plane.route_len()
+            start = max(since - 1, 0) if since <= length else 0
+            route = plane.route_points(start)
+            first_seen = plane.first_seen
+    if plane:
+        return route_response(fmt, {"icao": normalized_icao, "active": True, "start": start, "length": length,
+                                    "first_seen": first_seen, "route": route})
 
     # Fallback — samolot nie jest aktywny, szukaj trasy w bazie danych
     import sqlite3 as _sqlite3
@@ -413,8 +746,14 @@ def get_route(icao):
             db_route = _json.loads(row[0])
         except:
             db_route = []
-        return jsonify({"icao": normalized_icao, "active": False, "route": db_route})
-    return jsonify({"icao": normalized_icao, "active": False, "route": []})
+        return route_response(fmt, {"icao": normalized_icao, "active": False, "start": 0, "length": len(db_route),
+                                    "route": db_route})
+    return route_response(fmt, {"icao": normalized_icao, "active": False, "start": 0, "length": 0, "route": []})
+
+def route_response(fmt, payload):
+    if fmt == "json":
+        return jsonify(payload)
+    return Response(compact.encode_route(fmt, payload), mimetype=compact.mimetype(fmt), headers={"Vary": "Accept"})
 
 @app.route('/route/history/<int:rowid>')
 def get_route_history(rowid):
@@ -429,6 +768,34 @@ def get_stats():
     stats = data_base.get_stat_today()
     return jsonify(stats)
 
+@app.route('/api/metrics')
+def api_metrics():
+    metrics = {}
+    if active_source:
+        metrics["acquisition"] = active_source.stats()
+    metrics["demod"] = demodulator.stats()
+    metrics["dedup"] = frame_dedup.stats()
+    metrics["planes_lock"] = planes_lock.stats()
+    metrics["db_writer"] = db_writer.stats()
+    metrics["snapshot"] = live_snapshot.stats()
+    metrics["stream"] = live_stream.stats()
+    metrics["registry"] = planes_data.stats()
+    metrics["expiry"] = {
+        "planes": len(planes),
+        "heap": len(expiry_heap),
+        "cpr_buffer": len(cpr_buffer),
+        "cpr_heap": len(cpr_expiry_heap)
+    }
+    return jsonify(metrics)
+
+@app.route('/api/registry/reload', methods=['POST'])
+def api_registry_reload():
+    #Przebudowa bazy modeli na żądanie (np. po wgraniu nowego samoloty.csv) - tylko z tego komputera
+    if request.remote_addr not in ("127.0.0.1", "::1"):
+        return jsonify({"error": "Dostępne tylko lokalnie"}), 403
+    planes_data.request_reload()
+    return jsonify(planes_data.stats()), 202
+
 @app.route('/list')
 def list_page():
     date_from = request.args.get('date_from', date.today().strftime('%Y-%m-%d'))
@@ -503,7 +870,7 @@ def api_range_map():
 
     if include_active:
         with planes_lock:
-            active = [dict(p) for p in planes.values()]
+            active = [p.to_json_dict() for p in planes.values()]
 
     sectors = data_base.get_range_data(date_param, mode_param, active)
     return jsonify({"sectors": sectors, "antenna": {"lat": MY_LAT, "lon": MY_LON}})
@@ -512,7 +879,39 @@ def api_range_map():
 def index():
     return render_template('index.html')
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Odbiornik ADS-B")
+    parser.add_argument("--replay", metavar="PLIK", help="odtwarzaj nagranie IQ u8 (rtl_sdr) zamiast odbioru z SDR")
+    parser.add_argument("--realtime", action="store_true", help="odtwarzaj nagranie w tempie odbiornika (domyślnie maksymalna prędkość)")
+    parser.add_argument("--record", metavar="PLIK", help="zapisuj odbierane surowe IQ do pliku")
+    parser.add_argument("--headless", action="store_true", help="sam dekoder: bez serwera WWW i bazy danych")
+    parser.add_argument("--workers", type=int, default=1, help="liczba procesów demodulacji (1 = w wątku radia)")
+    parser.add_argument("--snapshot-hz", type=float, default=snapshot.SNAPSHOT_RATE,
+                        help="ile razy na sekundę odświeżać dane dla /data (domyślnie %(default)s)")
+    return parser.parse_args()
+
+def open_source(args):
+    if args.replay:
+        source = acquisition.FileSource(args.replay, realtime=args.realtime)
+    else:
+        source = acquisition.RtlSdrSource()
+    if args.record:
+        source = acquisition.Recorder(source, args.record)
+    return source
+
 if __name__ == "__main__":
+    args = parse_args()
+    live_snapshot = snapshot.LiveSnapshot(args.snapshot_hz, on_publish=stream_planes)
+    source = open_source(args)
+    if args.workers > 1:
+        #Demodulacja na kilku rdzeniach - blok w pamięci współdzielonej, fragmenty w puli procesów
+        demodulator = parallel_demod.ParallelDemodulator(acquisition.BLOCK_SIZE, args.workers)
+
+    if args.headless:
+        #Tryb pomiarowy (np. CI) - dekodujemy strumień i wypisujemy przepustowość
+        radio_loop(source)
+        sys.exit(0)
+
     signal.signal(signal.SIGINT, handle_exit)
     signal.signal(signal.SIGTERM, handle_exit)
     atexit.register(cleanup_on_exit)
@@ -520,8 +919,10 @@ if __name__ == "__main__":
     load_csv_data()
     data_base.init_db()
     data_base.archive_past_days()
+    publish_stats() #pierwsi klienci /stream dostają statystyki bez czekania na zapis
     #uruchomienie wątków
-    threading.Thread(target=radio_loop, daemon=True).start()
+    threading.Thread(target=radio_loop, args=(source,), daemon=True).start()
+    db_writer.start()
     threading.Thread(target=cleaner, daemon=True).start()
     threading.Thread(target=watchdog, daemon=True).start()
 
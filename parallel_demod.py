@@ -0,0 +1,123 @@
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+import demod
+
+#Demodulacja wieloprocesowa - blok surowych IQ trafia do pamięci współdzielonej,
+#a N procesów roboczych skanuje jego kolejne fragmenty (każdy na osobnym rdzeniu, bez GIL).
+#Fragmenty nachodzą na siebie o TAIL_SAMPLES próbek, żeby ramka zaczynająca się pod koniec
+#fragmentu dała się wyciąć w całości. Trafienie należy do fragmentu, w którym zaczyna się preambuła,
+#więc żadna ramka nie jest zgubiona ani zdublowana.
+#Do procesu głównego wracają tylko zwarte dane: offsety, bajty ramek i syndromy.
+#Pominięcie trafień wewnątrz poprawnych ramek i naprawa 1-bitowa zależą od sąsiednich fragmentów,
+#więc robi je proces główny (demod.Demodulator._finish) - to już tylko kilkaset ramek na blok.
+#Opłaca się tylko na kilku rdzeniach: na jednym rdzeniu pula jest wolniejsza od demod.Demodulator
+#(przesyłanie zadań i wyników), a skalowania z liczbą procesów nie mierzyliśmy na wielu rdzeniach.
+
+#spawn, nie fork: pula może powstać ponownie z feed() w wątku radia, gdy działają już wątki Flaska,
+#zapisu i cleanera - dziecko z fork dziedziczyłoby ich zajęte blokady i obsługę sygnałów z main
+SPAWN = multiprocessing.get_context("spawn")
+LOOKBACK = demod.PREAMBLE_SAMPLES #fragment widzi trafienia tuż przed swoim początkiem (grupy na granicy)
+
+_shared = None #pamięć współdzielona z blokiem w procesie roboczym
+
+def _init_worker(shm):
+    #Segment jest tworzony przed pulą - przy spawn trafia do procesu roboczego po nazwie i jest
+    #tylko dołączany; procesy robocze korzystają z tego samego resource_trackera co proces główny
+    global _shared
+    _shared = shm
+
+def _scan(task):
+    #Proces roboczy: amplituda, detekcja, wybór trafień, wycinanie i CRC dla próbek [start, end) bufora
+    start, end, length, threshold, origin = task
+    raw = np.ndarray((2 * length,), dtype=np.uint8, buffer=_shared.buf)
+    first = max(start - LOOKBACK, origin) #origin - początek danych (w pierwszym bloku nie ma ogona)
+    stop = min(end + demod.TAIL_SAMPLES, length)
+    mag = demod.iq_magnitude(raw[2 * first:2 * stop])
+
+    #Grupę sąsiednich trafień na granicy widzą oba fragmenty i wybierają z niej to samo trafienie,
+    #a zostaje ono tylko w tym fragmencie, do którego należy
+    hits = demod.detect_preambles(mag, threshold=threshold)
+    best = demod.suppress_neighbours(mag, hits)
+    own = (hits >= start - first) & (hits < end - first)
+    best = best[(best >= start - first) & (best < end - first)]
+    offsets, frames = demod.slice_frames(mag, best)
+    keep = demod.df_filter(frames)
+    offsets, frames = offsets[keep] + first, frames[keep]
+    syndromes = demod.crc_syndromes(frames)
+    del raw #widok na shm.buf musi zniknąć przed zamknięciem segmentu
+    return offsets.astype(np.int64).tobytes(), frames.tobytes(), syndromes.tobytes(), \
+        int(own.sum()), int(own.sum()) - len(best)
+
+class ParallelDemodulator(demod.Demodulator):
+    #Ten sam interfejs co demod.Demodulator (feed, stats, close), ale blok jest dzielony między procesy.
+    #Bufor roboczy w pamięci współdzielonej to surowe IQ: ogon poprzedniego bloku + bieżący blok.
+    def __init__(self, block_size, workers=None):
+        self.workers = workers or multiprocessing.cpu_count()
+        self.pool = None
+        self.shm = None
+        super().__init__(block_size)
+
+    def _allocate(self, block_size):
+        #Nowy segment (np. większy blok) oznacza też nową pulę procesów
+        old = None if self.shm is None else self.raw[:2 * self.length].copy()
+        self.close()
+        self.shm = shared_memory.SharedMemory(create=True, size=2 * (demod.TAIL_SAMPLES + block_size))
+        self.raw = np.ndarray((self.shm.size,), dtype=np.uint8, buffer=self.shm.buf)
+        if old is not None:
+            self.raw[:len(old)] = old
+        self.pool = SPAWN.Pool(self.workers, initializer=_init_worker, initargs=(self.shm,))
+        #Start procesu przez spawn to świeży interpreter z importem numpy (~0.7 s) - czekamy tu,
+        #a nie w pierwszym feed(), żeby wątek radia nie zgubił próbek, a pomiar nie liczył startu
+        self.pool.map(abs, range(self.workers))
+
+    def feed(self, raw):
+        #Przetwarza blok surowych bajtów IQ. Zwraca (offsety, ramki, syndromy) jak Demodulator.feed
+        tail = 2 * demod.TAIL_SAMPLES
+        n = len(raw) // 2
+        if tail + 2 * n > len(self.raw):
+            self._allocate(n)
+
+        if self.length >= demod.TAIL_SAMPLES:
+            self.raw[:tail] = self.raw[2 * self.length - tail:2 * self.length]
+            start = 0
+        else:
+            start = demod.TAIL_SAMPLES #pierwszy blok - nie ma jeszcze ogona
+        self.raw[tail:tail + 2 * n] = raw[:2 * n]
+        self.length = demod.TAIL_SAMPLES + n
+
+        threshold = self._threshold(start)
+        step = -(-(self.length - start) // self.workers)
+        tasks = [(s, min(s + step, self.length), self.length, threshold, start)
+                 for s in range(start, self.length, step)]
+        results = self.pool.map(_scan, tasks) #wyniki w kolejności fragmentów = kolejność ramek
+
+        offsets = np.frombuffer(b"".join(r[0] for r in results), dtype=np.int64)
+        frames = np.frombuffer(b"".join(r[1] for r in results), dtype=np.uint8).reshape(-1, demod.FRAME_BYTES).copy()
+        syndromes = np.frombuffer(b"".join(r[2] for r in results), dtype=np.uint32).copy()
+        return self._finish(offsets, frames, syndromes, sum(r[3] for r in results), sum(r[4] for r in results))
+
+    def _threshold(self, start):
+        #Próg detekcji liczony raz dla całego bloku, żeby wszystkie fragmenty miały ten sam
+        #(te same próbki co demod.noise_level - co NOISE_STEP-ta para IQ)
+        pairs = self.raw[2 * start:2 * self.length].view("<u2")[::demod.NOISE_STEP]
+        sample = demod.MAG_LUT[pairs]
+        k = len(sample) // 2
+        sample.partition(k)
+        return float(sample[k]) * 3.0
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+        if self.shm is not None:
+            self.raw = None
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    def stats(self):
+        stats = super().stats()
+        stats["workers"] = self.workers
+        return stats
@@ -0,0 +1,314 @@
+import csv
+import mmap
+import multiprocessing
+import os
+import struct
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left
+
+import enrichment
+
+#Skompilowana baza modeli samolotów (samoloty.csv -> samoloty.bin).
+#CSV parsujemy raz (przy pierwszym starcie albo po jego zmianie), a w pliku binarnym zapisujemy:
+#  nagłówek | posortowane ICAO (uint32) | numer opisu dla każdego ICAO (uint32) |
+#  początki opisów w bloku tekstu (uint32, jeden więcej niż opisów) | cechy opisu (uint32) | blok tekstu UTF-8
+#Powtarzające się opisy (ten sam model u tego samego przewoźnika) są zapisane tylko raz.
+#Cechy opisu (enrichment.py: punkty rzadkości, flaga wojskowa, klasa operatora) liczone są raz przy budowie,
+#spakowane w jedną liczbę: bity 0-7 punkty, bit 8 wojskowy, bity 9-11 klasa operatora.
+#W czasie działania plik jest otwierany przez mmap, a wyszukiwanie to bisekcja po tablicy ICAO -
+#start bez parsowania, a strony pliku to pamięć podręczna systemu, nie sterta Pythona.
+#RegistryService pilnuje, żeby baza była aktualna: po zmianie CSV buduje nowy plik w osobnym procesie
+#(bez walki o GIL z dekoderem) i podmienia referencję - wyszukiwania nie czekają na żadną blokadę.
+
+MAGIC = b"PREG"
+FORMAT_VERSION = 2 #2 - dodane cechy opisu; plik w starszej wersji jest budowany ponownie
+BYTE_ORDER_MARK = 0x0102 #zapisany natywnie - po odczycie na innej architekturze będzie 0x0201
+HEADER = struct.Struct("=4sHHII") #magic, wersja, znacznik kolejności bajtów, liczba ICAO, liczba opisów
+
+RELOAD_CHECK = 30 #s między sprawdzeniami daty modyfikacji CSV
+RELOAD_SETTLE = 5 #s - CSV zmieniony niedawniej może być jeszcze kopiowany, czekamy do następnego sprawdzenia
+SPAWN = multiprocessing.get_context("spawn") #przebudowa w świeżym interpreterze
+
+class RegistryError(Exception):
+    pass
+
+def describe(row):
+    #Opis modelu jak w dawnym load_csv_data: "producent model[operator]"
+    producer = row.get('manufacturerName', '')
+    model = row.get('model', '')
+    operator = row.get('operator', '')
+    description = f"{producer} {model}"
+    if operator:
+        description += f"[{operator}]"
+    return description
+
+def pack_info(description):
+    rarity, military, operator = enrichment.enrich(description)
+    return rarity | int(military) << 8 | operator << 9
+
+def unpack_info(info):
+    #-> (punkty rzadkości, czy wojskowy, klasa operatora)
+    return info & 0xFF, bool(info >> 8 & 1), info >> 9 & 0x7
+
+def read_csv(csv_path):
+    #{icao (int): opis}; późniejszy wiersz z tym samym ICAO nadpisuje wcześniejszy
+    entries = {}
+    with open(csv_path, mode='r', encoding='utf-8') as file:
+        for row in csv.DictReader(file, quotechar="'"):
+            try:
+                icao = int(row.get('icao24', ''), 16)
+            except ValueError:
+                continue
+            if 0 <= icao <= 0xFFFFFF:
+                entries[icao] = describe(row)
+    return entries
+
+def compile_csv(csv_path, out_path):
+    #Buduje plik binarny obok (plik tymczasowy + os.replace - czytelnik nigdy nie widzi połowy pliku)
+    entries = read_csv(csv_path)
+    icaos = array("I", sorted(entries))
+    string_ids = {}
+    ids = array("I")
+    offsets = array("I", [0])
+    infos = array("I")
+    blob = bytearray()
+    for icao in icaos:
+        description = entries[icao]
+        sid = string_ids.get(description)
+        if sid is None:
+            sid = string_ids[description] = len(string_ids)
+            blob += description.encode("utf-8")
+            offsets.append(len(blob))
+            infos.append(pack_info(description))
+        ids.append(sid)
+    tmp_path = out_path + ".tmp"
+    with open(tmp_path, "wb") as out:
+        out.write(HEADER.pack(MAGIC, FORMAT_VERSION, BYTE_ORDER_MARK, len(icaos), len(string_ids)))
+        icaos.tofile(out)
+        ids.tofile(out)
+        offsets.tofile(out)
+        infos.tofile(out)
+        out.write(blob)
+    os.replace(tmp_path, out_path)
+    return len(icaos)
+
+class Registry:
+    #Baza tylko do odczytu z interfejsem słownika (get, in, len), jak dawny planes_data,
+    #oraz lookup - opis razem z jego cechami
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._open()
+        except Exception:
+            self.close()
+            raise
+
+    def _open(self):
+        self._icaos = self._ids = self._offsets = self._infos = self._blob = self._view = None
+        if len(self._mmap) < HEADER.size:
+            raise RegistryError(f"{self.path}: za krótki plik")
+        magic, version, mark, count, strings = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != FORMAT_VERSION or mark != BYTE_ORDER_MARK:
+            raise RegistryError(f"{self.path}: nieobsługiwany format, trzeba go zbudować ponownie")
+        if len(self._mmap) < HEADER.size + 4 * (2 * count + 2 * strings + 1):
+            raise RegistryError(f"{self.path}: plik ucięty")
+        self._view = view = memoryview(self._mmap)
+        start = HEADER.size
+        self._icaos = view[start:start + 4 * count].cast("I")
+        start += 4 * count
+        self._ids = view[start:start + 4 * count].cast("I")
+        start += 4 * count
+        self._offsets = view[start:start + 4 * (strings + 1)].cast("I")
+        start += 4 * (strings + 1)
+        self._infos = view[start:start + 4 * strings].cast("I")
+        start += 4 * strings
+        self._blob = view[start:]
+        if len(self._blob) < self._offsets[-1]:
+            raise RegistryError(f"{self.path}: plik ucięty")
+        self.count = count
+        self.strings = strings
+
+    def _find(self, icao):
+        #Numer opisu dla ICAO albo None
+        try:
+            key = int(icao, 16)
+        except (TypeError, ValueError):
+            return None
+        i = bisect_left(self._icaos, key)
+        if i == self.count or self._icaos[i] != key:
+            return None
+        return self._ids[i]
+
+    def _description(self, sid):
+        return str(self._blob[self._offsets[sid]:self._offsets[sid + 1]], "utf-8")
+
+    def get(self, icao, default=None):
+        sid = self._find(icao)
+        return default if sid is None else self._description(sid)
+
+    def lookup(self, icao):
+        #(opis, punkty rzadkości, czy wojskowy, klasa operatora) albo None, gdy ICAO nie ma w bazie
+        sid = self._find(icao)
+        if sid is None:
+            return None
+        return (self._description(sid),) + unpack_info(self._infos[sid])
+
+    def __contains__(self, icao):
+        return self.get(icao) is not None
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        for view in (self._icaos, self._ids, self._offsets, self._infos, self._blob, self._view):
+            if view is not None:
+                view.release()
+        self._mmap.close()
+
+def open_registry(csv_path, bin_path):
+    #Otwiera skompilowaną bazę; kompiluje ją, gdy jej nie ma, CSV jest nowszy albo plik jest w starym formacie
+    if os.path.exists(csv_path) and (not os.path.exists(bin_path)
+                                     or os.path.getmtime(csv_path) > os.path.getmtime(bin_path)):
+        compile_csv(csv_path, bin_path)
+    try:
+        return Registry(bin_path)
+    except RegistryError:
+        if not os.path.exists(csv_path):
+            raise
+    compile_csv(csv_path, bin_path) #plik z innej wersji formatu albo uszkodzony - budujemy od nowa z CSV
+    return Registry(bin_path)
+
+class RegistryService(threading.Thread):
+    #Aktualna baza modeli (get jak w słowniku) z przeładowaniem w tle.
+    #Stara baza nie jest zamykana - mmap zwalnia się sam, gdy nikt już nie trzyma do niej referencji.
+    def __init__(self, csv_path, bin_path, on_reload=None, interval=RELOAD_CHECK, settle=RELOAD_SETTLE):
+        super().__init__(daemon=True)
+        self.csv_path = csv_path
+        self.bin_path = bin_path
+        self.on_reload = on_reload #on_reload(nowa baza) - po podmianie (np. uzupełnienie modeli aktywnych samolotów)
+        self.interval = interval
+        self.settle = settle
+        self.current = {} #do pierwszego wczytania pusta baza
+        self.wake = threading.Event()
+        self.force = False
+        self.stopped = False
+        self.rebuild_lock = threading.Lock() #jedna przebudowa naraz
+        self.generation = 0
+        self.failures = 0
+        self.failed_mtime = None #nie próbujemy ponownie tego samego zepsutego pliku
+        self.last_error = None
+        self.last_build_time = 0.0
+        self.last_reload = None
+
+    def get(self, icao, default=None):
+        return self.current.get(icao, default)
+
+    def lookup(self, icao):
+        current = self.current
+        return current.lookup(icao) if current else None #pusta baza (także {} przed wczytaniem) - None
+
+    def __contains__(self, icao):
+        return self.get(icao) is not None
+
+    def __len__(self):
+        return len(self.current)
+
+    def load(self):
+        #Pierwsze wczytanie przy starcie (kompiluje, gdy trzeba) - FileNotFoundError, gdy nie ma ani CSV, ani bazy
+        self._swap(open_registry(self.csv_path, self.bin_path))
+
+    def request_reload(self):
+        #Przebudowa w wątku usługi bez sprawdzania daty CSV (np. z endpointu administracyjnego)
+        self.force = True
+        self.wake.set()
+
+    def stop(self):
+        self.stopped = True
+        self.wake.set()
+
+    def run(self):
+        while True:
+            self.wake.wait(self.interval)
+            self.wake.clear()
+            if self.stopped:
+                return
+            force, self.force = self.force, False
+            try:
+                if force or self.stale():
+                    self.reload()
+            except Exception as e:
+                print(f"Błąd przeładowania bazy samolotów: {e}")
+
+    def stale(self):
+        #CSV nowszy niż skompilowana baza i od dłuższej chwili niezmieniany
+        try:
+            mtime = os.path.getmtime(self.csv_path)
+        except OSError:
+            return False
+        if mtime == self.failed_mtime or time.time() - mtime < self.settle:
+            return False
+        return not os.path.exists(self.bin_path) or mtime > os.path.getmtime(self.bin_path)
+
+    def reload(self):
+        #Kompilacja w osobnym procesie, otwarcie nowej bazy i podmiana; przy błędzie zostaje stara
+        with self.rebuild_lock:
+            start = time.perf_counter()
+            try:
+                mtime = os.path.getmtime(self.csv_path)
+            except OSError as e:
+                self._failed(None, e)
+                return False
+            #spawn, nie fork: proces z wątkami (Flask, zapis, cleaner, SDR) - dziecko nie dziedziczy zajętych
+            #blokad ani obsługi SIGTERM z main (cleanup_on_exit zapisałby loty drugi raz)
+            builder = SPAWN.Process(target=compile_csv, args=(self.csv_path, self.bin_path), daemon=True)
+            builder.start()
+            builder.join()
+            if builder.exitcode != 0:
+                self._failed(mtime, f"kompilacja zakończona kodem {builder.exitcode}")
+                return False
+            try:
+                new = Registry(self.bin_path)
+            except Exception as e:
+                self._failed(mtime, e)
+                return False
+            self.failed_mtime = None
+            self.last_build_time = time.perf_counter() - start
+            self._swap(new)
+            print(f"Przeładowano bazę samolotów: {len(new)} wpisów w {self.last_build_time:.1f} s")
+        if self.on_reload:
+            self.on_reload(new)
+        return True
+
+    def _swap(self, new):
+        self.current = new #podmiana jednej referencji - czytelnicy widzą starą albo nową bazę, nigdy pół
+        self.generation += 1
+        self.last_reload = time.time()
+
+    def _failed(self, mtime, error):
+        self.failures += 1
+        self.failed_mtime = mtime
+        self.last_error = str(error)
+        print(f"Nie udało się przebudować bazy samolotów: {error}")
+
+    def stats(self):
+        return {
+            "entries": len(self.current),
+            "generation": self.generation,
+            "last_reload": self.last_reload,
+            "last_build_s": round(self.last_build_time, 2),
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "watching": self.is_alive()
+        }
+
+if __name__ == "__main__":
+    #Użycie: python registry.py [samoloty.csv] [samoloty.bin]
+    base = os.path.dirname(os.path.abspath(__file__))
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(base, "samoloty.csv")
+    bin_path = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(csv_path)[0] + ".bin"
+    print(f"Zapisano {compile_csv(csv_path, bin_path)} samolotów do {bin_path}")
@@ -0,0 +1,212 @@
+import math
+from collections import namedtuple
+import numpy as np
+import demod
+
+#Generator syntetycznego sygnału ADS-B / Mode S (2 MSPS) do benchmarków i testów dekodera.
+#Tworzy surowe IQ u8 w formacie rtl_sdr oraz listę nadanych ramek (ground truth).
+
+SAMPLE_RATE = 2000000
+ANTENNA = (51.978, 17.498)
+
+#Średnia liczba wiadomości na sekundę z jednego samolotu dla każdego typu
+MESSAGE_RATES = {
+    "DF11": 1.0,
+    "DF17": 4.2, #pozycja 2/s, prędkość 2/s, identyfikacja 0.2/s
+    "DF18": 0.5,
+    "DF20": 0.5,
+    "DF21": 0.5
+}
+
+CHARSET = "#ABCDEFGHIJKLMNOPQRSTUVWXYZ#####_###############0123456789######"
+
+Transmission = namedtuple("Transmission", "offset df icao frame")
+Aircraft = namedtuple("Aircraft", "icao callsign lat lon altitude speed heading snr_db")
+
+# ─── Kodowanie pól ─────────────────────────────────────────────────────────────
+
+def _to_bytes(value, n_bytes):
+    return list(value.to_bytes(n_bytes, "big"))
+
+def with_parity(payload, address=0):
+    #Dokleja 24 bity parzystości (CRC) do ramki; dla DF20/21 parzystość XOR adres (pole AP)
+    #Przy zerowym polu parzystości syndrom to dokładnie CRC treści
+    frame = np.zeros((1, demod.FRAME_BYTES), dtype=np.uint8)
+    frame[0, :len(payload)] = payload
+    crc = int(demod.crc_syndromes(frame)[0]) ^ address
+    return bytes(payload) + crc.to_bytes(3, "big")
+
+def _nl(lat):
+    #Liczba stref długości geograficznej CPR dla szerokości lat
+    if lat == 0:
+        return 59
+    if abs(lat) == 87:
+        return 2
+    if abs(lat) > 87:
+        return 1
+    a = 1 - math.cos(math.pi / 30)
+    b = math.cos(math.pi / 180 * abs(lat)) ** 2
+    return int(math.floor(2 * math.pi / math.acos(1 - a / b)))
+
+def cpr_encode(lat, lon, odd):
+    #Kodowanie pozycji w formacie CPR (airborne, 17 bitów)
+    i = 1 if odd else 0
+    dlat = 360 / (60 - i)
+    yz = math.floor(2 ** 17 * (lat % dlat) / dlat + 0.5)
+    rlat = dlat * (yz / 2 ** 17 + math.floor(lat / dlat))
+    dlon = 360 / max(_nl(rlat) - i, 1)
+    xz = math.floor(2 ** 17 * (lon % dlon) / dlon + 0.5)
+    return yz % 2 ** 17, xz % 2 ** 17
+
+def _altitude_12(altitude_ft):
+    #Wysokość z krokiem 25 ft (bit Q = 1) w polu 12-bitowym
+    n = max(0, int(round((altitude_ft + 1000) / 25)))
+    return ((n >> 4) << 5) | (1 << 4) | (n & 0xF)
+
+def _altitude_13(altitude_ft):
+    #Pole AC (13 bitów) odpowiedzi DF20: M = 0, Q = 1
+    n = max(0, int(round((altitude_ft + 1000) / 25)))
+    return ((n >> 5) << 7) | (((n >> 4) & 1) << 5) | (1 << 4) | (n & 0xF)
+
+def me_identification(callsign, category=3):
+    value = (4 << 51) | (category << 48)
+    for i, ch in enumerate(callsign.ljust(8, "_")[:8]):
+        value |= CHARSET.index(ch) << (42 - 6 * i)
+    return value
+
+def me_position(lat, lon, altitude_ft, odd):
+    yz, xz = cpr_encode(lat, lon, odd)
+    return (11 << 51) | (_altitude_12(altitude_ft) << 36) | (int(odd) << 34) | (yz << 17) | xz
+
+def me_velocity(speed_kt, heading_deg, vrate_fpm=0):
+    vew = speed_kt * math.sin(math.radians(heading_deg))
+    vns = speed_kt * math.cos(math.radians(heading_deg))
+    dew, dns = int(vew < 0), int(vns < 0)
+    ew = min(int(round(abs(vew))) + 1, 1023)
+    ns = min(int(round(abs(vns))) + 1, 1023)
+    svr = int(vrate_fpm < 0)
+    vr = min(int(round(abs(vrate_fpm) / 64)) + 1, 511)
+    return (19 << 51) | (1 << 48) | (dew << 42) | (ew << 32) | (dns << 31) | (ns << 21) | \
+           (svr << 19) | (vr << 10)
+
+# ─── Ramki ─────────────────────────────────────────────────────────────────────
+
+def adsb_frame(icao, me, df=17):
+    #DF17 (CA = 5) lub DF18 (CF = 0): 5 bajtów nagłówka + 7 bajtów ME + parzystość
+    first = 0x8D if df == 17 else 0x90
+    return with_parity([first] + _to_bytes(icao, 3) + _to_bytes(me, 7))
+
+def df11_frame(icao):
+    return with_parity([0x5D] + _to_bytes(icao, 3))
+
+def df20_frame(icao, altitude_ft, mb=0):
+    header = (20 << 27) | _altitude_13(altitude_ft)
+    return with_parity(_to_bytes(header, 4) + _to_bytes(mb, 7), address=icao)
+
+def df21_frame(icao, squawk_id=0, mb=0):
+    header = (21 << 27) | (squawk_id & 0x1FFF)
+    return with_parity(_to_bytes(header, 4) + _to_bytes(mb, 7), address=icao)
+
+# ─── Sygnał ────────────────────────────────────────────────────────────────────
+
+def frame_waveform(frame):
+    #Obwiednia PPM ramki (preambuła + bity) przy 2 MSPS, amplituda 1
+    bits = np.unpackbits(np.frombuffer(frame, dtype=np.uint8))
+    wave = np.zeros(demod.PREAMBLE_SAMPLES + 2 * len(bits))
+    wave[[0, 2, 7, 9]] = 1.0
+    wave[demod.PREAMBLE_SAMPLES::2] = bits
+    wave[demod.PREAMBLE_SAMPLES + 1::2] = 1 - bits
+    return wave
+
+def random_aircraft(rng, n, snr_db, max_range_km=300):
+    planes = []
+    used = set()
+    for _ in range(n):
+        icao = int(rng.integers(0x100000, 0xFFFFFF))
+        while icao in used:
+            icao = int(rng.integers(0x100000, 0xFFFFFF))
+        used.add(icao)
+        dist = rng.uniform(5, max_range_km)
+        brng = rng.uniform(0, 2 * math.pi)
+        lat = ANTENNA[0] + dist / 111.2 * math.cos(brng)
+        lon = ANTENNA[1] + dist / (111.2 * math.cos(math.radians(ANTENNA[0]))) * math.sin(brng)
+        if np.ndim(snr_db) == 0:
+            snr = float(snr_db)
+        else:
+            snr = float(rng.uniform(snr_db[0], snr_db[1]))
+        callsign = "".join(rng.choice(list("ABCDEFGHIJKLMNOPQRSTUVWXYZ"), 3)) + str(int(rng.integers(10, 9999)))
+        planes.append(Aircraft(icao, callsign, lat, lon, int(rng.integers(20, 400)) * 100,
+                               float(rng.uniform(120, 480)), float(rng.uniform(0, 360)), snr))
+    return planes
+
+def _messages(plane, df, t, rng):
+    #Ramka wybranego typu dla samolotu w chwili t (pozycja przesuwa się zgodnie z kursem)
+    km = plane.speed * 1.852 * t / 3600
+    lat = plane.lat + km / 111.2 * math.cos(math.radians(plane.heading))
+    lon = plane.lon + km / (111.2 * math.cos(math.radians(plane.lat))) * math.sin(math.radians(plane.heading))
+    if df == "DF11":
+        return df11_frame(plane.icao)
+    if df == "DF20":
+        return df20_frame(plane.icao, plane.altitude, int(rng.integers(0, 2 ** 56)))
+    if df == "DF21":
+        return df21_frame(plane.icao, int(rng.integers(0, 2 ** 13)), int(rng.integers(0, 2 ** 56)))
+    kind = rng.uniform(0, 4.2)
+    if kind < 0.2:
+        me = me_identification(plane.callsign)
+    elif kind < 2.2:
+        me = me_position(lat, lon, plane.altitude, odd=rng.uniform() < 0.5)
+    else:
+        me = me_velocity(plane.speed, plane.heading)
+    return adsb_frame(plane.icao, me, df=17 if df == "DF17" else 18)
+
+def generate(n_aircraft=20, seconds=1.0, snr_db=20.0, types=tuple(MESSAGE_RATES), noise=3.0,
+             overlap=0.0, misalign=True, seed=0, sample_rate=SAMPLE_RATE):
+    #Zwraca (surowe IQ u8, lista Transmission posortowana po offsecie, lista Aircraft)
+    #snr_db: liczba lub zakres (min, max) losowany dla każdego samolotu
+    #noise: odchylenie szumu w jednostkach ADC na składową I/Q
+    #overlap: prawdopodobieństwo, że ramka zacznie się w trakcie poprzedniej (kolizja)
+    #misalign: losowe przesunięcie ramek o ułamek próbki
+    rng = np.random.default_rng(seed)
+    n = int(seconds * sample_rate)
+    planes = random_aircraft(rng, n_aircraft, snr_db)
+
+    schedule = []
+    for plane in planes:
+        for df in types:
+            count = rng.poisson(MESSAGE_RATES[df] * seconds)
+            for t in rng.uniform(0, seconds, count):
+                schedule.append((t, plane, df))
+    schedule.sort(key=lambda x: x[0])
+
+    iq = rng.normal(0, noise, n) + 1j * rng.normal(0, noise, n)
+    truth = []
+    last_start = None
+    for t, plane, df in schedule:
+        frame = _messages(plane, df, t, rng)
+        wave = frame_waveform(frame)
+        start = int(t * sample_rate)
+        if last_start is not None and overlap and rng.uniform() < overlap:
+            start = last_start + int(rng.integers(20, demod.FRAME_SAMPLES))
+        if start + len(wave) + 1 > n:
+            continue
+        if misalign:
+            #Energia impulsu rozkłada się na dwie sąsiednie próbki
+            f = rng.uniform(0, 1)
+            shifted = np.zeros(len(wave) + 1)
+            shifted[:-1] += (1 - f) * wave
+            shifted[1:] += f * wave
+            wave = shifted
+        amplitude = noise * math.sqrt(2) * 10 ** (plane.snr_db / 20)
+        iq[start:start + len(wave)] += amplitude * wave * np.exp(1j * rng.uniform(0, 2 * math.pi))
+        truth.append(Transmission(start, df, plane.icao, frame))
+        last_start = start
+    truth.sort(key=lambda x: x.offset)
+
+    raw = np.empty(2 * n, dtype=np.uint8)
+    raw[0::2] = np.clip(np.round(127.5 + iq.real), 0, 255)
+    raw[1::2] = np.clip(np.round(127.5 + iq.imag), 0, 255)
+    return raw, truth, planes
+
+def magnitude(raw):
+    #Amplituda strumienia (uint16), taka sama jak w demodulatorze
+    return demod.iq_magnitude(raw)
@@ -0,0 +1,104 @@
+import json
+import threading
+import time
+from bisect import bisect_right
+from collections import namedtuple
+
+#Gotowa do wysłania migawka stanu na żywo dla /data.
+#Dekoder publikuje ją z ograniczoną częstotliwością jako zakodowany JSON (bytes) z ETagiem,
+#a serwer tylko oddaje aktualny bufor - bez blokady stanu i bez ponownej serializacji na każde zapytanie.
+#Każdy samolot jest kodowany osobno i posortowany po wersji, więc odpowiedź różnicowa (/data?since=N)
+#to sklejenie gotowych kawałków zmienionych od wersji N - koszt zależy od liczby zmian, nie od liczby samolotów.
+#Słowniki samolotów zostają obok zakodowanych kawałków - z nich powstają zwarte formaty (compact.py).
+#Pełny stan w zwartym formacie jest kodowany raz na migawkę i wariant (format, pola) i trzymany przy niej.
+
+SNAPSHOT_RATE = 2.0 #Hz
+ENCODED_VARIANTS = 16 #najwięcej zapamiętanych wariantów pełnego stanu na migawkę (?fields= podaje klient)
+
+Snapshot = namedtuple("Snapshot", "version etag body count created versions parts records "
+                                  "removed_versions removed floor encoded")
+
+def _encode(value):
+    return json.dumps(value, separators=(",", ":")).encode()
+
+class LiveSnapshot:
+    def __init__(self, rate=SNAPSHOT_RATE, on_publish=None):
+        self.interval = 1 / rate if rate > 0 else 0
+        self.boot = f"{int(time.time() * 1000):x}" #wersje i ETag z poprzedniego uruchomienia nie mogą pasować
+        self.lock = threading.Lock() #tylko między publikującymi wątkami
+        self.dirty = True #stan zmienił się od ostatniej publikacji
+        self.last_publish = 0.0
+        self.published = 0
+        self.encode_total = 0.0
+        self.current = Snapshot(0, f"{self.boot}-0", b"[]", 0, time.time(), [], [], [], [], [], 0, {})
+        #on_publish(wersja, różnica względem poprzedniej migawki) - wołane pod self.lock,
+        #więc kolejne różnice trafiają do odbiorcy (/stream) w kolejności wersji
+        self.on_publish = on_publish
+
+    def due(self, now):
+        return self.dirty and now - self.last_publish >= self.interval
+
+    def publish(self, version, items, now, removed=(), floor=0):
+        #version - wersja stanu w chwili kopii (pod blokadą stanu)
+        #items - lista (wersja samolotu, słownik); removed - dziennik usunięć (wersja, icao) rosnąco
+        #floor - najwyższa wersja usunięcia, która wypadła już z dziennika
+        start = time.perf_counter()
+        items = sorted(items, key=lambda item: item[0])
+        parts = [_encode(d) for _, d in items]
+        body = b"[" + b",".join(parts) + b"]"
+        self.encode_total += time.perf_counter() - start
+        snap = Snapshot(version, f"{self.boot}-{version}", body, len(parts), time.time(),
+                        [v for v, _ in items], parts, [d for _, d in items],
+                        [v for v, _ in removed], [icao for _, icao in removed], floor, {})
+        with self.lock:
+            if version <= self.current.version:
+                return False #ten sam lub nowszy stan opublikował już inny wątek
+            previous, self.current = self.current, snap
+            self.last_publish = now
+            self.published += 1
+            if self.on_publish:
+                self.on_publish(version, self.delta(previous.version, snap=snap))
+        return True
+
+    def changes(self, since, boot=None, snap=None):
+        #(migawka, pełny stan?, ICAO usunięte po wersji since, indeks pierwszego samolotu zmienionego po niej)
+        #Pełny stan, gdy klient nie ma punktu odniesienia: pierwsze zapytanie,
+        #restart serwera (inny boot) albo usunięcia starsze niż dziennik.
+        #snap - konkretna migawka zamiast bieżącej
+        snap = snap or self.current
+        if since <= 0 or since > snap.version or since < snap.floor or (boot is not None and boot != self.boot):
+            return snap, True, [], 0
+        return (snap, False, snap.removed[bisect_right(snap.removed_versions, since):],
+                bisect_right(snap.versions, since))
+
+    def delta(self, since, boot=None, snap=None):
+        #Odpowiedź /data?since=N: samoloty zmienione po wersji N i ICAO usunięte po niej
+        snap, full, removed, first = self.changes(since, boot, snap)
+        planes = snap.body if full else b"[" + b",".join(snap.parts[first:]) + b"]"
+        head = b'{"version":%d,"boot":"%s","full":%s,"removed":' % (
+            snap.version, self.boot.encode(), b"true" if full else b"false")
+        return head + _encode(removed) + b',"planes":' + planes + b"}"
+
+    def encoded(self, snap, key, encode):
+        #Pełny stan migawki w innym kodowaniu: encode() raz na wariant key, potem gotowe bajty.
+        #Dwa wątki mogą policzyć ten sam wariant naraz - wynik jest identyczny, więc bez blokady
+        body = snap.encoded.get(key)
+        if body is None:
+            body = encode()
+            if len(snap.encoded) < ENCODED_VARIANTS:
+                snap.encoded[key] = body
+        return body
+
+    def stats(self):
+        snap = self.current
+        return {
+            "version": snap.version,
+            "aircraft": snap.count,
+            "bytes": len(snap.body),
+            "encoded_variants": len(snap.encoded),
+            "removed_journal": len(snap.removed),
+            "age_ms": round((time.time() - snap.created) * 1000),
+            "published": self.published,
+            "encode_ms_avg": round(self.encode_total / max(self.published, 1) * 1000, 3),
+            "rate_hz": round(1 / self.interval, 2) if self.interval else None
+        }
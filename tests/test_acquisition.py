@@ -0,0 +1,220 @@
+import pytest
+import os
+import sys
+import threading
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import acquisition
+
+
+# ─── Helpery ───────────────────────────────────────────────────────────────────
+
+class FakeSdr:
+    """Udaje RtlSdr: wywołuje callback zadaną liczbę razy, potem czeka na anulowanie."""
+
+    def __init__(self, blocks):
+        self.blocks = blocks
+        self.cancelled = threading.Event()
+
+    def read_bytes_async(self, callback, num_bytes):
+        for block in self.blocks:
+            callback(block, None)
+        self.cancelled.wait(2)
+
+    def cancel_read_async(self):
+        self.cancelled.set()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#  1. BufferRing
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class TestBufferRing:
+
+    def test_push_and_get(self):
+        ring = acquisition.BufferRing(2, 4, np.float32)
+        assert ring.push(np.array([1, 2, 3, 4]))
+        i, data = ring.get(timeout=1)
+        assert list(data) == [1, 2, 3, 4]
+
+    def test_buffers_are_preallocated_and_reused(self):
+        ring = acquisition.BufferRing(1, 4, np.float32)
+        ring.push(np.zeros(4))
+        i, first = ring.get(timeout=1)
+        ring.release(i)
+        ring.push(np.ones(4))
+        j, second = ring.get(timeout=1)
+        assert np.shares_memory(first, second)
+
+    def test_drops_when_consumer_is_slow(self):
+        ring = acquisition.BufferRing(2, 4, np.float32)
+        assert ring.push(np.zeros(4))
+        assert ring.push(np.zeros(4))
+        assert not ring.push(np.zeros(4))
+        assert ring.stats()["dropped"] == 1
+
+    def test_release_frees_slot(self):
+        ring = acquisition.BufferRing(1, 4, np.float32)
+        ring.push(np.zeros(4))
+        i, _ = ring.get(timeout=1)
+        ring.release(i)
+        assert ring.push(np.zeros(4))
+        assert ring.stats()["dropped"] == 0
+
+    def test_fifo_order(self):
+        ring = acquisition.BufferRing(3, 1, np.float32)
+        for v in (1, 2, 3):
+            ring.push(np.array([v]))
+        values = []
+        for _ in range(3):
+            i, data = ring.get(timeout=1)
+            values.append(float(data[0]))
+            ring.release(i)
+        assert values == [1, 2, 3]
+
+    def test_short_block_returns_view_of_valid_part(self):
+        ring = acquisition.BufferRing(1, 8, np.float32)
+        ring.push(np.ones(3))
+        _, data = ring.get(timeout=1)
+        assert len(data) == 3
+
+    def test_stats_counters(self):
+        ring = acquisition.BufferRing(2, 4, np.float32)
+        ring.push(np.zeros(4))
+        ring.push(np.zeros(4))
+        ring.get(timeout=1)
+        stats = ring.stats()
+        assert stats["produced"] == 2
+        assert stats["consumed"] == 1
+        assert stats["queued"] == 1
+        assert stats["max_queued"] == 2
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#  2. SdrReader
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class TestSdrReader:
+
+    def test_reader_fills_ring(self):
+        blocks = [bytearray([i] * 4) for i in range(3)]
+        sdr = FakeSdr(blocks)
+        ring = acquisition.BufferRing(4, 4, np.uint8)
+        reader = acquisition.SdrReader(sdr, ring, 4)
+        reader.start()
+        received = []
+        for _ in range(3):
+            i, data = ring.get(timeout=1)
+            received.append(int(data[0]))
+            ring.release(i)
+        reader.stop()
+        reader.join(1)
+        assert received == [0, 1, 2]
+        assert not reader.is_alive()
+
+    def test_reader_counts_drops_without_blocking(self):
+        blocks = [bytearray(4) for _ in range(5)]
+        sdr = FakeSdr(blocks)
+        ring = acquisition.BufferRing(2, 4, np.uint8)
+        reader = acquisition.SdrReader(sdr, ring, 4)
+        reader.start()
+        reader.stop()
+        reader.join(1)
+        stats = ring.stats()
+        assert stats["produced"] + stats["dropped"] == 5
+        assert stats["dropped"] == 3
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#  3. FileSource i Recorder
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _write_capture(path, n_bytes):
+    data = (np.arange(n_bytes) % 251).astype(np.uint8)
+    data.tofile(path)
+    return data
+
+
+def _drain(source):
+    blocks = []
+    source.start()
+    while True:
+        item = source.read()
+        if item is None:
+            break
+        token, raw = item
+        blocks.append(np.array(raw))
+        source.release(token)
+    source.close()
+    return blocks
+
+
+class TestFileSource:
+
+    def test_reads_whole_file_in_blocks(self, tmp_path):
+        path = str(tmp_path / "cap.bin")
+        data = _write_capture(path, 1000)
+        blocks = _drain(acquisition.FileSource(path, block_bytes=300))
+        assert [len(b) for b in blocks] == [300, 300, 300, 100]
+        assert (np.concatenate(blocks) == data).all()
+
+    def test_odd_trailing_byte_is_ignored(self, tmp_path):
+        path = str(tmp_path / "cap.bin")
+        _write_capture(path, 101)
+        blocks = _drain(acquisition.FileSource(path, block_bytes=64))
+        assert sum(len(b) for b in blocks) == 100
+
+    def test_blocks_are_memory_mapped_views(self, tmp_path):
+        path = str(tmp_path / "cap.bin")
+        _write_capture(path, 100)
+        source = acquisition.FileSource(path, block_bytes=50)
+        source.start()
+        _, raw = source.read()
+        assert isinstance(raw, np.memmap)
+
+    def test_empty_file(self, tmp_path):
+        path = str(tmp_path / "cap.bin")
+        open(path, "wb").close()
+        with pytest.raises(ValueError):
+            acquisition.FileSource(path)
+
+    def test_realtime_pacing(self, tmp_path):
+        """4000 bajtów = 2000 próbek = 20 ms przy 100 kSPS."""
+        path = str(tmp_path / "cap.bin")
+        _write_capture(path, 4000)
+        source = acquisition.FileSource(path, block_bytes=1000, realtime=True, sample_rate=100000)
+        start = time.perf_counter()
+        _drain(source)
+        assert time.perf_counter() - start >= 0.019
+
+    def test_stats(self, tmp_path):
+        path = str(tmp_path / "cap.bin")
+        _write_capture(path, 1000)
+        source = acquisition.FileSource(path, block_bytes=400)
+        _drain(source)
+        stats = source.stats()
+        assert stats["blocks"] == 3
+        assert stats["position"] == 1000
+
+
+class TestRecorder:
+
+    def test_recording_can_be_replayed(self, tmp_path):
+        src_path = str(tmp_path / "src.bin")
+        rec_path = str(tmp_path / "rec.bin")
+        data = _write_capture(src_path, 1000)
+        recorder = acquisition.Recorder(acquisition.FileSource(src_path, block_bytes=256), rec_path)
+        _drain(recorder)
+        assert recorder.stats()["recorded_bytes"] == 1000
+        replayed = _drain(acquisition.FileSource(rec_path, block_bytes=256))
+        assert (np.concatenate(replayed) == data).all()
+
+    def test_live_follows_wrapped_source(self, tmp_path):
+        """--record opakowuje SDR w Recorder - źródło nadal jest odbiorem na żywo."""
+        src_path = str(tmp_path / "src.bin")
+        _write_capture(src_path, 1000)
+        assert not acquisition.Recorder(acquisition.FileSource(src_path), str(tmp_path / "a.bin")).live
+        sdr = acquisition.RtlSdrSource.__new__(acquisition.RtlSdrSource) #bez sprzętu
+        assert acquisition.Recorder(sdr, str(tmp_path / "b.bin")).live
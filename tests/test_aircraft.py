@@ -0,0 +1,88 @@
+import pytest
+import os
+import sys
+import json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import aircraft
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#  Aircraft - rekord samolotu ze __slots__
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class TestAircraft:
+
+    def test_defaults(self):
+        plane = aircraft.Aircraft("ABC123", 100.0)
+        assert plane.first_seen == plane.last_seen == 100.0
+        assert plane.model == "Nieznany model"
+        assert plane.min_dist is None
+        assert plane.max_speed == 0
+        assert plane.route_len() == 0
+
+    def test_no_instance_dict(self):
+        plane = aircraft.Aircraft("ABC123", 0.0)
+        assert not hasattr(plane, "__dict__")
+        with pytest.raises(AttributeError):
+            plane.update({"nieznane_pole": 1})
+
+    def test_update_sets_fields(self):
+        plane = aircraft.Aircraft("ABC123", 0.0)
+        plane.update({"callsign": "LOT1", "altitude": 10000})
+        assert plane.callsign == "LOT1"
+        assert plane.altitude == 10000
+
+    def test_route_points(self):
+        plane = aircraft.Aircraft("ABC123", 0.0)
+        plane.add_point(52.1, 17.1, 0.0)
+        plane.add_point(52.2, 17.2, 0.0)
+        assert plane.route_len() == 2
+        assert plane.route_points() == [[52.1, 17.1], [52.2, 17.2]]
+
+
+class TestJsonDict:
+
+    def test_base_fields_always_present(self):
+        d = aircraft.Aircraft("ABC123", 0.0).to_json_dict()
+        assert set(d) == set(aircraft.BASE_FIELDS)
+        assert d["dist"] is None
+
+    def test_optional_fields_only_when_set(self):
+        plane = aircraft.Aircraft("ABC123", 0.0)
+        plane.update({"lat": 52.0, "lon": 17.0})
+        d = plane.to_json_dict()
+        assert d["lat"] == 52.0
+        assert "callsign" not in d
+        assert "route" not in d
+
+    def test_route_on_request(self):
+        plane = aircraft.Aircraft("ABC123", 0.0)
+        plane.add_point(52.0, 17.0, 0.0)
+        assert plane.to_json_dict(route=True)["route"] == [[52.0, 17.0]]
+
+    def test_is_json_serializable(self):
+        plane = aircraft.Aircraft("ABC123", 0.0)
+        plane.update({"callsign": "LOT1", "speed": 800})
+        plane.add_point(52.0, 17.0, 0.0)
+        json.dumps(plane.to_json_dict(route=True))
+
+    def test_roundtrip(self):
+        plane = aircraft.Aircraft("ABC123", 5.0, "Boeing 737")
+        plane.update({"callsign": "LOT1", "lat": 52.0, "lon": 17.0, "dist": 12.5,
+                      "min_dist": 12.5, "max_dist": 30.0, "speed": 800, "max_speed": 850})
+        plane.last_seen = 60.0
+        plane.add_point(52.0, 17.0, 0.0)
+        plane.add_point(52.1, 17.1, 0.0)
+        copy = aircraft.Aircraft.from_dict(plane.to_json_dict(route=True))
+        assert copy.to_json_dict(route=True) == plane.to_json_dict(route=True)
+
+    def test_loads_legacy_dict(self):
+        """Słownik w dawnym formacie z main.planes."""
+        legacy = {"icao": "ABC123", "first_seen": 1.0, "last_seen": 9.0, "model": "Nieznany model",
+                  "dist": None, "min_dist": None, "max_dist": None, "speed": 0, "max_speed": 0,
+                  "category": 0, "route": [[52.0, 17.0]], "altitude": 3000}
+        plane = aircraft.Aircraft.from_dict(legacy)
+        assert plane.altitude == 3000
+        assert plane.last_seen == 9.0
+        assert plane.route_points() == [[52.0, 17.0]]
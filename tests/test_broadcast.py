@@ -0,0 +1,100 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import broadcast
+
+
+# ─── Helpery ───────────────────────────────────────────────────────────────────
+
+def _events(sub):
+    """Wszystkie wiadomości czekające w kolejce subskrybenta."""
+    out = []
+    while not sub.queue.empty():
+        out.append(sub.queue.get_nowait())
+    return out
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#  1. Rozsyłanie zdarzeń
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class TestBroadcaster:
+
+    def test_format_event(self):
+        assert broadcast.format_event("stats", b'{"a":1}') == b'event: stats\ndata: {"a":1}\n\n'
+
+    def test_fan_out_shares_encoded_message(self):
+        hub = broadcast.Broadcaster()
+        subs = [hub.subscribe() for _ in range(3)]
+        message = hub.publish("planes", b"[]", version=5)
+        for sub in subs:
+            [(version, got)] = _events(sub)
+            assert version == 5
+            assert got is message #zakodowane raz dla wszystkich
+
+    def test_retained_sent_to_new_subscriber(self):
+        hub = broadcast.Broadcaster()
+        hub.publish("stats", b'{"n":1}', retain=True)
+        hub.publish("stats", b'{"n":2}', retain=True)
+        hub.publish("planes", b"[]")
+        sub = hub.subscribe()
+        assert _events(sub) == [(None, b'event: stats\ndata: {"n":2}\n\n')]
+
+    def test_slow_subscriber_dropped(self):
+        hub = broadcast.Broadcaster(queue_size=2)
+        slow = hub.subscribe()
+        fast = hub.subscribe()
+        for i in range(3):
+            hub.publish("planes", b"[]", version=i)
+            _events(fast)
+        assert slow.dropped
+        assert not fast.dropped
+        assert hub.subscribers == {fast}
+        assert hub.stats()["dropped"] == 1
+
+    def test_subscriber_limit(self):
+        hub = broadcast.Broadcaster(max_subscribers=1)
+        first = hub.subscribe()
+        assert hub.subscribe() is None
+        hub.unsubscribe(first)
+        assert hub.subscribe() is not None
+        assert hub.stats()["rejected"] == 1
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#  2. Generator odpowiedzi /stream
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class TestStream:
+
+    def test_initial_then_newer_events(self):
+        hub = broadcast.Broadcaster()
+        sub = hub.subscribe()
+        hub.publish("planes", b"old", version=3) #starsze niż pełny stan
+        hub.publish("planes", b"new", version=4)
+        hub.publish("stats", b"{}")
+        gen = hub.stream(sub, b"FULL", version=3)
+        assert next(gen).startswith(b"retry:")
+        assert next(gen) == b"FULL"
+        assert next(gen) == b"event: planes\ndata: new\n\n"
+        assert next(gen) == b"event: stats\ndata: {}\n\n"
+        gen.close()
+        assert sub not in hub.subscribers
+
+    def test_keepalive_when_idle(self):
+        hub = broadcast.Broadcaster()
+        sub = hub.subscribe()
+        gen = hub.stream(sub, keepalive=0.01)
+        next(gen)
+        assert next(gen) == b": keepalive\n\n"
+        gen.close()
+
+    def test_dropped_subscriber_stream_ends(self):
+        hub = broadcast.Broadcaster(queue_size=1)
+        sub = hub.subscribe()
+        hub.publish("planes", b"a", version=1)
+        hub.publish("planes", b"b", version=2)
+        chunks = list(hub.stream(sub)) #zaległości nie mają sensu - po ponownym połączeniu będzie pełny stan
+        assert len(chunks) == 1
+        assert chunks[0].startswith(b"retry:")
@@ -0,0 +1,104 @@
+import pytest
+import os
+import sys
+import json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import compact
+
+
+# ─── Helpery ───────────────────────────────────────────────────────────────────
+
+RECORDS = [
+    {"icao": "A1", "callsign": "LOT1", "lat": 52.12345, "lon": 17.54321, "altitude": 10000,
+     "heading": 90.4, "dist": 12.34, "speed": 800, "min_dist": None},
+    {"icao": "A2", "speed": 0, "dist": None}
+]
+
+
+def _encode(fmt, fields=None, envelope=True):
+    return compact.encode_planes(fmt, RECORDS, compact.select_fields(fields), 7, "b00t", False, ["X1"],
+                                 envelope=envelope)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#  1. Wybór pól
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class TestSelectFields:
+
+    def test_all_by_default(self):
+        assert compact.select_fields(None) == compact.FIELDS
+
+    def test_icao_always_and_fixed_order(self):
+        assert compact.select_fields("heading,lat,lon") == ("icao", "lat", "lon", "heading")
+
+    def test_unknown_ignored(self):
+        assert compact.select_fields("lat,nieznane") == ("icao", "lat")
+
+    def test_field_ids_are_stable(self):
+        """Numery pól w msgpack to protokół - pierwsze pola nie mogą się przesunąć."""
+        assert compact.FIELDS[:5] == ("icao", "callsign", "model", "lat", "lon")
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#  2. Kodowanie samolotów
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class TestEncodePlanes:
+
+    def test_columns(self):
+        data = json.loads(_encode("columns", "lat,speed"))
+        assert data["version"] == 7
+        assert data["boot"] == "b00t"
+        assert data["removed"] == ["X1"]
+        assert data["fields"] == ["icao", "lat", "speed"]
+        assert data["columns"] == [["A1", "A2"], [52.12345, None], [800, 0]]
+
+    def test_json_rows_with_fields(self):
+        data = json.loads(_encode("json", "lat"))
+        assert data["planes"] == [{"icao": "A1", "lat": 52.12345}, {"icao": "A2"}]
+
+    def test_json_without_envelope_is_plain_list(self):
+        assert json.loads(_encode("json", "speed", envelope=False)) == [{"icao": "A1", "speed": 800},
+                                                                        {"icao": "A2", "speed": 0}]
+
+    def test_msgpack_quantized(self):
+        msgpack = pytest.importorskip("msgpack")
+        version, boot, full, removed, ids, columns = msgpack.unpackb(_encode("msgpack", "lat,lon,dist,heading"))
+        assert (version, boot, full, removed) == (7, "b00t", False, ["X1"])
+        assert [compact.FIELDS[i] for i in ids] == ["icao", "lat", "lon", "heading", "dist"]
+        assert columns[1] == [5212345, None]
+        assert columns[2] == [1754321, None]
+        assert columns[3] == [90, None]
+        assert columns[4] == [123, None]
+
+    def test_msgpack_smaller_than_json(self):
+        pytest.importorskip("msgpack")
+        assert len(_encode("msgpack")) < min(len(_encode("columns")), len(_encode("json")))
+
+
+class TestEncodeRoute:
+
+    def test_columns(self):
+        payload = {"icao": "A1", "active": True, "start": 0, "length": 2, "route": [[52.0, 17.0], [52.5, 17.25]]}
+        data = json.loads(compact.encode_route("columns", payload))
+        assert data["lat"] == [52.0, 52.5]
+        assert data["lon"] == [17.0, 17.25]
+        assert "route" not in data
+        assert "route" in payload #słownik wywołującego bez zmian
+
+    def test_msgpack(self):
+        msgpack = pytest.importorskip("msgpack")
+        payload = {"icao": "A1", "active": True, "start": 1, "length": 2, "route": [[52.00001, 17.5]]}
+        data = msgpack.unpackb(compact.encode_route("msgpack", payload))
+        assert data["start"] == 1
+        assert data["lat"] == [5200001]
+        assert data["lon"] == [1750000]
+
+    def test_gap_separator_is_null(self):
+        payload = {"icao": "A1", "active": False, "start": 0, "length": 3,
+                   "route": [[52.0, 17.0], None, [52.5, 17.25]]}
+        data = json.loads(compact.encode_route("columns", payload))
+        assert data["lat"] == [52.0, None, 52.5]
+        assert data["lon"] == [17.0, None, 17.25]
@@ -9,6 +9,7 @@ from datetime import datetime, date, timedelta
 # Dodanie katalogu projektu do ścieżki importów
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import data_base
+import enrichment
 
 
 # ─── Fixture: tymczasowa baza danych ───────────────────────────────────────────
@@ -53,13 +54,15 @@ def _insert_flight_raw(db_path, icao="ABC123", callsign="LOT1", model="Boeing 73
     conn = sqlite3.connect(db_path)
     c = conn.cursor()
     resolved_max_dist = min_dist if max_dist is _UNSET else max_dist
-    c.execute("INSERT INTO historia (icao, callsign, model, min_dist, max_speed, category, has_location, first_seen, last_seen, route, max_dist) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", (
+    rarity, military, operator = enrichment.enrich(model)  # jak przy zapisie z bazy modeli
+    c.execute("INSERT INTO historia (icao, callsign, model, min_dist, max_speed, category, has_location, first_seen, last_seen, route, max_dist, rarity, is_military, operator_class) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", (
         icao, callsign, model, min_dist, max_speed, category,
         has_location,
         int(first_seen or now - 120),
         int(last_seen or now),
         json.dumps(route) if route else None,
         resolved_max_dist,
+        rarity, int(military), operator,
     ))
     conn.commit()
     conn.close()
@@ -103,6 +106,26 @@ class TestInitDb:
         indexes = {row[0] for row in c.fetchall()}
         conn.close()
         assert "idx_icao_time" in indexes
+        assert "idx_military_time" in indexes
+
+    def test_backfills_enrichment_of_old_rows(self, test_db):
+        """Baza sprzed kolumn cech: migracja dodaje kolumny i wylicza je z zapisanego modelu."""
+        conn = sqlite3.connect(test_db)
+        conn.execute("DROP TABLE historia")
+        conn.execute("""CREATE TABLE historia (icao TEXT, callsign TEXT, model TEXT, min_dist REAL,
+                        max_speed INTEGER, category INTEGER, has_location INTEGER,
+                        first_seen INTEGER, last_seen INTEGER, route TEXT, max_dist REAL)""")
+        conn.execute("INSERT INTO historia (icao, model) VALUES ('M1', 'C-295[Polish Air Force]')")
+        conn.execute("INSERT INTO historia (icao, model) VALUES ('M2', NULL)")
+        conn.commit()
+        conn.close()
+
+        data_base.init_db()
+
+        conn = sqlite3.connect(test_db)
+        rows = conn.execute("SELECT icao, rarity, is_military, operator_class FROM historia ORDER BY icao").fetchall()
+        conn.close()
+        assert rows == [("M1", 100, 1, enrichment.OPERATOR_MILITARY), ("M2", 10, 0, enrichment.OPERATOR_UNKNOWN)]
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -123,6 +146,25 @@ class TestSaveFlight:
         assert row[0] == "ABC123"
         assert row[1] == "Boeing 737"
 
+    def test_saves_enrichment_from_plane(self, test_db):
+        """Cechy z bazy modeli (Aircraft) trafiają do kolumn bez ponownego liczenia."""
+        plane = _make_plane(model="Boeing 737")
+        plane.update({"rarity": 77, "is_military": True, "operator_class": enrichment.OPERATOR_MILITARY})
+        data_base.save_flight(plane)
+
+        conn = sqlite3.connect(test_db)
+        row = conn.execute("SELECT rarity, is_military, operator_class FROM historia").fetchone()
+        conn.close()
+        assert row == (77, 1, enrichment.OPERATOR_MILITARY)
+
+    def test_enrichment_from_model_when_missing(self, test_db):
+        data_base.save_flight(_make_plane(model="Eurocopter EC 135[Policja]"))
+
+        conn = sqlite3.connect(test_db)
+        row = conn.execute("SELECT rarity, is_military, operator_class FROM historia").fetchone()
+        conn.close()
+        assert row == (10, 0, enrichment.OPERATOR_STATE)
+
     def test_filters_noise_short_flight(self, test_db):
         """Lot trwający < 5s nie jest zapisywany."""
         now = time.time()
@@ -430,6 +472,17 @@ class TestGetFlightsList:
         if len(result) >= 2:
             assert result[0]["icao"] == "NEW"
 
+    def test_military_flag_from_columns(self, test_db):
+        """Flaga wojskowa obejmuje też służby państwowe (policja, LPR)."""
+        now = time.time()
+        _insert_flight_raw(test_db, icao="W1", model="C-130[US Navy]", last_seen=now, first_seen=now - 60)
+        _insert_flight_raw(test_db, icao="W2", model="EC 135[LPR]", last_seen=now, first_seen=now - 60)
+        _insert_flight_raw(test_db, icao="W3", model="Boeing 737[Ryanair]", last_seen=now, first_seen=now - 60)
+
+        today_str = date.today().strftime("%Y-%m-%d")
+        flags = {r["icao"]: r["is_military"] for r in data_base.get_flights_list(today_str, today_str)}
+        assert flags == {"W1": True, "W2": True, "W3": False}
+
     def test_result_fields(self, test_db):
         """Sprawdzenie struktury zwracanego obiektu."""
         now = time.time()
@@ -541,6 +594,20 @@ class TestGetStatToday:
         stats = data_base.get_stat_today()
         assert stats["stat_rarest"] == "NATO E-3 Sentry"
 
+    def test_rarest_tie_takes_latest_and_skips_unknown(self, test_db):
+        now = time.time()
+        _insert_flight_raw(test_db, icao="R1", model="Cessna 172", last_seen=now, first_seen=now - 60)
+        _insert_flight_raw(test_db, icao="R2", model="Piper PA-28", last_seen=now, first_seen=now - 60)
+        _insert_flight_raw(test_db, icao="R3", model="Nieznany model", last_seen=now, first_seen=now - 60)
+
+        assert data_base.get_stat_today()["stat_rarest"] == "Piper PA-28"
+
+    def test_only_unknown_models(self, test_db):
+        now = time.time()
+        _insert_flight_raw(test_db, icao="U1", model="Nieznany model", last_seen=now, first_seen=now - 60)
+
+        assert data_base.get_stat_today()["stat_rarest"] == "Tylko niezidentyfikowane"
+
     def test_military_ghost_detected(self, test_db):
         now = time.time()
         _insert_flight_raw(test_db, icao="G1", model="Military Transport",
@@ -596,6 +663,16 @@ class TestGetDetailedStatsToday:
         assert stats["top_models"][0][0] == "Boeing 737"
         assert stats["top_models"][0][1] == 5
 
+    def test_rare_models_by_points_then_count(self, test_db):
+        now = time.time()
+        for i, model in enumerate(["Boeing 737", "Cessna 172", "Cessna 172", "Piper PA-28",
+                                   "NATO E-3 Sentry", "Saab 340", "Nieznany model"]):
+            _insert_flight_raw(test_db, icao=f"Q{i}", model=model, last_seen=now - i, first_seen=now - i - 60)
+
+        stats = data_base.get_detailed_stats_today()
+        assert stats["rare_models"] == [("NATO E-3 Sentry", 1), ("Piper PA-28", 1), ("Cessna 172", 2),
+                                        ("Saab 340", 1), ("Boeing 737", 1)]
+
     def test_farthest_plane(self, test_db):
         now = time.time()
         _insert_flight_raw(test_db, icao="F1", model="Długi Lot", min_dist=50.0, max_dist=350.0,
@@ -686,6 +763,21 @@ class TestArchivePastDays:
         conn.close()
         assert count == 1
 
+    def test_archive_keeps_enrichment(self, test_db):
+        """Loty w flights_archive mają te same cechy co w historia."""
+        yesterday = time.time() - 86400
+        _insert_flight_raw(test_db, icao="Y1", model="C-295[Polish Air Force]", has_location=0,
+                           last_seen=yesterday, first_seen=yesterday - 60)
+
+        data_base.archive_past_days()
+
+        conn = sqlite3.connect(test_db)
+        row = conn.execute("SELECT rarity, is_military, operator_class FROM flights_archive").fetchone()
+        ghost = conn.execute("SELECT military_ghost_found FROM daily_stats").fetchone()[0]
+        conn.close()
+        assert row == (100, 1, enrichment.OPERATOR_MILITARY)
+        assert ghost == "C-295[Polish Air Force]"
+
     def test_archive_counts(self, test_db):
         """Sprawdzenie poprawności liczników w archiwum."""
         yesterday = time.time() - 86400
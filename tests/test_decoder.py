@@ -0,0 +1,175 @@
+import pytest
+import os
+import sys
+import numpy as np
+import pyModeS as pms
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import decoder
+import signal_gen
+
+
+# ─── Helpery ───────────────────────────────────────────────────────────────────
+
+IDENT_MSG = "8D4840D6202CC371C32CE0576098"     # KLM1023
+VELOCITY_MSG = "8D485020994409940838175B284F"  # 159 kt, 182.9°
+EVEN_MSG = "8D40621D58C382D690C8AC2863A7"
+ODD_MSG = "8D40621D58C386435CC412692AD6"
+
+
+def _msg(hex_msg):
+    return decoder.Message(bytes.fromhex(hex_msg))
+
+
+def _random_positions(n, seed=2):
+    rng = np.random.default_rng(seed)
+    for _ in range(n):
+        lat, lon = rng.uniform(-85, 85), rng.uniform(-180, 180)
+        alt = int(rng.integers(-40, 2000)) * 25
+        icao = int(rng.integers(0, 2 ** 24))
+        even = signal_gen.adsb_frame(icao, signal_gen.me_position(lat, lon, alt, odd=False)).hex().upper()
+        odd = signal_gen.adsb_frame(icao, signal_gen.me_position(lat + 0.005, lon, alt, odd=True)).hex().upper()
+        yield even, odd, rng.uniform(0, 10), rng.uniform(0, 10)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#  1. Pola ramki
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class TestMessage:
+
+    def test_header_fields(self):
+        m = _msg(IDENT_MSG)
+        assert m.df == 17
+        assert m.ca == 5
+        assert m.icao == "4840D6"
+        assert m.tc == 4
+
+    def test_hex_round_trip(self):
+        assert _msg(IDENT_MSG).hex == IDENT_MSG
+
+    def test_accepts_numpy_row(self):
+        row = np.frombuffer(bytes.fromhex(VELOCITY_MSG), dtype=np.uint8)
+        assert decoder.Message(row).icao == "485020"
+
+    def test_uses_slots(self):
+        with pytest.raises(AttributeError):
+            _msg(IDENT_MSG).extra = 1
+
+    def test_callsign_and_category(self):
+        m = _msg(IDENT_MSG)
+        assert m.callsign() == pms.adsb.callsign(IDENT_MSG)
+        assert m.category() == pms.adsb.category(IDENT_MSG)
+
+    def test_altitude_and_oe(self):
+        m = _msg(EVEN_MSG)
+        assert m.altitude() == pms.adsb.altitude(EVEN_MSG)
+        assert m.oe_flag() == 0
+        assert _msg(ODD_MSG).oe_flag() == 1
+
+    def test_velocity(self):
+        assert _msg(VELOCITY_MSG).velocity() == pms.adsb.velocity(VELOCITY_MSG)
+
+    @pytest.mark.parametrize("callsign", ["LOT3KP", "RYR12AB", "W6_1234"])
+    def test_generated_callsigns(self, callsign):
+        hex_msg = signal_gen.adsb_frame(0x123456, signal_gen.me_identification(callsign)).hex()
+        assert decoder.Message(bytes.fromhex(hex_msg)).callsign() == pms.adsb.callsign(hex_msg)
+
+    @pytest.mark.parametrize("speed,heading,vrate", [(450, 10, 0), (120, 275, -1600), (900, 181, 3200), (0, 0, 0)])
+    def test_generated_velocities(self, speed, heading, vrate):
+        hex_msg = signal_gen.adsb_frame(0x123456, signal_gen.me_velocity(speed, heading, vrate)).hex()
+        assert decoder.Message(bytes.fromhex(hex_msg)).velocity() == pms.adsb.velocity(hex_msg)
+
+    def test_no_velocity_data(self):
+        hex_msg = signal_gen.adsb_frame(0x123456, (19 << 51) | (1 << 48)).hex()
+        assert decoder.Message(bytes.fromhex(hex_msg)).velocity() is None
+
+    def test_random_altitudes_match_pymodes(self):
+        """Także kod Gilla (Q = 0), który idzie przez pyModeS."""
+        rng = np.random.default_rng(9)
+        for _ in range(300):
+            frame = bytes([0x8D, 1, 2, 3, 11 << 3]) + bytes(rng.integers(0, 256, 9).astype(np.uint8))
+            assert decoder.Message(frame).altitude() == pms.adsb.altitude(frame.hex())
+
+
+class TestAc13Altitude:
+
+    @pytest.mark.parametrize("altitude", [-1000, 0, 1025, 36000, 50175])
+    def test_matches_altcode(self, altitude):
+        frame = signal_gen.df20_frame(0x4840D6, altitude)
+        assert decoder.ac13_altitude(int.from_bytes(frame, "big")) == pms.common.altcode(frame.hex()) == altitude
+
+    def test_random_fields_match_altcode(self):
+        rng = np.random.default_rng(4)
+        for _ in range(300):
+            frame = bytes([0xA0]) + bytes(rng.integers(0, 256, 13).astype(np.uint8))
+            assert decoder.ac13_altitude(int.from_bytes(frame, "big")) == pms.common.altcode(frame.hex())
+
+    def test_df21_squawk_is_not_altitude(self):
+        """W DF21 bity 20-32 to squawk - np. 0001 nie może stać się wysokością -1000 ft."""
+        frame = signal_gen.df21_frame(0x3C6586, squawk_id=0x0001)
+        assert decoder.ac13_altitude(int.from_bytes(frame, "big")) is None
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#  2. Pozycja CPR
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class TestCpr:
+
+    def test_nl_matches_pymodes(self):
+        from pyModeS.py_common import cprNL
+        for lat in np.concatenate([np.linspace(-90, 90, 20001), [0, 87, -87, 86.9999, 87.0003]]):
+            assert decoder.cpr_nl(lat) == cprNL(lat)
+
+    def test_known_pair(self):
+        pos = decoder.cpr_position(_msg(EVEN_MSG).cpr(), _msg(ODD_MSG).cpr(), 1, 0)
+        assert pos == pms.adsb.position(EVEN_MSG, ODD_MSG, 1, 0)
+        assert pos == pytest.approx((52.2572, 3.91937), abs=1e-4)
+
+    def test_random_pairs_match_pymodes(self):
+        for even, odd, t_even, t_odd in _random_positions(500):
+            pos = decoder.cpr_position(_msg(even).cpr(), _msg(odd).cpr(), t_even, t_odd)
+            assert pos == pms.adsb.position(even, odd, t_even, t_odd)
+
+    def test_zone_mismatch_returns_none(self):
+        """Para z różnych stref NL nie daje pozycji."""
+        nl_edge = decoder.NL_BOUNDARIES[0]
+        even = signal_gen.adsb_frame(1, signal_gen.me_position(nl_edge - 0.01, 10, 1000, odd=False)).hex()
+        odd = signal_gen.adsb_frame(1, signal_gen.me_position(nl_edge + 0.01, 10, 1000, odd=True)).hex()
+        assert decoder.cpr_position(_msg(even).cpr(), _msg(odd).cpr(), 0, 1) is None
+        assert pms.adsb.position(even, odd, 0, 1) is None
+
+
+class TestCprLocal:
+
+    @pytest.mark.parametrize("odd", [0, 1])
+    def test_matches_pair_decoder(self, odd):
+        """Dekodowanie lokalne ostatniej ramki pary daje tę samą pozycję co para even/odd."""
+        rng = np.random.default_rng(odd)
+        for even, odd_msg, _, _ in _random_positions(300, seed=odd + 5):
+            t_even, t_odd = (0, 1) if odd else (1, 0)
+            pair = pms.adsb.position(even, odd_msg, t_even, t_odd)
+            if pair is None:
+                continue
+            latest = odd_msg if odd else even
+            ref = (pair[0] + rng.uniform(-1, 1), pair[1] + rng.uniform(-1, 1))
+            lat, lon = decoder.cpr_local(_msg(latest).cpr(), odd, ref[0], ref[1])
+            assert lat == pytest.approx(pair[0], abs=1e-9)
+            assert (lon - pair[1] + 180) % 360 - 180 == pytest.approx(0, abs=1e-9)
+
+    def test_known_message(self):
+        """Przykład z dokumentacji pyModeS (position_with_ref)."""
+        pos = decoder.cpr_local(_msg(EVEN_MSG).cpr(), 0, 52.258, 3.918)
+        assert pos == pytest.approx(pms.adsb.position_with_ref(EVEN_MSG, 52.258, 3.918), abs=1e-9)
+
+    def test_wrong_reference_gives_wrong_position(self):
+        """Odniesienie dalej niż pół strefy - wynik jest przesunięty (stąd limit wieku odniesienia)."""
+        lat, lon = decoder.cpr_local(_msg(EVEN_MSG).cpr(), 0, 52.258 + 4.0, 3.918)
+        assert abs(lat - 52.2572) > 1
+
+    def test_longitude_wraps(self):
+        hex_msg = signal_gen.adsb_frame(1, signal_gen.me_position(10.0, 179.99, 1000, odd=False)).hex()
+        lat, lon = decoder.cpr_local(decoder.Message(bytes.fromhex(hex_msg)).cpr(), 0, 10.0, -179.9)
+        assert lat == pytest.approx(10.0, abs=1e-3)
+        assert lon == pytest.approx(179.99, abs=1e-3)
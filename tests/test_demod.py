@@ -0,0 +1,485 @@
+import pytest
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import demod
+
+
+# ─── Helpery ───────────────────────────────────────────────────────────────────
+
+DF17_MSG = "8D40621D58C382D690C8AC2863A7"
+
+
+def _frame_signal(hex_msg, high=10.0, low=0.5):
+    """Buduje amplitudę jednej ramki (preambuła + 112 bitów PPM)."""
+    bits = bin(int(hex_msg, 16))[2:].zfill(len(hex_msg) * 4).ljust(112, "0")
+    preamble = np.full(demod.PREAMBLE_SAMPLES, low)
+    preamble[[0, 2, 7, 9]] = high
+    data = []
+    for b in bits:
+        data.extend([high, low] if b == "1" else [low, high])
+    return np.concatenate([preamble, np.array(data)])
+
+
+def _block(messages, length=4096, spacing=600, noise=1.0, seed=1):
+    """Blok szumu z ramkami wstawionymi co `spacing` próbek. Zwraca (mag, offsety)."""
+    rng = np.random.default_rng(seed)
+    mag = rng.uniform(0.1, noise, length)
+    offsets = []
+    for i, msg in enumerate(messages):
+        start = 100 + i * spacing
+        sig = _frame_signal(msg)
+        mag[start:start + len(sig)] = sig
+        offsets.append(start)
+    return mag, offsets
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#  1. Detekcja i wycinanie ramek
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class TestSliceFrames:
+
+    def test_single_frame_round_trip(self):
+        mag, offsets = _block([DF17_MSG])
+        found, frames = demod.demodulate(mag)
+        assert offsets[0] in found
+        hexes = [demod.frame_hex(f) for f in frames]
+        assert DF17_MSG in hexes
+
+    def test_frame_matrix_shape_and_dtype(self):
+        mag, _ = _block([DF17_MSG, DF17_MSG])
+        _, frames = demod.demodulate(mag)
+        assert frames.dtype == np.uint8
+        assert frames.shape[1] == demod.FRAME_BYTES
+
+    def test_multiple_frames_in_order(self):
+        mag, offsets = _block([DF17_MSG, "8D4840D6202CC371C32CE0576098"])
+        found, frames = demod.demodulate(mag)
+        hexes = [demod.frame_hex(f) for f in frames]
+        assert hexes.index(DF17_MSG) < hexes.index("8D4840D6202CC371C32CE0576098")
+
+    def test_frame_not_fitting_in_block_is_skipped(self):
+        sig = _frame_signal(DF17_MSG)
+        mag = np.concatenate([np.full(50, 0.5), sig[:-10]])
+        found, frames = demod.demodulate(mag)
+        assert len(frames) == 0
+
+    def test_empty_hits(self):
+        offsets, frames = demod.slice_frames(np.ones(1000), np.array([], dtype=np.int64))
+        assert len(offsets) == 0
+        assert frames.shape == (0, demod.FRAME_BYTES)
+
+    def test_matches_bit_string_reference(self):
+        """Wynik packbits zgadza się z dawną konwersją bit-string -> HEX."""
+        mag, offsets = _block([DF17_MSG])
+        idx = offsets[0]
+        data = mag[idx + 16: idx + 240].reshape(112, 2)
+        bits = "".join("1" if b else "0" for b in data[:, 0] > data[:, 1])
+        reference = "{:028X}".format(int(bits, 2))
+        _, frames = demod.slice_frames(mag, np.array([idx]))
+        assert demod.frame_hex(frames[0]) == reference
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#  2. Filtr DF na macierzy bajtów
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class TestDfFilter:
+
+    def _frames(self, first_bytes):
+        frames = np.zeros((len(first_bytes), demod.FRAME_BYTES), dtype=np.uint8)
+        frames[:, 0] = first_bytes
+        return frames
+
+    def test_accepts_df17_and_df18(self):
+        mask = demod.df_filter(self._frames([0x8D, 0x90, 0x91, 0x92]))
+        assert mask.all()
+
+    def test_accepts_df11(self):
+        assert demod.df_filter(self._frames([0x5D])).all()
+
+    def test_accepts_comm_b_range(self):
+        mask = demod.df_filter(self._frames([0xA0, 0xA8, 0xBF]))
+        assert mask.all()
+
+    def test_rejects_other_formats(self):
+        mask = demod.df_filter(self._frames([0x00, 0x8C, 0x93, 0x5C, 0x9F, 0xC0, 0xFF]))
+        assert not mask.any()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#  3. CRC-24 i naprawa pojedynczych bitów
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _matrix(messages):
+    """Macierz ramek (n, 14) z listy HEX (krótkie ramki dopełniane zerami)."""
+    return np.array([list(bytes.fromhex(m.ljust(28, "0"))) for m in messages], dtype=np.uint8)
+
+
+class TestCrcSyndromes:
+
+    def test_valid_df17_frames_have_zero_syndrome(self):
+        frames = _matrix([DF17_MSG, "8D4840D6202CC371C32CE0576098", "8D485020994409940838175B284F"])
+        assert list(demod.crc_syndromes(frames)) == [0, 0, 0]
+
+    def test_corrupted_frame_has_nonzero_syndrome(self):
+        frames = _matrix([DF17_MSG])
+        frames[0, 5] ^= 0x01
+        assert demod.crc_syndromes(frames)[0] != 0
+
+    def test_df11_uses_short_frame(self):
+        """DF11 to ramka 56-bitowa — śmieci za nią nie wpływają na CRC."""
+        frames = _matrix(["5D4840D6E0BD5E"])
+        frames[0, 7:] = 0xAB
+        assert demod.crc_syndromes(frames)[0] == demod.crc_syndromes(_matrix(["5D4840D6E0BD5E"]))[0]
+
+    def test_df20_syndrome_is_address(self):
+        """Dla DF20 syndrom to adres ICAO z pola AP (tak samo jak pms.crc)."""
+        frames = _matrix(["A0001838CA3E51F0A8000047A36A"])
+        assert demod.crc_syndromes(frames)[0] == 15688013
+
+    def test_empty_matrix(self):
+        assert len(demod.crc_syndromes(np.empty((0, 14), dtype=np.uint8))) == 0
+
+    def test_table_matches_bitwise_crc(self):
+        """Wersja tablicowa zgadza się z klasycznym dzieleniem bit po bicie."""
+        generator = "1111111111111010000001001"
+        for msg in [DF17_MSG, "8D4840D6202CC371C32CE0576098", "A0001838CA3E51F0A8000047A36A"]:
+            bits = list(bin(int(msg, 16))[2:].zfill(112))
+            for i in range(88):
+                if bits[i] == "1":
+                    for j in range(25):
+                        bits[i + j] = "0" if bits[i + j] == generator[j] else "1"
+            expected = int("".join(bits[-24:]), 2)
+            assert demod.crc_syndromes(_matrix([msg]))[0] == expected
+
+
+class TestFixSingleBitErrors:
+
+    @pytest.mark.parametrize("bit", [5, 8, 40, 87, 88, 111])
+    def test_repairs_any_single_bit(self, bit):
+        original = _matrix([DF17_MSG])
+        frames = original.copy()
+        frames[0, bit // 8] ^= 0x80 >> (bit % 8)
+        syndromes = demod.crc_syndromes(frames)
+        fixed = demod.fix_single_bit_errors(frames, syndromes)
+        assert fixed[0]
+        assert syndromes[0] == 0
+        assert (frames == original).all()
+
+    def test_valid_frames_untouched(self):
+        frames = _matrix([DF17_MSG])
+        syndromes = demod.crc_syndromes(frames)
+        assert not demod.fix_single_bit_errors(frames, syndromes).any()
+
+    def test_two_bit_errors_not_repaired(self):
+        frames = _matrix([DF17_MSG])
+        frames[0, 6] ^= 0x81
+        syndromes = demod.crc_syndromes(frames)
+        before = frames.copy()
+        fixed = demod.fix_single_bit_errors(frames, syndromes)
+        assert not fixed[0]
+        assert (frames == before).all()
+        assert syndromes[0] != 0
+
+    def test_only_df17_df18_are_repaired(self):
+        frames = _matrix(["A0001838CA3E51F0A8000047A36A"])
+        frames[0, 5] ^= 0x10
+        syndromes = demod.crc_syndromes(frames)
+        assert not demod.fix_single_bit_errors(frames, syndromes).any()
+
+    def test_mixed_matrix(self):
+        original = _matrix([DF17_MSG, "8D4840D6202CC371C32CE0576098", "8D485020994409940838175B284F"])
+        frames = original.copy()
+        frames[0, 9] ^= 0x04
+        frames[2, 13] ^= 0x01
+        syndromes = demod.crc_syndromes(frames)
+        fixed = demod.fix_single_bit_errors(frames, syndromes)
+        assert list(fixed) == [True, False, True]
+        assert (frames == original).all()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#  4. Demodulator strumienia — ramki na granicy bloków
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _to_iq(mag):
+    """Amplituda -> surowe bajty IQ jak z RTL-SDR (I niesie sygnał, Q stałe w środku zakresu)."""
+    raw = np.empty(len(mag) * 2, dtype=np.uint8)
+    raw[0::2] = np.clip(np.round(128 + mag * 12), 0, 255)
+    raw[1::2] = 128
+    return raw
+
+
+def _hexes(frames, syndromes):
+    return [demod.frame_hex(f) for f, s in zip(frames, syndromes) if s == 0]
+
+
+class TestDemodulatorStream:
+
+    def _stream(self, split):
+        """Strumień z jedną ramką DF17, pocięty na dwa bloki w punkcie `split`."""
+        mag, offsets = _block([DF17_MSG], length=2000)
+        raw = _to_iq(mag)
+        return raw[:2 * split], raw[2 * split:], offsets[0]
+
+    @pytest.mark.parametrize("cut", [1, 17, 120, 239])
+    def test_frame_across_boundary_is_recovered(self, cut):
+        first, second, start = self._stream(split=100 + cut)
+        d = demod.Demodulator(2000)
+        found = []
+        for block in (first, second):
+            _, frames, syndromes = d.feed(block)
+            found.extend(_hexes(frames, syndromes))
+        assert found == [DF17_MSG]
+        assert d.stats()["boundary_frames"] == 1
+
+    def test_frame_fully_in_block_not_duplicated(self):
+        """Ramka kończąca się dokładnie na końcu bloku jest dekodowana tylko raz."""
+        first, second, start = self._stream(split=100 + demod.FRAME_SAMPLES)
+        d = demod.Demodulator(2000)
+        found = []
+        for block in (first, second):
+            _, frames, syndromes = d.feed(block)
+            found.extend(_hexes(frames, syndromes))
+        assert found == [DF17_MSG]
+        assert d.stats()["boundary_frames"] == 0
+
+    def test_without_carry_over_frame_is_lost(self):
+        first, second, start = self._stream(split=220)
+        found = []
+        for block in (first, second):
+            _, frames = demod.demodulate(demod.iq_magnitude(block))
+            found.extend(demod.frame_hex(f) for f in frames)
+        assert DF17_MSG not in found
+
+    def test_work_buffer_reused(self):
+        d = demod.Demodulator(1000)
+        buffer = d.work
+        d.feed(np.full(2000, 130, dtype=np.uint8))
+        d.feed(np.full(2000, 130, dtype=np.uint8))
+        assert d.work is buffer
+
+    def test_larger_block_grows_buffer(self):
+        mag, _ = _block([DF17_MSG], length=3000)
+        d = demod.Demodulator(500)
+        _, frames, syndromes = d.feed(_to_iq(mag))
+        assert _hexes(frames, syndromes) == [DF17_MSG]
+
+    def test_stats_count_valid_and_corrected(self):
+        mag, _ = _block([DF17_MSG, "8D4840D6202CC371C32CE0576098"])
+        # Przekłamanie jednego bitu danych drugiej ramki (zamiana połówek pary)
+        bit_start = 100 + 600 + 16 + 2 * 60
+        mag[bit_start], mag[bit_start + 1] = mag[bit_start + 1], mag[bit_start]
+        d = demod.Demodulator(len(mag))
+        d.feed(_to_iq(mag))
+        stats = d.stats()
+        assert stats["frames"] == 2
+        assert stats["corrected"] == 1
+        assert stats["blocks"] == 1
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#  5. Ścieżka uint8 IQ z tablicą amplitud
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class TestMagnitudeLut:
+
+    def test_lut_size_and_dtype(self):
+        assert demod.MAG_LUT.shape == (65536,)
+        assert demod.MAG_LUT.dtype == np.uint16
+
+    def test_lut_matches_complex_abs(self):
+        rng = np.random.default_rng(3)
+        raw = rng.integers(0, 256, 2000, dtype=np.uint8)
+        iq = raw.astype(np.float64) - 127.5
+        expected = np.abs(iq[0::2] + 1j * iq[1::2]) / (127.5 * np.sqrt(2)) * 65535
+        assert np.allclose(demod.iq_magnitude(raw), expected, atol=1)
+
+    def test_i_is_low_byte(self):
+        raw = np.array([255, 128], dtype=np.uint8)
+        assert demod.iq_magnitude(raw)[0] > 30000
+
+    def test_extremes(self):
+        raw = np.array([0, 0, 255, 255], dtype=np.uint8)
+        mag = demod.iq_magnitude(raw)
+        assert mag[0] == 65535
+        assert mag[1] == 65535
+
+    def test_output_buffer_is_reused(self):
+        out = np.empty(3, dtype=np.uint16)
+        result = demod.iq_magnitude(np.full(6, 200, dtype=np.uint8), out=out)
+        assert result is out
+
+    def test_detection_on_uint16(self):
+        mag, offsets = _block([DF17_MSG])
+        found, frames = demod.demodulate(demod.iq_magnitude(_to_iq(mag)))
+        assert DF17_MSG in [demod.frame_hex(f) for f in frames]
+
+
+class TestNoiseLevel:
+
+    def test_median_of_constant(self):
+        assert demod.noise_level(np.full(1000, 7, dtype=np.uint16)) == 7
+
+    def test_close_to_full_median(self):
+        rng = np.random.default_rng(5)
+        mag = rng.rayleigh(1000, 100000).astype(np.uint16)
+        assert demod.noise_level(mag) == pytest.approx(np.median(mag), rel=0.02)
+
+    def test_scratch_does_not_modify_input(self):
+        mag = np.arange(100, 0, -1).astype(np.uint16)
+        before = mag.copy()
+        scratch = np.empty(100, dtype=np.uint16)
+        demod.noise_level(mag, scratch)
+        assert (mag == before).all()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#  6. Wybór najlepszego trafienia z grupy i pomijanie wnętrza poprawnych ramek
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _generated(seconds=0.3):
+    """Sygnał z generatora: ramki przesunięte o ułamek próbki, bez kolizji."""
+    import signal_gen
+    raw, truth, _ = signal_gen.generate(20, seconds, snr_db=30, overlap=0, seed=4)
+    return raw, truth
+
+
+class TestSuppressNeighbours:
+
+    def test_keeps_best_in_group(self):
+        mag = np.zeros(100)
+        mag[[10, 12, 17, 19]] = 5.0 #słaba preambuła w 10
+        mag[[11, 13, 18, 20]] = 9.0 #mocniejsza w 11
+        kept = demod.suppress_neighbours(mag, np.array([10, 11]))
+        assert list(kept) == [11]
+
+    def test_far_hits_untouched(self):
+        mag = np.zeros(200)
+        hits = np.array([10, 50, 120])
+        assert list(demod.suppress_neighbours(mag, hits)) == [10, 50, 120]
+
+    def test_separate_groups(self):
+        mag = np.zeros(200)
+        mag[[10, 12, 17, 19, 101, 103, 108, 110]] = 9.0
+        kept = demod.suppress_neighbours(mag, np.array([10, 11, 12, 100, 101, 150]))
+        assert list(kept) == [10, 101, 150]
+
+    def test_each_frame_decoded_once(self):
+        """Żadna nadana ramka nie wychodzi z demodulatora dwa razy (np. z offsetem przesuniętym o próbkę)."""
+        raw, truth = _generated()
+        d = demod.Demodulator(len(raw) // 2)
+        offsets, frames, syndromes = d.feed(raw)
+        valid = syndromes == 0
+        offsets, frames = offsets[valid], frames[valid]
+        assert len(offsets) > len(truth) // 2
+        for a, b in zip(range(len(offsets)), range(1, len(offsets))):
+            if offsets[b] - offsets[a] < demod.FRAME_SAMPLES:
+                assert frames[a].tobytes() != frames[b].tobytes()
+
+
+class TestSkipInsideFrames:
+
+    def _frames(self, first_bytes):
+        frames = np.zeros((len(first_bytes), demod.FRAME_BYTES), dtype=np.uint8)
+        frames[:, 0] = first_bytes
+        return frames
+
+    def test_invalid_hits_inside_valid_frame_skipped(self):
+        offsets = np.array([100, 150, 339, 340])
+        keep = demod.skip_inside_frames(offsets, self._frames([0x8D] * 4), np.array([0, 5, 7, 9], dtype=np.uint32))
+        assert list(keep) == [True, False, False, True]
+
+    def test_short_frame_covers_fewer_samples(self):
+        offsets = np.array([100, 100 + demod.SHORT_FRAME_SAMPLES + 1])
+        keep = demod.skip_inside_frames(offsets, self._frames([0x5D, 0x8D]), np.array([0, 5], dtype=np.uint32))
+        assert keep.all()
+
+    def test_colliding_valid_frame_kept(self):
+        """Druga poprawna ramka w środku pierwszej (kolizja) nie jest pomijana."""
+        offsets = np.array([100, 180])
+        keep = demod.skip_inside_frames(offsets, self._frames([0x8D, 0x8D]), np.zeros(2, dtype=np.uint32))
+        assert keep.all()
+
+    def test_shifted_duplicate_dropped(self):
+        offsets = np.array([100, 101])
+        keep = demod.skip_inside_frames(offsets, self._frames([0x8D, 0x8D]), np.zeros(2, dtype=np.uint32))
+        assert list(keep) == [True, False]
+
+    def test_previous_block_frame(self):
+        offsets = np.array([5, 300])
+        keep = demod.skip_inside_frames(offsets, self._frames([0x8D, 0x8D]), np.array([1, 1], dtype=np.uint32),
+                                        previous=(-100, demod.FRAME_SAMPLES))
+        assert list(keep) == [False, True]
+
+    def test_no_valid_frames(self):
+        keep = demod.skip_inside_frames(np.array([1, 2]), self._frames([0x8D, 0x8D]), np.ones(2, dtype=np.uint32))
+        assert keep.all()
+
+    def test_skipped_hits_not_corrected(self):
+        """Trafienie w bitach danych poprawnej ramki nie przechodzi do naprawy 1-bitowej."""
+        mag, _ = _block([DF17_MSG], length=2000)
+        d = demod.Demodulator(len(mag))
+        offsets, frames, syndromes = d.feed(_to_iq(mag))
+        start = offsets[syndromes == 0][0]
+        assert not ((offsets > start) & (offsets < start + demod.FRAME_SAMPLES)).any()
+
+    def test_stats_report_savings(self):
+        raw, _ = _generated()
+        d = demod.Demodulator(len(raw) // 2)
+        d.feed(raw)
+        stats = d.stats()
+        assert stats["suppressed"] > 0
+        assert stats["skipped"] > 0
+        assert stats["last_block_saved"] == stats["suppressed"] + stats["skipped"]
+        assert stats["candidates"] >= stats["suppressed"] + stats["skipped"] + stats["frames"]
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#  7. Pamięć powtórzonych ramek
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class TestFrameDedup:
+
+    def test_first_is_miss_then_hit(self):
+        dedup = demod.FrameDedup(window=1.0)
+        assert not dedup.check(b"abc", 100.0)
+        assert dedup.check(b"abc", 100.5)
+        assert dedup.stats()["hits"] == 1
+        assert dedup.stats()["misses"] == 1
+
+    def test_expires_after_window(self):
+        dedup = demod.FrameDedup(window=1.0)
+        dedup.check(b"abc", 100.0)
+        assert not dedup.check(b"abc", 101.5)
+
+    def test_hit_does_not_extend_window(self):
+        """Ta sama ramka jest dekodowana ponownie co najmniej raz na okno."""
+        dedup = demod.FrameDedup(window=1.0)
+        dedup.check(b"abc", 100.0)
+        dedup.check(b"abc", 100.8)
+        assert not dedup.check(b"abc", 101.2)
+
+    def test_different_frames_independent(self):
+        dedup = demod.FrameDedup()
+        assert not dedup.check(b"a", 0.0)
+        assert not dedup.check(b"b", 0.0)
+
+    def test_capacity_evicts_oldest(self):
+        dedup = demod.FrameDedup(window=10.0, capacity=2)
+        for key in (b"a", b"b", b"c"):
+            dedup.check(key, 0.0)
+        stats = dedup.stats()
+        assert stats["size"] == 2
+        assert stats["evicted"] == 1
+        assert not dedup.check(b"a", 0.0)
+
+    def test_old_entries_removed(self):
+        dedup = demod.FrameDedup(window=1.0)
+        for i in range(100):
+            dedup.check(bytes([i]), float(i))
+        assert dedup.stats()["size"] <= 2
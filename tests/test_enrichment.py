@@ -0,0 +1,35 @@
+import pytest
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import enrichment
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#  1. Cechy opisu modelu
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class TestEnrich:
+
+    @pytest.mark.parametrize("model,expected", [
+        ("Lockheed C-130E[Polish Air Force]", (100, True, enrichment.OPERATOR_MILITARY)),
+        ("Boeing P-8A[US Navy]", (100, True, enrichment.OPERATOR_MILITARY)),
+        ("Eurocopter EC 135[LPR]", (100, False, enrichment.OPERATOR_STATE)),
+        ("Boeing 737-8AS[Ryanair]", (0, False, enrichment.OPERATOR_AIRLINE)),
+        ("Cessna 172S", (50, False, enrichment.OPERATOR_PRIVATE)),
+        ("Cessna 172S[Aeroklub Poznański]", (50, False, enrichment.OPERATOR_AIRLINE)),
+        ("Saab 340", (10, False, enrichment.OPERATOR_UNKNOWN)),
+    ])
+    def test_enrich(self, model, expected):
+        assert enrichment.enrich(model) == expected
+
+    def test_army_is_military_but_not_vip(self):
+        """Army liczy się do duchów wojskowych, ale punkty rzadkości są jak dotąd."""
+        assert enrichment.enrich("Sikorsky UH-60[US Army]") == (10, True, enrichment.OPERATOR_MILITARY)
+
+    def test_missing_model(self):
+        assert enrichment.enrich(None) == (10, False, enrichment.OPERATOR_UNKNOWN)
+
+    def test_case_insensitive(self):
+        assert enrichment.enrich("nato e-3") == enrichment.enrich("NATO E-3")
@@ -0,0 +1,263 @@
+import pytest
+import os
+import sys
+import sqlite3
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import data_base
+import flight_writer
+import main
+
+
+# ─── Fixture i helpery ─────────────────────────────────────────────────────────
+
+@pytest.fixture(autouse=True)
+def test_db(tmp_path):
+    """Przekierowuje bazę na tymczasowy plik przed każdym testem."""
+    db_path = str(tmp_path / "test_radar.db")
+    data_base.DB_NAME = db_path
+    data_base.init_db()
+    yield db_path
+
+
+def _flight(icao="ABC123", duration=60, last_seen=None):
+    last_seen = last_seen or time.time()
+    return {"icao": icao, "callsign": "LOT1", "model": "Boeing 737", "min_dist": 20.0,
+            "max_dist": 40.0, "speed": 800, "max_speed": 850, "category": 3,
+            "first_seen": last_seen - duration, "last_seen": last_seen,
+            "route": [[52.0, 17.0], [52.1, 17.1]]}
+
+
+def _count(db_path):
+    conn = sqlite3.connect(db_path)
+    n = conn.execute("SELECT COUNT(*) FROM historia").fetchone()[0]
+    conn.close()
+    return n
+
+
+class SlowSave:
+    """Zapis blokowany do czasu release - do sprawdzania kolejki i paczek."""
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.batches = []
+
+    def __call__(self, planes):
+        self.gate.wait(2)
+        self.batches.append([p["icao"] for p in planes])
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#  1. FlightWriter
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class TestFlightWriter:
+
+    def test_flush_writes_to_database(self, test_db):
+        writer = flight_writer.FlightWriter()
+        writer.start()
+        for i in range(5):
+            writer.submit(_flight(f"A{i}"))
+        writer.flush()
+        assert _count(test_db) == 5
+        assert writer.stats()["saved"] == 5
+        writer.close()
+
+    def test_backlog_is_written_in_batches(self):
+        save = SlowSave()
+        writer = flight_writer.FlightWriter(save_many=save, batch_size=10)
+        writer.start()
+        writer.submit(_flight("A0"))
+        time.sleep(0.05) #wątek zapisu czeka w pierwszej paczce
+        for i in range(1, 21):
+            writer.submit(_flight(f"A{i}"))
+        save.gate.set()
+        writer.close()
+        assert [len(b) for b in save.batches] == [1, 10, 10]
+        assert [icao for b in save.batches for icao in b] == [f"A{i}" for i in range(21)]
+
+    def test_close_writes_pending(self, test_db):
+        writer = flight_writer.FlightWriter()
+        writer.start()
+        for i in range(3):
+            writer.submit(_flight(f"A{i}"))
+        writer.close()
+        assert not writer.is_alive()
+        assert _count(test_db) == 3
+        writer.close() #ponowne zamknięcie nic nie robi
+
+    def test_submit_after_close_is_written(self, test_db):
+        """Lot oddany po close() nie czeka za _STOP - jest zapisywany od razu."""
+        writer = flight_writer.FlightWriter()
+        writer.start()
+        writer.close()
+        writer.submit(_flight("LATE"))
+        assert _count(test_db) == 1
+        assert writer.stats()["saved"] == 1
+
+    def test_submit_racing_close_saved_once(self):
+        saved = []
+        writer = flight_writer.FlightWriter(save_many=lambda planes: saved.extend(p["icao"] for p in planes))
+        writer.start()
+        started = threading.Event()
+
+        def producer():
+            for i in range(500):
+                writer.submit(_flight(f"A{i}"))
+                started.set()
+
+        thread = threading.Thread(target=producer)
+        thread.start()
+        started.wait(2)
+        writer.close()
+        thread.join()
+        assert sorted(saved) == sorted(f"A{i}" for i in range(500))
+
+    def test_same_plane_twice_in_batch_is_merged(self, test_db):
+        now = time.time()
+        data_base.save_flights([_flight(last_seen=now - 200, duration=100), _flight(last_seen=now)])
+        assert _count(test_db) == 1
+
+    def test_failed_batch_retried_one_by_one(self):
+        saved = []
+
+        def save_many(planes):
+            if len(planes) > 1 or planes[0]["icao"] == "BAD":
+                raise sqlite3.OperationalError("database is locked")
+            saved.extend(planes)
+
+        writer = flight_writer.FlightWriter(save_many=save_many)
+        for icao in ("A1", "BAD", "A2"):
+            writer.submit(_flight(icao))
+        writer.start()
+        writer.close()
+        assert [p["icao"] for p in saved] == ["A1", "A2"]
+        stats = writer.stats()
+        assert stats["errors"] == 1
+        assert stats["saved"] == 2
+
+    def test_queue_is_bounded(self):
+        writer = flight_writer.FlightWriter(maxsize=2)
+        writer.submit(_flight("A1"))
+        writer.submit(_flight("A2"))
+        assert writer.queue.full()
+
+    def test_on_saved_after_batch(self):
+        saved = []
+        writer = flight_writer.FlightWriter(save_many=lambda planes: None,
+                                            on_saved=lambda planes: saved.append([p["icao"] for p in planes]))
+        writer.submit(_flight("A1"))
+        writer.submit(_flight("A2"))
+        writer.start()
+        writer.close()
+        assert saved == [["A1", "A2"]]
+
+    def test_on_saved_error_does_not_stop_writer(self):
+        def on_saved(planes):
+            raise RuntimeError("brak bazy statystyk")
+
+        writer = flight_writer.FlightWriter(save_many=lambda planes: None, on_saved=on_saved)
+        writer.start()
+        writer.submit(_flight("A1"))
+        writer.flush()
+        assert writer.is_alive()
+        assert writer.stats()["saved"] == 1
+        writer.close()
+
+    def test_stats_latency(self):
+        save = SlowSave()
+        save.gate.set()
+        writer = flight_writer.FlightWriter(save_many=save)
+        writer.start()
+        writer.submit(_flight())
+        writer.close()
+        stats = writer.stats()
+        assert stats["batches"] == 1
+        assert stats["queued"] == 0
+        assert stats["max_queued"] >= 1
+        assert stats["latency_ms_max"] >= 0
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#  2. Cleaner i zamykanie programu
+# ═══════════════════════════════════════════════════════════════════════════════
+
+@pytest.fixture
+def state():
+    main.planes.clear()
+    main.cpr_buffer.clear()
+    writer = flight_writer.FlightWriter()
+    writer.start()
+    original = main.db_writer
+    main.db_writer = writer
+    main.cleanup_done = False
+    yield writer
+    writer.close()
+    main.db_writer = original
+    main.planes.clear()
+    main.cpr_buffer.clear()
+
+
+class TestExpirePlanes:
+
+    def test_expired_plane_saved_in_background(self, state, test_db):
+        now = time.time()
+        main.actualize_plane("OLD001", {"callsign": "LOT1"})
+        main.planes["OLD001"].first_seen = now - 300
+        main.actualize_plane("NEW001", {"callsign": "LOT2"})
+        later = now + main.PLANE_TIMEOUT + 1
+        main.planes["NEW001"].last_seen = later - 10 #odbierany dalej
+        assert main.expire_planes(later) == 1
+        assert list(main.planes) == ["NEW001"]
+        state.flush()
+        assert _count(test_db) == 1
+
+    def test_lock_not_held_during_write(self, state):
+        """Zapis stoi na bazie - blokada stanu i tak jest od razu wolna."""
+        save = SlowSave()
+        state.save_many = save
+        main.actualize_plane("OLD001", {})
+        start = time.perf_counter()
+        main.expire_planes(time.time() + main.PLANE_TIMEOUT + 1)
+        assert time.perf_counter() - start < 0.5
+        assert save.batches == [] #zapis jeszcze trwa, a samolot już wyjęty ze stanu
+        assert "OLD001" not in main.planes
+        save.gate.set()
+
+    def test_cleanup_on_exit_flushes_queue_and_active(self, state, test_db):
+        now = time.time()
+        state.submit(_flight("QUEUED", last_seen=now))
+        main.actualize_plane("ACTIVE", {"callsign": "LOT2"})
+        main.planes["ACTIVE"].first_seen = now - 60
+        main.cleanup_on_exit()
+        assert not state.is_alive()
+        assert _count(test_db) == 2
+
+    def test_plane_not_saved_twice_after_cleanup(self, state, test_db):
+        """Cleaner działający w trakcie zamykania nie zapisuje już zapisanego samolotu drugi raz."""
+        now = time.time()
+        main.actualize_plane("ACTIVE", {"callsign": "LOT2"})
+        main.planes["ACTIVE"].first_seen = now - 60
+        main.planes["ACTIVE"].add_point(52.0, 17.0, now)
+        main.cleanup_on_exit()
+        assert main.expire_planes(now + main.PLANE_TIMEOUT + 1) == 0
+        conn = sqlite3.connect(test_db)
+        rows = conn.execute("SELECT route FROM historia").fetchall()
+        conn.close()
+        assert rows == [("[[52.0, 17.0]]",)]
+
+    def test_cleanup_without_writer_thread(self, test_db):
+        main.planes.clear()
+        main.cleanup_done = False
+        original = main.db_writer
+        main.db_writer = flight_writer.FlightWriter() #nieuruchomiony (np. tryb bez bazy)
+        try:
+            main.actualize_plane("ACTIVE", {})
+            main.planes["ACTIVE"].first_seen = time.time() - 60
+            main.cleanup_on_exit()
+            assert _count(test_db) == 1
+        finally:
+            main.db_writer = original
+            main.planes.clear()
@@ -0,0 +1,130 @@
+import pytest
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import demod
+import parallel_demod
+import signal_gen
+
+
+# ─── Helpery ───────────────────────────────────────────────────────────────────
+
+def _run(d, raw, block_bytes):
+    """Przepuszcza strumień blokami, zwraca (globalne offsety, ramki, syndromy)."""
+    offsets, frames, syndromes = [], [], []
+    for pos in range(0, len(raw), block_bytes):
+        o, f, s = d.feed(raw[pos:pos + block_bytes])
+        offsets.append(o + pos // 2 - demod.TAIL_SAMPLES)
+        frames.append(f)
+        syndromes.append(s)
+    return np.concatenate(offsets), np.concatenate(frames), np.concatenate(syndromes)
+
+
+@pytest.fixture(scope="module")
+def capture():
+    raw, truth, _ = signal_gen.generate(20, 0.5, snr_db=(10, 25), overlap=0.02, seed=3)
+    return raw, truth
+
+
+@pytest.fixture
+def parallel():
+    created = []
+
+    def make(block_size, workers):
+        d = parallel_demod.ParallelDemodulator(block_size, workers)
+        created.append(d)
+        return d
+
+    yield make
+    for d in created:
+        d.close()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#  1. Zgodność z demodulatorem jednowątkowym
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class TestParallelDemodulator:
+
+    @pytest.mark.parametrize("workers", [2, 3])
+    def test_same_frames_as_serial(self, capture, parallel, workers):
+        """Te same ramki, w tej samej kolejności i z tymi samymi offsetami."""
+        raw, _ = capture
+        block = 2 * 100000
+        expected = _run(demod.Demodulator(block // 2), raw, block)
+        got = _run(parallel(block // 2, workers), raw, block)
+        assert len(expected[0]) > 0
+        for e, g in zip(expected, got):
+            assert (e == g).all()
+
+    def test_frames_in_order(self, capture, parallel):
+        raw, _ = capture
+        offsets, _, _ = _run(parallel(100000, 3), raw, 2 * 100000)
+        assert (np.diff(offsets) >= 0).all()
+
+    @pytest.mark.parametrize("shift", [-100, -1, 0, 1, 100])
+    def test_frame_on_chunk_border_decoded_once(self, parallel, shift):
+        """Ramka zaczynająca się przy granicy fragmentów dwóch procesów nie ginie i nie dubluje się."""
+        frame = signal_gen.adsb_frame(0x4840D6, signal_gen.me_identification("LOT123"))
+        n = 4000
+        mag = np.full(n + demod.TAIL_SAMPLES, 0.3)
+        #Pierwszy blok nie ma ogona - dwa fragmenty po n / 2 próbek zaczynają się od TAIL_SAMPLES
+        start = demod.TAIL_SAMPLES + n // 2 + shift
+        mag[start:start + demod.FRAME_SAMPLES] += signal_gen.frame_waveform(frame) * 10
+        raw = np.empty(2 * len(mag), dtype=np.uint8)
+        raw[0::2] = np.round(128 + mag * 10)
+        raw[1::2] = 128
+        d = parallel(len(mag), 2)
+        _, frames, syndromes = d.feed(raw)
+        found = [f.tobytes() for f, s in zip(frames, syndromes) if s == 0]
+        assert found == [frame]
+
+    def test_frame_across_block_boundary(self, parallel):
+        frame = signal_gen.adsb_frame(0x4840D6, signal_gen.me_velocity(250, 90))
+        mag = np.full(3000, 0.3)
+        mag[1400:1400 + demod.FRAME_SAMPLES] += signal_gen.frame_waveform(frame) * 10
+        raw = np.empty(2 * len(mag), dtype=np.uint8)
+        raw[0::2] = np.round(128 + mag * 10)
+        raw[1::2] = 128
+        d = parallel(1500, 2)
+        _, frames, syndromes = _run(d, raw, 2 * 1500)
+        assert [f.tobytes() for f, s in zip(frames, syndromes) if s == 0] == [frame]
+        assert d.stats()["boundary_frames"] == 1
+
+    def test_larger_block_recreates_buffer(self, capture, parallel):
+        raw, _ = capture
+        d = parallel(1000, 2)
+        old = d.shm.name
+        offsets, _, _ = _run(d, raw, 2 * 100000)
+        assert d.shm.name != old
+        expected, _, _ = _run(demod.Demodulator(100000), raw, 2 * 100000)
+        assert (offsets == expected).all()
+
+    def test_stats(self, capture, parallel):
+        raw, _ = capture
+        serial = demod.Demodulator(100000)
+        d = parallel(100000, 2)
+        _run(serial, raw, 2 * 100000)
+        _run(d, raw, 2 * 100000)
+        stats = d.stats()
+        assert stats["workers"] == 2
+        for key in ("blocks", "frames", "corrected", "boundary_frames"):
+            assert stats[key] == serial.stats()[key]
+
+    def test_pool_is_spawned_not_forked(self, capture, parallel):
+        """Pula powstaje przez spawn - feed() może ją odtworzyć, gdy działają już inne wątki."""
+        assert parallel_demod.SPAWN.get_start_method() == "spawn"
+        raw, _ = capture
+        d = parallel(50000, 2)
+        d.feed(raw[:100000])
+        assert d.pool._ctx.get_start_method() == "spawn"
+
+    def test_close_releases_shared_memory(self):
+        d = parallel_demod.ParallelDemodulator(1000, 2)
+        name = d.shm.name
+        d.close()
+        d.close()
+        with pytest.raises(FileNotFoundError):
+            parallel_demod.shared_memory.SharedMemory(name=name)
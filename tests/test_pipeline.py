@@ -0,0 +1,821 @@
+import pytest
+import os
+import sys
+import time
+import json
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import acquisition
+import aircraft
+import broadcast
+import compact
+import decoder
+import demod
+import enrichment
+import flight_writer
+import main
+import signal_gen
+import snapshot
+
+
+# ─── Helpery ───────────────────────────────────────────────────────────────────
+
+IDENT_MSG = "8D4840D6202CC371C32CE0576098"     # KLM1023
+VELOCITY_MSG = "8D485020994409940838175B284F"  # 159 kt, 182.9°
+POSITION_MSG = "8D40621D58C382D690C8AC2863A7"  # pozycja (even)
+
+
+def _frame_iq(hex_msg):
+    """Surowe IQ u8 jednej ramki (preambuła + 112 bitów PPM)."""
+    bits = np.unpackbits(np.frombuffer(bytes.fromhex(hex_msg), dtype=np.uint8))
+    mag = np.full(demod.FRAME_SAMPLES, 2.0)
+    mag[[0, 2, 7, 9]] = 100.0
+    mag[16::2] = np.where(bits == 1, 100.0, 2.0)
+    mag[17::2] = np.where(bits == 1, 2.0, 100.0)
+    return mag
+
+
+def _capture(path, messages, length=20000):
+    rng = np.random.default_rng(11)
+    mag = rng.rayleigh(3.0, length)
+    for i, msg in enumerate(messages):
+        start = 500 + i * 1000
+        mag[start:start + demod.FRAME_SAMPLES] = _frame_iq(msg)
+    raw = np.empty(length * 2, dtype=np.uint8)
+    raw[0::2] = np.clip(np.round(127.5 + mag), 0, 255)
+    raw[1::2] = 128
+    raw.tofile(path)
+
+
+@pytest.fixture(autouse=True)
+def reset_state():
+    main.planes.clear()
+    main.cpr_buffer.clear()
+    main.expiry_heap.clear()
+    main.cpr_expiry_heap.clear()
+    main.demodulator = demod.Demodulator(acquisition.BLOCK_SIZE)
+    main.frame_dedup = demod.FrameDedup()
+    yield
+    main.planes.clear()
+    main.cpr_buffer.clear()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#  Cały dekoder na nagraniu z pliku (bez SDR)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class TestReplayPipeline:
+
+    def test_replay_decodes_identification(self, tmp_path):
+        path = str(tmp_path / "cap.bin")
+        _capture(path, [IDENT_MSG])
+        main.radio_loop(acquisition.FileSource(path))
+        assert main.planes["4840D6"].callsign == "KLM1023_"
+
+    def test_replay_decodes_velocity(self, tmp_path):
+        path = str(tmp_path / "cap.bin")
+        _capture(path, [VELOCITY_MSG])
+        main.radio_loop(acquisition.FileSource(path))
+        assert main.planes["485020"].speed == round(159 * 1.852)
+
+    def test_frames_split_across_small_blocks(self, tmp_path):
+        """Bloki mniejsze niż odstęp ramek - każda ramka przecina granicę jakiegoś bloku."""
+        path = str(tmp_path / "cap.bin")
+        _capture(path, [IDENT_MSG, VELOCITY_MSG] * 5)
+        main.radio_loop(acquisition.FileSource(path, block_bytes=2 * 333))
+        assert main.demodulator.stats()["frames"] == 10
+        assert set(main.planes) == {"4840D6", "485020"}
+
+    def test_active_source_exposed(self, tmp_path):
+        path = str(tmp_path / "cap.bin")
+        _capture(path, [IDENT_MSG])
+        source = acquisition.FileSource(path)
+        main.radio_loop(source)
+        assert main.active_source is source
+
+    def test_recorded_sdr_is_live_for_watchdog(self, tmp_path, monkeypatch):
+        """Watchdog (restart bez sygnału, statystyki SDR) działa także przy --record."""
+        path = str(tmp_path / "cap.bin")
+        _capture(path, [IDENT_MSG])
+        monkeypatch.setattr(main, "active_source", acquisition.FileSource(path))
+        assert main.live_source() is None
+        sdr = acquisition.RtlSdrSource.__new__(acquisition.RtlSdrSource) #bez sprzętu
+        recorder = acquisition.Recorder(sdr, str(tmp_path / "rec.bin"))
+        monkeypatch.setattr(main, "active_source", recorder)
+        assert main.live_source() is recorder
+
+    def test_repeated_frames_only_refresh_last_seen(self, tmp_path, monkeypatch):
+        path = str(tmp_path / "cap.bin")
+        _capture(path, [VELOCITY_MSG] * 3)
+        decoded = []
+        original = main.decode_details
+        monkeypatch.setattr(main, "decode_details", lambda msg, *args: decoded.append(msg) or original(msg, *args))
+        main.radio_loop(acquisition.FileSource(path))
+        assert len(decoded) == 1
+        assert main.planes["485020"].speed == round(159 * 1.852)
+        stats = main.frame_dedup.stats()
+        assert stats["hits"] == 2
+        assert stats["misses"] == 1
+
+    def test_df21_keeps_altitude(self, tmp_path):
+        """Squawk w DF21 nie nadpisuje wysokości śledzonego samolotu, DF20 ją ustawia."""
+        main.actualize_plane("4840D6", {"altitude": 9000})
+        path = str(tmp_path / "cap.bin")
+        _capture(path, [signal_gen.df21_frame(0x4840D6, squawk_id=0x0001).hex()])
+        main.radio_loop(acquisition.FileSource(path))
+        assert main.planes["4840D6"].altitude == 9000
+        _capture(path, [signal_gen.df20_frame(0x4840D6, 36000).hex()])
+        main.radio_loop(acquisition.FileSource(path))
+        assert main.planes["4840D6"].altitude == round(36000 * 0.3048)
+
+    def test_positions_are_not_deduplicated(self, tmp_path):
+        path = str(tmp_path / "cap.bin")
+        _capture(path, [POSITION_MSG] * 2)
+        main.radio_loop(acquisition.FileSource(path))
+        assert main.frame_dedup.stats()["hits"] == 0
+        assert main.cpr_buffer["40621D"][0] is not None
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#  Pozycja CPR - para even/odd na start, potem każda ramka osobno
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _position(lat, lon, odd, icao=0x3C6586):
+    frame = signal_gen.adsb_frame(icao, signal_gen.me_position(lat, lon, 30000, odd=odd))
+    return decoder.Message(frame)
+
+
+class TestPositionDecoding:
+
+    def test_single_message_without_reference_gives_no_fix(self):
+        main.decode_details(_position(52.2, 17.1, odd=False))
+        assert main.planes["3C6586"].lat is None
+
+    def test_pair_bootstraps_position(self):
+        main.decode_details(_position(52.2, 17.1, odd=False))
+        main.decode_details(_position(52.2, 17.1, odd=True))
+        plane = main.planes["3C6586"]
+        assert plane.lat == pytest.approx(52.2, abs=1e-3)
+        assert plane.lon == pytest.approx(17.1, abs=1e-3)
+
+    def test_every_message_after_bootstrap_adds_route_point(self, monkeypatch):
+        monkeypatch.setattr(main, "ROUTE_TOLERANCE", 0) #bez upraszczania trasy
+        main.decode_details(_position(52.2, 17.1, odd=False))
+        main.decode_details(_position(52.2, 17.1, odd=True))
+        for i in range(1, 5):
+            main.decode_details(_position(52.2 + i * 0.004, 17.1, odd=False)) #same ramki even
+        route = main.planes["3C6586"].route_points()
+        assert len(route) == 5
+        assert route[-1][0] == pytest.approx(52.216, abs=1e-3)
+
+    def test_position_log_printed_outside_lock(self, monkeypatch):
+        """Logi pozycji (przyjętej i odrzuconej) są wypisywane dopiero po zwolnieniu planes_lock."""
+        held = []
+        monkeypatch.setattr(main, "print", lambda *args: held.append(main.planes_lock.lock.locked()), raising=False)
+        main.actualize_plane("3C6586", {"lat": 52.2, "lon": 17.1, "last_pos_time": time.time()})
+        main.decode_details(_position(52.21, 17.11, odd=True)) #przyjęta
+        main.decode_details(_position(53.5, 17.1, odd=False)) #skok - odrzucona
+        assert len(held) >= 2
+        assert not any(held)
+
+    def test_single_message_uses_fresh_reference(self):
+        """Znana, świeża pozycja - jedna ramka wystarczy, bez pary w buforze."""
+        main.actualize_plane("3C6586", {"lat": 52.2, "lon": 17.1, "last_pos_time": time.time()})
+        main.decode_details(_position(52.21, 17.11, odd=True))
+        plane = main.planes["3C6586"]
+        assert plane.lat == pytest.approx(52.21, abs=1e-3)
+        assert plane.lon == pytest.approx(17.11, abs=1e-3)
+
+    def test_stale_reference_not_used(self):
+        old = time.time() - main.CPR_REF_MAX_AGE - 1
+        main.actualize_plane("3C6586", {"lat": 52.2, "lon": 17.1, "last_pos_time": old})
+        main.decode_details(_position(52.21, 17.11, odd=True))
+        assert main.planes["3C6586"].lat == 52.2
+
+    def test_bad_reference_detected_by_pair(self, capsys):
+        """Odniesienie dalej niż pół strefy daje złą pozycję lokalną - sprawdzenie parą ją wykrywa."""
+        main.actualize_plane("3C6586", {"lat": 49.0, "lon": 17.1, "last_pos_time": time.time() - 20})
+        main.decode_details(_position(52.2, 17.1, odd=False))
+        main.decode_details(_position(52.2, 17.1, odd=True))
+        assert "różni się od pary" in capsys.readouterr().out
+        assert main.cpr_buffer["3C6586"][2] > 0
+
+    def test_pair_check_not_repeated_within_interval(self, capsys):
+        main.decode_details(_position(52.2, 17.1, odd=False))
+        main.decode_details(_position(52.2, 17.1, odd=True))
+        checked = main.cpr_buffer["3C6586"][2]
+        main.decode_details(_position(52.201, 17.1, odd=False))
+        assert main.cpr_buffer["3C6586"][2] == checked
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#  Zmiany z bloku nakładane w jednej sekcji krytycznej
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class TestPlaneUpdates:
+
+    def test_nothing_changes_before_apply(self):
+        updates = main.PlaneUpdates()
+        main.decode_details(decoder.Message(bytes.fromhex(IDENT_MSG)), updates)
+        assert "4840D6" not in main.planes
+        main.apply_updates(updates)
+        assert main.planes["4840D6"].callsign.startswith("KLM1023")
+
+    def test_min_max_dist_and_speed_as_single_updates(self):
+        updates = main.PlaneUpdates()
+        now = time.time()
+        for dist, speed in ((50.0, 700), (20.0, 900), (80.0, 800)):
+            updates.add("A1", {"dist": dist, "speed": speed}, now)
+        main.apply_updates(updates)
+        plane = main.planes["A1"]
+        assert plane.min_dist == 20.0
+        assert plane.max_dist == 80.0
+        assert plane.max_speed == 900
+        assert plane.speed == 800
+        assert plane.dist == 80.0
+
+    def test_route_keeps_reception_order(self, monkeypatch):
+        monkeypatch.setattr(main, "ROUTE_TOLERANCE", 0)
+        updates = main.PlaneUpdates()
+        main.decode_details(_position(52.2, 17.1, odd=False), updates)
+        main.decode_details(_position(52.2, 17.1, odd=True), updates)
+        for i in range(1, 4):
+            main.decode_details(_position(52.2 + i * 0.004, 17.1, odd=False), updates)
+        main.apply_updates(updates)
+        route = main.planes["3C6586"].route_points()
+        assert [round(p[0], 3) for p in route] == [52.2, 52.204, 52.208, 52.212]
+
+    def test_straight_route_is_simplified(self):
+        updates = main.PlaneUpdates()
+        main.decode_details(_position(52.2, 17.1, odd=False), updates)
+        main.decode_details(_position(52.2, 17.1, odd=True), updates)
+        for i in range(1, 6):
+            main.decode_details(_position(52.2 + i * 0.004, 17.1, odd=False), updates)
+        main.apply_updates(updates)
+        route = main.planes["3C6586"].route_points()
+        assert len(route) == 2
+        assert route[-1][0] == pytest.approx(52.22, abs=1e-3)
+
+    def test_position_jump_filtered_at_apply(self):
+        now = time.time()
+        main.actualize_plane("3C6586", {"lat": 52.2, "lon": 17.1, "last_pos_time": now})
+        updates = main.PlaneUpdates()
+        updates.position("3C6586", {"lat": 53.5, "lon": 17.1, "dist": 170.0, "last_pos_time": now}, now)
+        main.apply_updates(updates)
+        assert main.planes["3C6586"].lat == 52.2
+        assert main.planes["3C6586"].max_dist is None
+
+    def test_touch_does_not_create_plane(self):
+        updates = main.PlaneUpdates()
+        updates.touch("A1", time.time())
+        main.apply_updates(updates)
+        assert "A1" not in main.planes
+
+    def test_touch_refreshes_last_seen(self):
+        main.actualize_plane("A1", {})
+        main.planes["A1"].last_seen = 0
+        updates = main.PlaneUpdates()
+        updates.touch("A1", 123.0)
+        main.apply_updates(updates)
+        assert main.planes["A1"].last_seen == 123.0
+
+    def test_one_lock_acquisition_per_block(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(main, "publish_snapshot", lambda *args, **kwargs: False) #migawka /data osobno
+        path = str(tmp_path / "cap.bin")
+        _capture(path, [IDENT_MSG, VELOCITY_MSG, POSITION_MSG])
+        before = main.planes_lock.acquisitions
+        main.radio_loop(acquisition.FileSource(path))
+        assert main.planes_lock.acquisitions - before == 1
+        assert len(main.planes) == 3
+
+    def test_empty_block_does_not_lock(self):
+        before = main.planes_lock.acquisitions
+        main.apply_updates(main.PlaneUpdates())
+        assert main.planes_lock.acquisitions == before
+
+
+class TestTimedLock:
+
+    def test_counts_wait_and_hold(self):
+        lock = main.TimedLock()
+        with lock:
+            time.sleep(0.01)
+        stats = lock.stats()
+        assert stats["acquisitions"] == 1
+        assert stats["hold_ms_max"] >= 9
+        assert stats["wait_ms_max"] < stats["hold_ms_max"]
+
+    def test_releases_on_exception(self):
+        lock = main.TimedLock()
+        with pytest.raises(ValueError):
+            with lock:
+                raise ValueError()
+        assert lock.lock.acquire(blocking=False)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#  Wygasanie samolotów i bufora CPR (kopiec z leniwym unieważnianiem)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+@pytest.fixture
+def writer(monkeypatch):
+    saved = []
+    w = flight_writer.FlightWriter(save_many=saved.extend)
+    w.saved_planes = saved
+    monkeypatch.setattr(main, "db_writer", w)
+    return w
+
+
+class TestExpiry:
+
+    def test_expires_after_timeout(self, writer):
+        main.actualize_plane("A1", {})
+        created = main.planes["A1"].last_seen
+        assert main.expire_planes(created + main.PLANE_TIMEOUT - 1) == 0
+        assert main.expire_planes(created + main.PLANE_TIMEOUT) == 1
+        assert "A1" not in main.planes
+        assert writer.queue.qsize() == 1
+
+    def test_refreshed_plane_is_requeued(self, writer):
+        main.actualize_plane("A1", {})
+        created = main.planes["A1"].last_seen
+        main.planes["A1"].last_seen = created + 30
+        assert main.expire_planes(created + main.PLANE_TIMEOUT) == 0
+        assert len(main.expiry_heap) == 1
+        assert main.expiry_heap[0][0] == created + 30 + main.PLANE_TIMEOUT
+        assert main.expire_planes(created + 30 + main.PLANE_TIMEOUT) == 1
+
+    def test_only_due_entries_are_touched(self, writer):
+        for i in range(100):
+            main.actualize_plane(f"A{i}", {})
+        heap = list(main.expiry_heap)
+        assert main.expire_planes(time.time()) == 0
+        assert main.expiry_heap == heap
+
+    def test_entry_of_removed_plane_is_dropped(self, writer):
+        main.actualize_plane("A1", {})
+        created = main.planes["A1"].last_seen
+        del main.planes["A1"]
+        main.actualize_plane("A1", {}) #ten sam ICAO, nowy samolot
+        main.planes["A1"].last_seen = created + 50
+        assert main.expire_planes(created + main.PLANE_TIMEOUT) == 0
+        assert "A1" in main.planes
+
+    def test_sub_second_tick(self):
+        assert main.EXPIRY_TICK < 1
+
+
+class TestCprExpiry:
+
+    def test_stale_entry_removed(self):
+        main.decode_details(_position(52.2, 17.1, odd=False))
+        t = main.cpr_buffer["3C6586"][0][1]
+        assert main.expire_cpr(t + main.CPR_TIMEOUT - 1) == 0
+        assert main.expire_cpr(t + main.CPR_TIMEOUT) == 1
+        assert "3C6586" not in main.cpr_buffer
+
+    def test_newer_frame_keeps_entry(self):
+        main.decode_details(_position(52.2, 17.1, odd=False))
+        entry = main.cpr_buffer["3C6586"]
+        t = entry[0][1]
+        entry[1] = (entry[0][0], t + 40) #późniejsza ramka odd
+        assert main.expire_cpr(t + main.CPR_TIMEOUT) == 0
+        assert main.expire_cpr(t + 40 + main.CPR_TIMEOUT) == 1
+
+    def test_process_samples_reaps_cpr(self):
+        main.cpr_buffer["ABCDEF"] = entry = [(None, 0.0), None, 0]
+        main.cpr_expiry_heap.append((0.0, 0, "ABCDEF", entry))
+        main.process_samples(np.full(2 * demod.FRAME_SAMPLES, 127, dtype=np.uint8))
+        assert "ABCDEF" not in main.cpr_buffer
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#  /data - gotowa migawka stanu
+# ═══════════════════════════════════════════════════════════════════════════════
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, "live_snapshot", snapshot.LiveSnapshot())
+    return main.app.test_client()
+
+
+class TestDataEndpoint:
+
+    def test_returns_published_state(self, client):
+        main.actualize_plane("A1", {"callsign": "LOT1"})
+        assert main.publish_snapshot(time.time())
+        data = client.get("/data").get_json()
+        assert [p["icao"] for p in data] == ["A1"]
+        assert data[0]["callsign"] == "LOT1"
+        assert "route" not in data[0]
+
+    def test_not_modified_with_matching_etag(self, client):
+        main.actualize_plane("A1", {})
+        main.publish_snapshot(time.time())
+        first = client.get("/data")
+        again = client.get("/data", headers={"If-None-Match": first.headers["ETag"]})
+        assert again.status_code == 304
+        assert again.data == b""
+
+    def test_new_version_after_change(self, client):
+        main.actualize_plane("A1", {})
+        main.publish_snapshot(time.time())
+        etag = client.get("/data").headers["ETag"]
+        main.actualize_plane("A2", {})
+        main.publish_snapshot(time.time() + 1)
+        response = client.get("/data", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert len(response.get_json()) == 2
+
+    def test_does_not_take_lock(self, client):
+        main.publish_snapshot(time.time())
+        before = main.planes_lock.acquisitions
+        for _ in range(5):
+            client.get("/data")
+        assert main.planes_lock.acquisitions == before
+
+    def test_publish_is_rate_limited(self, client):
+        now = time.time()
+        main.actualize_plane("A1", {})
+        assert main.publish_snapshot(now)
+        main.actualize_plane("A2", {})
+        assert not main.publish_snapshot(now + 0.1)
+        assert main.publish_snapshot(now + main.live_snapshot.interval)
+
+    def test_unchanged_state_is_not_republished(self, client):
+        now = time.time()
+        main.publish_snapshot(now)
+        version = main.live_snapshot.current.version
+        assert not main.publish_snapshot(now + 10)
+        assert main.live_snapshot.current.version == version
+
+    def test_replay_publishes_final_state(self, client, tmp_path):
+        path = str(tmp_path / "cap.bin")
+        _capture(path, [IDENT_MSG, VELOCITY_MSG])
+        main.radio_loop(acquisition.FileSource(path))
+        assert len(client.get("/data").get_json()) == 2
+
+
+class TestDataDelta:
+
+    def _get(self, client, since, boot):
+        return client.get(f"/data?since={since}&boot={boot}").get_json()
+
+    def test_every_change_bumps_version(self, client):
+        main.actualize_plane("A1", {})
+        first = main.planes["A1"].version
+        main.actualize_plane("A1", {"speed": 500})
+        assert main.planes["A1"].version > first
+        assert main.state_version == main.planes["A1"].version
+
+    def test_delta_contains_only_changed(self, client):
+        main.actualize_plane("A1", {})
+        main.actualize_plane("A2", {})
+        main.publish_snapshot(time.time(), force=True)
+        full = self._get(client, 0, "")
+        assert full["full"]
+        assert len(full["planes"]) == 2
+        main.actualize_plane("A2", {"speed": 700})
+        main.publish_snapshot(time.time(), force=True)
+        delta = self._get(client, full["version"], full["boot"])
+        assert not delta["full"]
+        assert [(p["icao"], p["speed"]) for p in delta["planes"]] == [("A2", 700)]
+
+    def test_expired_plane_in_removed(self, client, writer):
+        main.actualize_plane("A1", {})
+        main.actualize_plane("A2", {})
+        main.publish_snapshot(time.time(), force=True)
+        start = self._get(client, 0, "")
+        main.planes["A2"].last_seen += main.PLANE_TIMEOUT
+        main.expire_planes(time.time() + main.PLANE_TIMEOUT)
+        main.publish_snapshot(time.time(), force=True)
+        delta = self._get(client, start["version"], start["boot"])
+        assert delta["removed"] == ["A1"]
+        assert delta["planes"] == []
+
+    def test_touch_is_a_change(self, client):
+        main.actualize_plane("A1", {})
+        version = main.planes["A1"].version
+        updates = main.PlaneUpdates()
+        updates.touch("A1", time.time())
+        main.apply_updates(updates)
+        assert main.planes["A1"].version > version
+
+    def test_noop_reply_leaves_delta_empty(self, client):
+        """DF11 / DF21 bez wysokości (puste dane, bez last_seen) i te same wartości to nie zmiana."""
+        main.actualize_plane("A1", {"speed": 500})
+        main.publish_snapshot(time.time(), force=True)
+        start = self._get(client, 0, "")
+        updates = main.PlaneUpdates()
+        updates.add("A1", {}, time.time(), update_last_seen=False)
+        updates.add("A1", {"speed": 500}, time.time(), update_last_seen=False)
+        main.apply_updates(updates)
+        assert not main.live_snapshot.dirty
+        main.publish_snapshot(time.time(), force=True)
+        delta = self._get(client, start["version"], start["boot"])
+        assert delta["version"] == start["version"]
+        assert delta["planes"] == []
+
+    def test_df21_frame_leaves_delta_empty(self, client, tmp_path):
+        main.actualize_plane("4840D6", {"altitude": 9000})
+        main.publish_snapshot(time.time(), force=True)
+        start = self._get(client, 0, "")
+        path = str(tmp_path / "cap.bin")
+        _capture(path, [signal_gen.df21_frame(0x4840D6, squawk_id=0x1234).hex()])
+        main.radio_loop(acquisition.FileSource(path))
+        assert self._get(client, start["version"], start["boot"])["planes"] == []
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#  /stream - zdarzenia wysyłane przez serwer
+# ═══════════════════════════════════════════════════════════════════════════════
+
+@pytest.fixture
+def stream(monkeypatch):
+    hub = broadcast.Broadcaster(max_subscribers=2)
+    monkeypatch.setattr(main, "live_stream", hub)
+    monkeypatch.setattr(main, "live_snapshot", snapshot.LiveSnapshot(on_publish=main.stream_planes))
+    monkeypatch.setattr(main, "last_stats", None)
+    return hub
+
+
+def _event(chunk):
+    """(nazwa, dane JSON) z jednej wiadomości SSE."""
+    lines = chunk.decode().strip().split("\n")
+    return lines[0][len("event: "):], json.loads(lines[1][len("data: "):])
+
+
+class TestStream:
+
+    def _open(self, client):
+        response = client.get("/stream")
+        assert response.mimetype == "text/event-stream"
+        chunks = iter(response.response)
+        assert next(chunks).startswith(b"retry:")
+        return response, chunks
+
+    def test_full_state_then_deltas(self, stream):
+        client = main.app.test_client()
+        main.actualize_plane("A1", {})
+        main.actualize_plane("A2", {})
+        main.publish_snapshot(time.time(), force=True)
+        response, chunks = self._open(client)
+        name, full = _event(next(chunks))
+        assert name == "planes"
+        assert full["full"]
+        assert sorted(p["icao"] for p in full["planes"]) == ["A1", "A2"]
+        main.actualize_plane("A2", {"speed": 700})
+        main.publish_snapshot(time.time(), force=True)
+        name, delta = _event(next(chunks))
+        assert not delta["full"]
+        assert delta["version"] > full["version"]
+        assert [(p["icao"], p["speed"]) for p in delta["planes"]] == [("A2", 700)]
+        response.close()
+        assert not stream.subscribers
+
+    def test_stats_pushed_only_when_changed(self, stream, monkeypatch):
+        stats = {"stat_total": 1}
+        monkeypatch.setattr(main.data_base, "get_stat_today", lambda: dict(stats))
+        client = main.app.test_client()
+        response, chunks = self._open(client)
+        main.publish_stats()
+        main.publish_stats() #bez zmian - nic nie wysyłamy
+        stats["stat_total"] = 2
+        main.publish_stats()
+        assert [_event(next(chunks)) for _ in range(3)][1:] == [("stats", {"stat_total": 1}),
+                                                                 ("stats", {"stat_total": 2})]
+        assert stream.stats()["published"] == 2
+        response.close()
+
+    def test_new_client_gets_last_stats(self, stream, monkeypatch):
+        monkeypatch.setattr(main.data_base, "get_stat_today", lambda: {"stat_total": 5})
+        main.publish_stats()
+        response, chunks = self._open(main.app.test_client())
+        next(chunks) #pełny stan samolotów
+        assert _event(next(chunks)) == ("stats", {"stat_total": 5})
+        response.close()
+
+    def test_too_many_clients(self, stream):
+        client = main.app.test_client()
+        open_ = [self._open(client)[0] for _ in range(2)]
+        assert client.get("/stream").status_code == 503
+        for response in open_:
+            response.close()
+        assert client.get("/stream").status_code == 200
+
+    def test_no_encoding_without_subscribers(self, stream):
+        main.actualize_plane("A1", {})
+        main.publish_snapshot(time.time(), force=True)
+        assert stream.stats()["published"] == 0
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#  /route/<icao>?since=N - przyrostowa trasa
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _tracked(icao="ABC123", points=5, tolerance=0.0):
+    plane = aircraft.Aircraft(icao, 100.0, tolerance=tolerance)
+    for i in range(points):
+        plane.add_point(52.0 + i * 0.01, 17.0 + (i % 2) * 0.01, 100.0 + i)
+    main.planes[icao] = plane
+    return plane
+
+
+class TestRouteDelta:
+
+    def test_full_route_by_default(self):
+        _tracked()
+        payload = main.app.test_client().get("/route/abc123").get_json()
+        assert payload["active"]
+        assert payload["start"] == 0
+        assert payload["length"] == 5
+        assert len(payload["route"]) == 5
+
+    def test_since_returns_new_points_and_last_known(self):
+        plane = _tracked()
+        client = main.app.test_client()
+        first = client.get("/route/ABC123").get_json()
+        plane.add_point(52.1, 17.0, 200.0)
+        delta = client.get("/route/ABC123?since=5").get_json()
+        assert delta["start"] == 4
+        assert delta["length"] == 6
+        assert delta["route"][0] == first["route"][4]
+        assert first["route"][:4] + delta["route"] == plane.route_points()
+
+    def test_moved_last_point_is_resent(self):
+        """Upraszczanie trasy przesuwa ostatni punkt zamiast dopisać nowy."""
+        plane = _tracked(points=0, tolerance=0.05)
+        for i in range(3):
+            plane.add_point(52.0 + i * 0.01, 17.0, float(i))
+        client = main.app.test_client()
+        before = client.get("/route/ABC123").get_json()
+        plane.add_point(52.03, 17.0, 3.0) #na prostej - zastępuje ostatni punkt
+        delta = client.get(f"/route/ABC123?since={before['length']}").get_json()
+        assert delta["length"] == before["length"]
+        assert before["route"][:delta["start"]] + delta["route"] == plane.route_points()
+        assert delta["route"][-1] != before["route"][-1]
+
+    def test_since_beyond_route_resyncs(self):
+        """Klient pamięta dłuższą trasę - np. z poprzedniego przelotu."""
+        plane = _tracked(points=3)
+        payload = main.app.test_client().get("/route/ABC123?since=50").get_json()
+        assert payload["start"] == 0
+        assert payload["route"] == plane.route_points()
+        assert payload["first_seen"] == plane.first_seen
+
+    def test_up_to_date_client_gets_one_point(self):
+        _tracked()
+        payload = main.app.test_client().get("/route/ABC123?since=5").get_json()
+        assert payload["start"] == 4
+        assert len(payload["route"]) == 1
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#  Zwarte formaty /data i /route
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class TestCompactFormats:
+
+    def _publish(self):
+        main.actualize_plane("A1", {"lat": 52.0, "lon": 17.0, "speed": 800})
+        main.actualize_plane("A2", {"speed": 600})
+        main.publish_snapshot(time.time(), force=True)
+
+    def test_columns_full_then_delta(self, client):
+        self._publish()
+        full = client.get("/data?format=columns&fields=lat,lon,speed").get_json()
+        assert full["full"]
+        assert full["fields"] == ["icao", "lat", "lon", "speed"]
+        assert sorted(full["columns"][0]) == ["A1", "A2"]
+        main.actualize_plane("A2", {"speed": 700})
+        main.publish_snapshot(time.time(), force=True)
+        delta = client.get(f"/data?format=columns&fields=speed&since={full['version']}&boot={full['boot']}").get_json()
+        assert not delta["full"]
+        assert delta["columns"] == [["A2"], [700]]
+
+    def test_full_state_encoded_once_per_snapshot(self, client, monkeypatch):
+        """Pełny stan w zwartym formacie liczony raz na migawkę, różnice - na każde zapytanie."""
+        self._publish()
+        calls = []
+        encode = compact.encode_planes
+        monkeypatch.setattr(compact, "encode_planes", lambda *args, **kw: calls.append(args[0]) or encode(*args, **kw))
+        first = client.get("/data?format=columns&fields=lat,lon")
+        second = client.get("/data?format=columns&fields=lon,lat")
+        assert first.data == second.data
+        assert len(calls) == 1
+        full = first.get_json()
+        for _ in range(2):
+            client.get(f"/data?format=columns&fields=lat,lon&since={full['version']}&boot={full['boot']}")
+        assert len(calls) == 3
+
+    def test_json_fields_keep_list_shape(self, client):
+        self._publish()
+        data = client.get("/data?fields=speed").get_json()
+        assert sorted(data, key=lambda p: p["icao"]) == [{"icao": "A1", "speed": 800}, {"icao": "A2", "speed": 600}]
+
+    def test_compact_etag(self, client):
+        self._publish()
+        first = client.get("/data?format=columns")
+        again = client.get("/data?format=columns", headers={"If-None-Match": first.headers["ETag"]})
+        assert again.status_code == 304
+        other = client.get("/data?format=columns&fields=lat", headers={"If-None-Match": first.headers["ETag"]})
+        assert other.status_code == 200
+
+    def test_msgpack_by_accept_header(self, client):
+        msgpack = pytest.importorskip("msgpack")
+        self._publish()
+        response = client.get("/data", headers={"Accept": "application/msgpack"})
+        assert response.mimetype == "application/msgpack"
+        version, _, full, removed, ids, columns = msgpack.unpackb(response.data)
+        assert full and removed == []
+        lat = columns[ids.index(compact.FIELDS.index("lat"))]
+        assert 5200000 in lat
+
+    def test_browser_accept_stays_json(self, client):
+        self._publish()
+        response = client.get("/data", headers={"Accept": "text/html,application/json;q=0.9,*/*;q=0.8"})
+        assert response.mimetype == "application/json"
+
+    def test_unknown_format(self, client):
+        assert client.get("/data?format=xml").status_code == 406
+
+    def test_msgpack_without_module(self, client, monkeypatch):
+        monkeypatch.setattr(compact, "HAS_MSGPACK", False)
+        assert client.get("/data?format=msgpack").status_code == 406
+
+    def test_route_columns(self):
+        plane = _tracked(points=3)
+        data = main.app.test_client().get("/route/ABC123?format=columns&since=2").get_json()
+        assert data["start"] == 1
+        assert list(zip(data["lat"], data["lon"])) == [tuple(p) for p in plane.route_points(1)]
+
+    @pytest.mark.parametrize("fmt", ["columns", "msgpack"])
+    def test_route_of_merged_flights_from_db(self, fmt, tmp_path, monkeypatch):
+        """Scalona trasa z bazy ma separator None - w kolumnach to null w lat i lon."""
+        if fmt == "msgpack":
+            msgpack = pytest.importorskip("msgpack")
+        monkeypatch.setattr(main.data_base, "DB_NAME", str(tmp_path / "radar.db"))
+        main.data_base.init_db()
+        now = time.time()
+        for first, route in ((now - 300, [[52.0, 17.0]]), (now - 100, [[52.5, 17.5]])):
+            main.data_base.save_flight({"icao": "ABC123", "model": "Boeing 737", "min_dist": 10.0,
+                                        "first_seen": first, "last_seen": first + 60, "route": route})
+        response = main.app.test_client().get(f"/route/ABC123?format={fmt}")
+        assert response.status_code == 200
+        if fmt == "msgpack":
+            data = msgpack.unpackb(response.data)
+            assert data["lat"] == [5200000, None, 5250000]
+        else:
+            data = response.get_json()
+            assert data["lat"] == [52.0, None, 52.5]
+            assert data["lon"] == [17.0, None, 17.5]
+        assert data["active"] is False
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#  Przeładowanie bazy modeli
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class _Models(dict):
+    """Baza modeli ze słownika ICAO -> opis, z lookup jak registry.Registry."""
+
+    def lookup(self, icao):
+        model = self.get(icao)
+        return (model,) + enrichment.enrich(model) if model else None
+
+
+class TestRegistryReload:
+
+    def test_unknown_models_enriched(self):
+        main.actualize_plane("ABC123", {})
+        main.actualize_plane("DEF456", {})
+        main.planes["DEF456"].model = "Airbus A320"
+        version = main.planes["ABC123"].version
+        assert main.enrich_unknown_models(_Models({"ABC123": "C-130[Polish Air Force]", "DEF456": "Inny model"})) == 1
+        assert main.planes["ABC123"].model == "C-130[Polish Air Force]"
+        assert main.planes["ABC123"].is_military is True
+        assert main.planes["ABC123"].rarity == 100
+        assert main.planes["ABC123"].version > version
+        assert main.planes["DEF456"].model == "Airbus A320"
+
+    def test_new_plane_gets_info_from_registry(self, monkeypatch):
+        monkeypatch.setattr(main.planes_data, "current", _Models({"ABC123": "Cessna 172S"}))
+        main.actualize_plane("ABC123", {})
+        plane = main.planes["ABC123"].to_json_dict()
+        assert (plane["model"], plane["rarity"], plane["is_military"]) == ("Cessna 172S", 50, False)
+        assert plane["operator_class"] == enrichment.OPERATOR_PRIVATE
+
+    def test_nothing_to_enrich(self):
+        main.actualize_plane("ABC123", {})
+        assert main.enrich_unknown_models(_Models()) == 0
+        assert main.planes["ABC123"].model == "Nieznany model"
+
+    def test_reload_endpoint_local_only(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(main.planes_data, "request_reload", lambda: calls.append(1))
+        client = main.app.test_client()
+        assert client.post("/api/registry/reload").status_code == 202
+        remote = client.post("/api/registry/reload", environ_base={"REMOTE_ADDR": "192.168.1.20"})
+        assert remote.status_code == 403
+        assert calls == [1]
@@ -0,0 +1,289 @@
+import pytest
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import enrichment
+import registry
+
+
+# ─── Fixture i helpery ─────────────────────────────────────────────────────────
+
+HEADER = "'icao24','registration','manufacturerName','model','operator'\n"
+
+
+def _write_csv(path, rows):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(HEADER)
+        for row in rows:
+            f.write(",".join(f"'{v}'" for v in row) + "\n")
+
+
+@pytest.fixture
+def paths(tmp_path):
+    csv_path = str(tmp_path / "samoloty.csv")
+    bin_path = str(tmp_path / "samoloty.bin")
+    _write_csv(csv_path, [
+        ("48ae21", "SP-LWA", "Embraer", "ERJ-170", "LOT Polish Airlines"),
+        ("3c6586", "D-ABYA", "Boeing", "747-830", "Lufthansa"),
+        ("48ae22", "SP-LWB", "Embraer", "ERJ-170", "LOT Polish Airlines"),
+        ("4b1805", "HB-JCA", "Airbus", "A220-300", ""),
+        ("zzzzzz", "", "Zły", "wiersz", ""),
+        ("", "", "Pusty", "wiersz", ""),
+        ("ffffff", "", "Airbus", "A320 ąę", "")
+    ])
+    return csv_path, bin_path
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#  1. Kompilacja i wyszukiwanie
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class TestRegistry:
+
+    def test_lookup_matches_csv_description(self, paths):
+        csv_path, bin_path = paths
+        assert registry.compile_csv(csv_path, bin_path) == 5
+        reg = registry.Registry(bin_path)
+        assert reg.get("48AE21") == "Embraer ERJ-170[LOT Polish Airlines]"
+        assert reg.get("3c6586") == "Boeing 747-830[Lufthansa]"
+        assert reg.get("4B1805") == "Airbus A220-300"
+        assert reg.get("FFFFFF") == "Airbus A320 ąę"
+        reg.close()
+
+    def test_missing_and_invalid_keys(self, paths):
+        csv_path, bin_path = paths
+        registry.compile_csv(csv_path, bin_path)
+        reg = registry.Registry(bin_path)
+        assert reg.get("000000") is None
+        assert reg.get("ABCDEF", "Nieznany model") == "Nieznany model"
+        assert reg.get("ZZZZZZ", "x") == "x"
+        assert reg.get(None, "x") == "x"
+        assert "48AE21" in reg
+        assert "48AE23" not in reg
+        assert len(reg) == 5
+        reg.close()
+
+    def test_same_description_stored_once(self, paths):
+        csv_path, bin_path = paths
+        registry.compile_csv(csv_path, bin_path)
+        reg = registry.Registry(bin_path)
+        assert reg.strings == 4
+        reg.close()
+
+    def test_duplicate_icao_last_wins(self, tmp_path):
+        csv_path = str(tmp_path / "dup.csv")
+        _write_csv(csv_path, [("48ae21", "", "Stary", "model", ""), ("48AE21", "", "Nowy", "model", "")])
+        registry.compile_csv(csv_path, str(tmp_path / "dup.bin"))
+        reg = registry.Registry(str(tmp_path / "dup.bin"))
+        assert reg.get("48AE21") == "Nowy model"
+        reg.close()
+
+    def test_lookup_carries_enrichment(self, tmp_path):
+        csv_path = str(tmp_path / "cechy.csv")
+        _write_csv(csv_path, [("48ae21", "", "Embraer", "ERJ-170", "LOT Polish Airlines"),
+                              ("48d8c1", "", "Lockheed", "C-130E", "Polish Air Force"),
+                              ("48c1a5", "", "Cessna", "172S", ""),
+                              ("48c1a6", "", "Eurocopter", "EC 135", "LPR")])
+        registry.compile_csv(csv_path, str(tmp_path / "cechy.bin"))
+        reg = registry.Registry(str(tmp_path / "cechy.bin"))
+        assert reg.lookup("48AE21") == ("Embraer ERJ-170[LOT Polish Airlines]", 0, False, enrichment.OPERATOR_AIRLINE)
+        assert reg.lookup("48D8C1") == ("Lockheed C-130E[Polish Air Force]", 100, True, enrichment.OPERATOR_MILITARY)
+        assert reg.lookup("48C1A5") == ("Cessna 172S", 50, False, enrichment.OPERATOR_PRIVATE)
+        assert reg.lookup("48C1A6") == ("Eurocopter EC 135[LPR]", 100, False, enrichment.OPERATOR_STATE)
+        assert reg.lookup("000000") is None
+        assert reg.lookup(None) is None
+        reg.close()
+
+    def test_empty_registry(self, tmp_path):
+        csv_path = str(tmp_path / "empty.csv")
+        _write_csv(csv_path, [])
+        registry.compile_csv(csv_path, str(tmp_path / "empty.bin"))
+        reg = registry.Registry(str(tmp_path / "empty.bin"))
+        assert len(reg) == 0
+        assert reg.get("48AE21") is None
+        reg.close()
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#  2. Plik binarny
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class TestRegistryFile:
+
+    def test_open_compiles_when_missing(self, paths):
+        csv_path, bin_path = paths
+        reg = registry.open_registry(csv_path, bin_path)
+        assert os.path.exists(bin_path)
+        assert len(reg) == 5
+        reg.close()
+
+    def test_recompiles_when_csv_newer(self, paths):
+        csv_path, bin_path = paths
+        registry.compile_csv(csv_path, bin_path)
+        _write_csv(csv_path, [("48ae21", "", "Nowy", "model", "")])
+        later = time.time() + 10
+        os.utime(csv_path, (later, later))
+        reg = registry.open_registry(csv_path, bin_path)
+        assert len(reg) == 1
+        reg.close()
+
+    def test_works_without_csv(self, paths):
+        """Na urządzeniu może leżeć sam skompilowany plik."""
+        csv_path, bin_path = paths
+        registry.compile_csv(csv_path, bin_path)
+        os.remove(csv_path)
+        reg = registry.open_registry(csv_path, bin_path)
+        assert reg.get("48AE21")
+        reg.close()
+
+    def test_recompiles_old_format(self, paths):
+        """Plik z poprzedniej wersji formatu (np. po aktualizacji programu) jest budowany od nowa."""
+        csv_path, bin_path = paths
+        registry.compile_csv(csv_path, bin_path)
+        with open(bin_path, "r+b") as f:
+            f.write(registry.HEADER.pack(registry.MAGIC, 1, registry.BYTE_ORDER_MARK, 0, 0))
+        _age(csv_path)
+        reg = registry.open_registry(csv_path, bin_path)
+        assert reg.lookup("48AE21")[0] == "Embraer ERJ-170[LOT Polish Airlines]"
+        reg.close()
+
+    def test_missing_files(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            registry.open_registry(str(tmp_path / "brak.csv"), str(tmp_path / "brak.bin"))
+
+    def test_rejects_foreign_file(self, tmp_path):
+        path = tmp_path / "zly.bin"
+        path.write_bytes("to nie jest baza samolotów".encode())
+        with pytest.raises(registry.RegistryError):
+            registry.Registry(str(path))
+
+    def test_rejects_truncated_file(self, paths):
+        csv_path, bin_path = paths
+        registry.compile_csv(csv_path, bin_path)
+        with open(bin_path, "rb") as f:
+            data = f.read()
+        with open(bin_path, "wb") as f:
+            f.write(data[:-5])
+        with pytest.raises(registry.RegistryError):
+            registry.Registry(bin_path)
+
+    def test_rejects_file_cut_inside_tables(self, paths):
+        csv_path, bin_path = paths
+        registry.compile_csv(csv_path, bin_path)
+        with open(bin_path, "rb") as f:
+            data = f.read()
+        with open(bin_path, "wb") as f:
+            f.write(data[:registry.HEADER.size + 10])
+        with pytest.raises(registry.RegistryError):
+            registry.Registry(bin_path)
+
+    def test_no_temporary_file_left(self, paths):
+        csv_path, bin_path = paths
+        registry.compile_csv(csv_path, bin_path)
+        assert not os.path.exists(bin_path + ".tmp")
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#  3. RegistryService - przeładowanie bez restartu
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _age(path, seconds=120):
+    """Cofa datę modyfikacji pliku - CSV będzie nowszy od skompilowanej bazy."""
+    earlier = time.time() - seconds
+    os.utime(path, (earlier, earlier))
+
+
+def _wait_for(condition, timeout=10):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "przekroczony czas oczekiwania"
+        time.sleep(0.02)
+
+
+class TestRegistryService:
+
+    def test_empty_until_loaded(self, paths):
+        service = registry.RegistryService(*paths)
+        assert service.get("48AE21", "Nieznany model") == "Nieznany model"
+        assert len(service) == 0
+        assert service.lookup("48AE21") is None
+        service.load()
+        assert service.get("48AE21") == "Embraer ERJ-170[LOT Polish Airlines]"
+        assert service.lookup("48AE21")[0] == "Embraer ERJ-170[LOT Polish Airlines]"
+        assert service.generation == 1
+
+    def test_reload_swaps_and_notifies(self, paths):
+        csv_path, bin_path = paths
+        seen = []
+        service = registry.RegistryService(csv_path, bin_path, on_reload=seen.append)
+        service.load()
+        old = service.current
+        _write_csv(csv_path, [("abcdef", "", "Cessna", "172", "")])
+        assert service.reload()
+        assert service.current is not old
+        assert service.get("ABCDEF") == "Cessna 172"
+        assert service.get("48AE21") is None
+        assert seen == [service.current]
+        assert old.get("48AE21") #stara baza działa dalej u tych, którzy ją jeszcze trzymają
+
+    def test_failed_build_keeps_old_registry(self, paths):
+        csv_path, bin_path = paths
+        service = registry.RegistryService(csv_path, bin_path, settle=0)
+        service.load()
+        with open(csv_path, "wb") as f:
+            f.write(b"\xff\xfe nie utf-8")
+        _age(bin_path)
+        assert service.stale()
+        assert not service.reload()
+        assert service.get("48AE21")
+        assert service.failures == 1
+        assert not service.stale() #ten sam zepsuty plik nie jest budowany w kółko
+
+    def test_builder_is_spawned_not_forked(self, paths, monkeypatch):
+        """Dziecko z fork dziedziczyłoby blokady wątków i obsługę SIGTERM z main."""
+        assert registry.SPAWN.get_start_method() == "spawn"
+        builders = []
+
+        class Context:
+            def Process(self, **kwargs):
+                builders.append(kwargs["target"])
+                return registry.multiprocessing.get_context("spawn").Process(**kwargs)
+
+        monkeypatch.setattr(registry, "SPAWN", Context())
+        service = registry.RegistryService(*paths)
+        assert service.reload()
+        assert builders == [registry.compile_csv]
+
+    def test_stale_only_after_settle(self, paths):
+        csv_path, bin_path = paths
+        service = registry.RegistryService(csv_path, bin_path, settle=60)
+        service.load()
+        _age(bin_path)
+        assert not service.stale() #CSV dopiero co zapisany - może być jeszcze kopiowany
+        service.settle = 0
+        assert service.stale()
+
+    def test_watcher_picks_up_changed_csv(self, paths):
+        csv_path, bin_path = paths
+        service = registry.RegistryService(csv_path, bin_path, interval=0.05, settle=0)
+        service.load()
+        service.start()
+        _write_csv(csv_path, [("abcdef", "", "Cessna", "172", "")])
+        _age(bin_path)
+        _wait_for(lambda: service.generation == 2)
+        assert service.get("ABCDEF") == "Cessna 172"
+        service.stop()
+        service.join(2)
+        assert not service.is_alive()
+
+    def test_request_reload_forces_rebuild(self, paths):
+        csv_path, bin_path = paths
+        service = registry.RegistryService(csv_path, bin_path, interval=60)
+        service.load()
+        service.start()
+        service.request_reload()
+        _wait_for(lambda: service.generation == 2)
+        assert service.stats()["entries"] == 5
+        service.stop()
@@ -0,0 +1,108 @@
+import pytest
+import os
+import sys
+import numpy as np
+import pyModeS as pms
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import demod
+import signal_gen
+
+
+def _matrix(frame):
+    m = np.zeros((1, demod.FRAME_BYTES), dtype=np.uint8)
+    m[0, :len(frame)] = list(frame)
+    return m
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#  1. Ramki - zgodność z pyModeS i CRC
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class TestFrames:
+
+    def test_df17_parity(self):
+        frame = signal_gen.adsb_frame(0x4840D6, signal_gen.me_identification("KLM1023"))
+        assert pms.crc(frame.hex()) == 0
+        assert demod.crc_syndromes(_matrix(frame))[0] == 0
+
+    def test_df11_is_short_frame(self):
+        frame = signal_gen.df11_frame(0x4840D6)
+        assert len(frame) == demod.SHORT_FRAME_BYTES
+        assert demod.crc_syndromes(_matrix(frame))[0] == 0
+
+    def test_df20_syndrome_is_icao(self):
+        """Dla DF20/21 syndrom CRC równa się adresowi ICAO (pole AP)."""
+        frame = signal_gen.df20_frame(0x4840D6, 36000, mb=12345)
+        assert demod.crc_syndromes(_matrix(frame))[0] == 0x4840D6
+        assert pms.icao(frame.hex()).upper() == "4840D6"
+        assert pms.common.altcode(frame.hex()) == 36000
+
+    def test_df21_syndrome_is_icao(self):
+        frame = signal_gen.df21_frame(0xABCDEF, squawk_id=0x1234)
+        assert demod.crc_syndromes(_matrix(frame))[0] == 0xABCDEF
+
+    def test_identification_decodes(self):
+        frame = signal_gen.adsb_frame(0x4840D6, signal_gen.me_identification("KLM1023"))
+        assert pms.typecode(frame.hex()) == 4
+        assert pms.adsb.callsign(frame.hex()).rstrip("_") == "KLM1023"
+
+    def test_position_pair_decodes(self):
+        even = signal_gen.adsb_frame(0x4840D6, signal_gen.me_position(52.25, 3.92, 38000, odd=False)).hex()
+        odd = signal_gen.adsb_frame(0x4840D6, signal_gen.me_position(52.25, 3.92, 38000, odd=True)).hex()
+        assert pms.adsb.oe_flag(even) == 0 and pms.adsb.oe_flag(odd) == 1
+        assert pms.adsb.altitude(even) == 38000
+        lat, lon = pms.adsb.position(even, odd, 0, 1)
+        assert lat == pytest.approx(52.25, abs=1e-3)
+        assert lon == pytest.approx(3.92, abs=1e-3)
+
+    def test_velocity_decodes(self):
+        frame = signal_gen.adsb_frame(0x4840D6, signal_gen.me_velocity(300, 250, -1024)).hex()
+        speed, heading, vrate, _ = pms.adsb.velocity(frame)
+        assert speed == 300
+        assert heading == pytest.approx(250, abs=0.5)
+        assert vrate == -1024
+
+    def test_df18_header(self):
+        frame = signal_gen.adsb_frame(0x4840D6, signal_gen.me_velocity(300, 90), df=18)
+        assert pms.df(frame.hex()) == 18
+        assert demod.crc_syndromes(_matrix(frame))[0] == 0
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#  2. Sygnał - dekodowanie przez Demodulator
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class TestGenerate:
+
+    def test_deterministic_for_seed(self):
+        raw1, truth1, _ = signal_gen.generate(5, 0.2, seed=7)
+        raw2, truth2, _ = signal_gen.generate(5, 0.2, seed=7)
+        assert (raw1 == raw2).all()
+        assert truth1 == truth2
+
+    def test_raw_format(self):
+        raw, truth, planes = signal_gen.generate(3, 0.1)
+        assert raw.dtype == np.uint8
+        assert len(raw) == 2 * int(0.1 * signal_gen.SAMPLE_RATE)
+        assert len(planes) == 3
+        assert [t.offset for t in truth] == sorted(t.offset for t in truth)
+
+    def test_types_filter(self):
+        _, truth, _ = signal_gen.generate(10, 0.5, types=["DF11"])
+        assert truth and all(t.df == "DF11" for t in truth)
+
+    def test_strong_aligned_signal_fully_decoded(self):
+        """Bez szumu na granicy, bez kolizji i przesunięć dekoder musi odebrać każdą ramkę."""
+        raw, truth, _ = signal_gen.generate(3, 0.5, snr_db=30, misalign=False, seed=1)
+        offsets, frames = demod.demodulate(signal_gen.magnitude(raw))
+        decoded = {int(o): f.tobytes() for o, f in zip(offsets, frames)}
+        for t in truth:
+            assert decoded[t.offset][:len(t.frame)] == t.frame
+
+    def test_no_frames_in_pure_noise(self):
+        raw, truth, _ = signal_gen.generate(0, 0.5)
+        d = demod.Demodulator(len(raw) // 2)
+        _, _, syndromes = d.feed(raw)
+        assert truth == []
+        assert (syndromes == 0).sum() == 0
@@ -0,0 +1,164 @@
+import pytest
+import os
+import sys
+import json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import snapshot
+
+
+# ─── Helpery ───────────────────────────────────────────────────────────────────
+
+def _published(items, version=None, removed=(), floor=0):
+    """Migawka z listy (wersja, icao)."""
+    live = snapshot.LiveSnapshot()
+    version = version or max([v for v, _ in items] + [v for v, _ in removed] + [1])
+    live.publish(version, [(v, {"icao": icao}) for v, icao in items], 0.0, removed, floor)
+    return live
+
+
+def _delta(live, since, boot=None):
+    return json.loads(live.delta(since, boot))
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#  1. LiveSnapshot - pełny stan
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class TestLiveSnapshot:
+
+    def test_starts_empty(self):
+        live = snapshot.LiveSnapshot()
+        assert live.current.body == b"[]"
+        assert live.current.version == 0
+
+    def test_publish_encodes_json(self):
+        live = _published([(1, "A1"), (2, "A2")])
+        assert json.loads(live.current.body) == [{"icao": "A1"}, {"icao": "A2"}]
+        assert live.current.count == 2
+
+    def test_etag_changes_with_version(self):
+        live = snapshot.LiveSnapshot()
+        tags = {live.current.etag}
+        for v in range(1, 4):
+            live.publish(v, [], float(v))
+            tags.add(live.current.etag)
+        assert len(tags) == 4
+
+    def test_etag_differs_between_runs(self):
+        a = snapshot.LiveSnapshot()
+        b = snapshot.LiveSnapshot()
+        b.boot = a.boot + "x"
+        a.publish(1, [], 0.0)
+        b.publish(1, [], 0.0)
+        assert a.current.etag != b.current.etag
+
+    def test_older_state_does_not_overwrite(self):
+        """Dwa wątki publikują - wygrywa nowsza wersja stanu."""
+        live = snapshot.LiveSnapshot()
+        assert live.publish(5, [(5, {"icao": "NEW"})], 0.0)
+        assert not live.publish(4, [(4, {"icao": "OLD"})], 0.0)
+        assert json.loads(live.current.body) == [{"icao": "NEW"}]
+
+    def test_due_only_when_dirty_and_interval_passed(self):
+        live = snapshot.LiveSnapshot(rate=2.0)
+        assert live.due(10.0)
+        live.publish(1, [], 10.0)
+        live.dirty = False
+        assert not live.due(20.0) #brak zmian
+        live.dirty = True
+        assert not live.due(10.2)
+        assert live.due(10.5)
+
+    def test_snapshot_is_immutable(self):
+        live = _published([(1, "A1")])
+        with pytest.raises(AttributeError):
+            live.current.body = b"x"
+
+    def test_encoded_variant_cached_per_snapshot(self):
+        live = _published([(1, "A1")])
+        calls = []
+        encode = lambda: calls.append(1) or b"x"
+        assert live.encoded(live.current, ("columns",), encode) == b"x"
+        assert live.encoded(live.current, ("columns",), encode) == b"x"
+        assert len(calls) == 1
+        live.publish(2, [(2, {"icao": "A1"})], 0.0)
+        live.encoded(live.current, ("columns",), encode) #nowa migawka - kodowanie od nowa
+        assert len(calls) == 2
+
+    def test_encoded_variants_bounded(self):
+        live = _published([(1, "A1")])
+        for i in range(snapshot.ENCODED_VARIANTS + 5):
+            live.encoded(live.current, i, lambda: b"x")
+        assert len(live.current.encoded) == snapshot.ENCODED_VARIANTS
+
+    def test_stats(self):
+        live = snapshot.LiveSnapshot(rate=4.0)
+        live.publish(1, [(1, {"icao": "A1"})], 0.0)
+        stats = live.stats()
+        assert stats["aircraft"] == 1
+        assert stats["published"] == 1
+        assert stats["rate_hz"] == 4.0
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#  2. Odpowiedź różnicowa (/data?since=N)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class TestDelta:
+
+    def test_only_changed_after_since(self):
+        live = _published([(3, "A1"), (7, "A2"), (5, "A3")])
+        delta = _delta(live, 4, live.boot)
+        assert not delta["full"]
+        assert delta["version"] == 7
+        assert [p["icao"] for p in delta["planes"]] == ["A3", "A2"]
+
+    def test_up_to_date_client_gets_nothing(self):
+        live = _published([(3, "A1")])
+        delta = _delta(live, 3, live.boot)
+        assert delta["planes"] == []
+        assert delta["removed"] == []
+
+    def test_removed_since(self):
+        live = _published([(2, "A1")], version=9, removed=((4, "B1"), (8, "B2")))
+        delta = _delta(live, 5, live.boot)
+        assert delta["removed"] == ["B2"]
+
+    def test_first_request_is_full(self):
+        live = _published([(1, "A1")], removed=((2, "B1"),))
+        delta = _delta(live, 0)
+        assert delta["full"]
+        assert [p["icao"] for p in delta["planes"]] == ["A1"]
+        assert delta["removed"] == []
+
+    def test_other_boot_is_full(self):
+        live = _published([(3, "A1"), (7, "A2")])
+        assert _delta(live, 5, "stary")["full"]
+
+    def test_client_ahead_of_server_is_full(self):
+        """Po restarcie serwera wersje liczą się od nowa."""
+        live = _published([(3, "A1")])
+        assert _delta(live, 100)["full"]
+
+    def test_removals_older_than_journal_give_full(self):
+        live = _published([(20, "A1")], version=20, removed=((15, "B1"),), floor=10)
+        assert _delta(live, 9, live.boot)["full"]
+        assert not _delta(live, 10, live.boot)["full"]
+
+    def test_boot_in_response(self):
+        live = _published([(1, "A1")])
+        assert _delta(live, 0)["boot"] == live.boot
+
+    def test_on_publish_gets_step_delta(self):
+        """Odbiorca (/stream) dostaje różnicę między kolejnymi migawkami."""
+        sent = []
+        live = snapshot.LiveSnapshot(on_publish=lambda version, body: sent.append((version, json.loads(body))))
+        live.publish(3, [(2, {"icao": "A1"}), (3, {"icao": "A2"})], 0.0)
+        live.publish(5, [(2, {"icao": "A1"}), (5, {"icao": "A2"})], 1.0, removed=((4, "B1"),))
+        live.publish(5, [], 2.0) #ta sama wersja - bez powiadomienia
+        assert [v for v, _ in sent] == [3, 5]
+        assert sent[0][1]["full"]
+        assert not sent[1][1]["full"]
+        assert [p["icao"] for p in sent[1][1]["planes"]] == ["A2"]
+        assert sent[1][1]["removed"] == ["B1"]
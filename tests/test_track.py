@@ -0,0 +1,147 @@
+import pytest
+import os
+import sys
+import math
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import track
+
+
+# ─── Helpery ───────────────────────────────────────────────────────────────────
+
+def _circle(n, per_lap=480, radius_km=5.0, lat0=52.0, lon0=17.0):
+    """Punkty na okręgu (strefa oczekiwania, pozycja 2 razy na sekundę - ok. 480 na okrążenie)."""
+    points = []
+    for i in range(n):
+        a = 2 * math.pi * i / per_lap
+        lat = lat0 + radius_km * math.sin(a) / track.KM_PER_DEG
+        lon = lon0 + radius_km * math.cos(a) / (track.KM_PER_DEG * math.cos(math.radians(lat0)))
+        points.append((lat, lon))
+    return points
+
+
+def _deviation_km(p, a, b):
+    """Odległość punktu p od odcinka a-b (płasko, km)."""
+    cos_lat = math.cos(math.radians(a[0]))
+    bx, by = (b[1] - a[1]) * cos_lat * track.KM_PER_DEG, (b[0] - a[0]) * track.KM_PER_DEG
+    px, py = (p[1] - a[1]) * cos_lat * track.KM_PER_DEG, (p[0] - a[0]) * track.KM_PER_DEG
+    length2 = bx * bx + by * by
+    u = max(0.0, min(1.0, (px * bx + py * by) / length2)) if length2 else 0.0
+    return math.hypot(px - u * bx, py - u * by)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#  1. Zapis punktów
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class TestAppend:
+
+    def test_columns_are_float32(self):
+        t = track.Track()
+        t.append(52.0, 17.0, 100.0, 9000)
+        assert t.lat.typecode == "f"
+        assert t.nbytes() == 16
+
+    def test_time_relative_to_first_point(self):
+        t = track.Track()
+        t.append(52.0, 17.0, 1000.0)
+        t.append(52.1, 17.0, 1002.5)
+        assert t.start == 1000.0
+        assert list(t.t) == [0.0, 2.5]
+
+    def test_unknown_altitude_is_nan(self):
+        t = track.Track()
+        t.append(52.0, 17.0, 0.0)
+        assert math.isnan(t.alt[0])
+
+    def test_no_simplification_by_default(self):
+        t = track.Track()
+        for i in range(10):
+            t.append(52.0 + i * 0.01, 17.0, float(i))
+        assert len(t) == 10
+
+    def test_point(self):
+        t = track.Track()
+        t.append(52.0, 17.0, 0.0)
+        t.append(52.5, 17.5, 1.0)
+        assert t.point(-1) == pytest.approx((52.5, 17.5))
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#  2. Wycinki i JSON
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class TestViews:
+
+    def test_columns_do_not_copy(self):
+        t = track.Track()
+        for i in range(5):
+            t.append(52.0 + i, 17.0, float(i))
+        lat, lon, alt, ts = t.columns(2)
+        assert isinstance(lat, memoryview)
+        assert list(lat) == [54.0, 55.0, 56.0]
+        arr = np.frombuffer(lat, dtype=np.float32)
+        assert arr.base is not None
+        assert list(ts) == [2.0, 3.0, 4.0]
+
+    def test_to_list_rounds_float32(self):
+        t = track.Track()
+        t.append(52.1, 17.3, 0.0)
+        assert t.to_list() == [[52.1, 17.3]]
+
+    def test_to_list_from_index(self):
+        t = track.Track()
+        for i in range(4):
+            t.append(52.0 + i, 17.0, float(i))
+        assert t.to_list(3) == [[55.0, 17.0]]
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+#  3. Upraszczanie w locie
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class TestSimplification:
+
+    def test_straight_line_keeps_ends(self):
+        t = track.Track(tolerance=0.02)
+        for i in range(100):
+            t.append(52.0 + i * 0.001, 17.0, float(i))
+        assert len(t) == 2
+        assert t.point(0) == pytest.approx((52.0, 17.0))
+        assert t.point(-1)[0] == pytest.approx(52.099, abs=1e-5)
+        assert t.t[-1] == 99.0
+
+    def test_turn_is_kept(self):
+        t = track.Track(tolerance=0.02)
+        for i in range(10):
+            t.append(52.0 + i * 0.01, 17.0, float(i))
+        for i in range(1, 10):
+            t.append(52.09, 17.0 + i * 0.01, 10.0 + i)
+        assert len(t) == 3
+        assert t.point(1) == pytest.approx((52.09, 17.0))
+
+    def test_turnaround_is_kept(self):
+        t = track.Track(tolerance=0.02)
+        for lat in (52.0, 52.01, 52.02, 52.01, 52.0):
+            t.append(lat, 17.0, 0.0)
+        assert len(t) == 3
+
+    def test_dropped_points_within_tolerance(self):
+        tolerance = 0.05
+        points = _circle(960)
+        t = track.Track(tolerance=tolerance)
+        for i, (lat, lon) in enumerate(points):
+            t.append(lat, lon, float(i))
+        kept = [t.point(i) for i in range(len(t))]
+        assert len(kept) < len(points) / 10
+        #Każdy oryginalny punkt leży blisko któregoś odcinka uproszczonej trasy
+        for p in points:
+            assert min(_deviation_km(p, a, b) for a, b in zip(kept, kept[1:])) <= tolerance + 0.002
+
+    def test_circling_memory_is_bounded_by_shape(self):
+        """Krążenie godzinami: liczba punktów rośnie z liczbą okrążeń, nie z liczbą ramek."""
+        t = track.Track(tolerance=0.05)
+        for i, (lat, lon) in enumerate(_circle(480 * 20)):
+            t.append(lat, lon, float(i))
+        assert len(t) <= 20 * 30
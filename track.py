@@ -0,0 +1,102 @@
+import math
+from array import array
+
+#Trasa jednego samolotu: kolumny array('f') (lat, lon, wysokość, czas od pierwszego punktu).
+#Dopisanie punktu to O(1) (zamortyzowane), wycinki to memoryview bez kopiowania,
+#a opcjonalne upraszczanie w locie usuwa punkty leżące na prostej (w granicach tolerancji),
+#więc samolot lecący długo po prostej nie rozdyma trasy.
+
+KM_PER_DEG = 111.2
+
+def _wrap(angle):
+    #Kąt sprowadzony do przedziału (-pi, pi]
+    return angle - 2 * math.pi * math.ceil((angle - math.pi) / (2 * math.pi))
+
+class Track:
+    __slots__ = ("lat", "lon", "alt", "t", "start", "tolerance",
+                 "_ref", "_lo", "_hi", "_last_d")
+
+    def __init__(self, tolerance=0.0):
+        #tolerance - km; 0 wyłącza upraszczanie (każdy punkt zostaje)
+        self.lat = array("f")
+        self.lon = array("f")
+        self.alt = array("f") #m, NaN gdy nieznana
+        self.t = array("f") #s od self.start
+        self.start = None
+        self.tolerance = tolerance
+        self._ref = None #kierunek odniesienia "rękawa" od punktu zakotwiczenia
+        self._lo = 0.0
+        self._hi = 0.0
+        self._last_d = 0.0
+
+    def __len__(self):
+        return len(self.lat)
+
+    def point(self, i):
+        return self.lat[i], self.lon[i]
+
+    def append(self, lat, lon, t, alt=None):
+        if self.start is None:
+            self.start = t
+        alt = math.nan if alt is None else alt
+        dt = t - self.start
+        if self.tolerance > 0 and len(self.lat) >= 2 and self._fits(lat, lon):
+            #Ostatni punkt leży na prostej między zakotwiczeniem a nowym - zastępujemy go
+            self.lat[-1] = lat
+            self.lon[-1] = lon
+            self.alt[-1] = alt
+            self.t[-1] = dt
+            return
+        self.lat.append(lat)
+        self.lon.append(lon)
+        self.alt.append(alt)
+        self.t.append(dt)
+        self._ref = None
+
+    def _fits(self, lat, lon):
+        #Upraszczanie "rękawem" (sleeve): od ostatniego zachowanego punktu trzymamy zakres kierunków,
+        #w którym mieszczą się wszystkie pominięte punkty z dokładnością do tolerancji.
+        #Nowy punkt musi być dalej niż poprzedni i mieścić się w zakresie - wtedy żaden
+        #z pominiętych punktów nie odstaje od odcinka bardziej niż tolerancja.
+        a_lat = self.lat[-2]
+        a_lon = self.lon[-2]
+        cos_lat = math.cos(math.radians(a_lat))
+        if self._ref is None:
+            #Pierwszy punkt po zakotwiczeniu - zakres wyznacza ostatni dopisany punkt
+            x = (self.lon[-1] - a_lon) * cos_lat * KM_PER_DEG
+            y = (self.lat[-1] - a_lat) * KM_PER_DEG
+            self._last_d = math.hypot(x, y)
+            self._ref = math.atan2(y, x)
+            w = self._half_width(self._last_d)
+            self._lo, self._hi = -w, w
+        x = (lon - a_lon) * cos_lat * KM_PER_DEG
+        y = (lat - a_lat) * KM_PER_DEG
+        d = math.hypot(x, y)
+        if d <= self._last_d:
+            return False #zawrócił albo stoi - punkt zostaje
+        rel = _wrap(math.atan2(y, x) - self._ref)
+        if not self._lo <= rel <= self._hi:
+            return False
+        w = self._half_width(d)
+        self._lo = max(self._lo, rel - w)
+        self._hi = min(self._hi, rel + w)
+        self._last_d = d
+        return True
+
+    def _half_width(self, d):
+        if d <= self.tolerance:
+            return math.pi
+        return math.asin(self.tolerance / d)
+
+    def columns(self, start=0, stop=None):
+        #(lat, lon, alt, t) jako memoryview - wycinek bez kopiowania (np.frombuffer też nie kopiuje)
+        return tuple(memoryview(col)[start:stop] for col in (self.lat, self.lon, self.alt, self.t))
+
+    def to_list(self, start=0, ndigits=5):
+        #Punkty [lat, lon] do JSON (float32 zaokrąglony do ~1 m, bez ogona cyfr)
+        lat = self.lat
+        lon = self.lon
+        return [[round(lat[i], ndigits), round(lon[i], ndigits)] for i in range(start, len(lat))]
+
+    def nbytes(self):
+        return sum(col.itemsize * len(col) for col in (self.lat, self.lon, self.alt, self.t))